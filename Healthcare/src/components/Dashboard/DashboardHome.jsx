@@ -226,7 +226,7 @@ const DashboardHome = ({ user, setActiveSection }) => {
               >
                 <div className="relative h-56 overflow-hidden bg-gradient-to-br from-purple-600/20 to-blue-600/20">
                   <img
-                    src={doctor.img}
+                    src={doctor.img_variants?.card || doctor.img}
                     alt={doctor.name}
                     className="w-full h-full object-cover object-top group-hover:scale-110 transition-transform duration-500"
                     onError={(e) => { e.target.src = 'https://via.placeholder.com/200'; }}
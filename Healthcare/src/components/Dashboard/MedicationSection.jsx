@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import toast from 'react-hot-toast';
 import { 
   Pill, 
@@ -42,6 +42,8 @@ const MedicationSection = () => {
   const [savedAddresses, setSavedAddresses] = useState([]);
   const [previousOrders, setPreviousOrders] = useState([]);
   const [loading, setLoading] = useState(false);
+  // One key per checkout attempt, so retries after a timeout never place a second order
+  const checkoutKey = useRef(null);
   const [deliveryAddress, setDeliveryAddress] = useState({
     fullName: "",
     phone: "",
@@ -141,7 +143,7 @@ const MedicationSection = () => {
 
   const medications = [
     {
-      id: 1,
+      id: "med-1",
       name: "Paracetamol 500mg",
       category: "pain-relief",
       price: 749,
@@ -153,7 +155,7 @@ const MedicationSection = () => {
       reviews: 234
     },
     {
-      id: 2,
+      id: "med-2",
       name: "Ibuprofen 400mg",
       category: "pain-relief",
       price: 1099,
@@ -165,7 +167,7 @@ const MedicationSection = () => {
       reviews: 189
     },
     {
-      id: 3,
+      id: "med-3",
       name: "Amoxicillin 500mg",
       category: "antibiotics",
       price: 1349,
@@ -177,7 +179,7 @@ const MedicationSection = () => {
       reviews: 156
     },
     {
-      id: 4,
+      id: "med-4",
       name: "Vitamin D3 1000 IU",
       category: "vitamins",
       price: 1599,
@@ -189,7 +191,7 @@ const MedicationSection = () => {
       reviews: 412
     },
     {
-      id: 5,
+      id: "med-5",
       name: "Multivitamin Complex",
       category: "vitamins",
       price: 2099,
@@ -201,7 +203,7 @@ const MedicationSection = () => {
       reviews: 328
     },
     {
-      id: 6,
+      id: "med-6",
       name: "Cold Relief Syrup",
       category: "cold-flu",
       price: 1249,
@@ -213,7 +215,7 @@ const MedicationSection = () => {
       reviews: 267
     },
     {
-      id: 7,
+      id: "med-7",
       name: "Antihistamine Tablets",
       category: "pain-relief",
       price: 999,
@@ -225,7 +227,7 @@ const MedicationSection = () => {
       reviews: 198
     },
     {
-      id: 8,
+      id: "med-8",
       name: "Cough Suppressant",
       category: "cold-flu",
       price: 1149,
@@ -237,7 +239,7 @@ const MedicationSection = () => {
       reviews: 145
     },
     {
-      id: 9,
+      id: "med-9",
       name: "Omega-3 Fish Oil",
       category: "vitamins",
       price: 2499,
@@ -249,7 +251,7 @@ const MedicationSection = () => {
       reviews: 389
     },
     {
-      id: 10,
+      id: "med-10",
       name: "Azithromycin 500mg",
       category: "antibiotics",
       price: 1949,
@@ -261,7 +263,7 @@ const MedicationSection = () => {
       reviews: 142
     },
     {
-      id: 11,
+      id: "med-11",
       name: "Vitamin C 1000mg",
       category: "vitamins",
       price: 1399,
@@ -273,7 +275,7 @@ const MedicationSection = () => {
       reviews: 456
     },
     {
-      id: 12,
+      id: "med-12",
       name: "Pain Relief Gel",
       category: "pain-relief",
       price: 1699,
@@ -426,8 +428,10 @@ const MedicationSection = () => {
 
   const completeOrder = async (prescriptionUploaded = false, prescriptionUrl = null) => {
     setLoading(true);
+    checkoutKey.current = checkoutKey.current || crypto.randomUUID();
     try {
       const orderData = {
+        idempotencyKey: checkoutKey.current,
         items: cart,
         deliveryAddress: deliveryAddress,
         paymentMethod: 'COD',
@@ -438,6 +442,7 @@ const MedicationSection = () => {
       const response = await orderAPI.createOrder(orderData);
       
       if (response.success) {
+        checkoutKey.current = null;
         toast.success('Order placed successfully! Expected delivery in 2-3 days');
         setCart([]);
         setCurrentView("medications");
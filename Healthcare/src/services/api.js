@@ -101,6 +101,18 @@ export const doctorAPI = {
     const response = await apiClient.get(`/doctors/specialty/${specialty}`);
     return response.data;
   },
+
+  // filters: specialty, min_fee, max_fee, min_rating, min_experience, day, active,
+  // sort (rating | fee | experience), order, limit, cursor (next_cursor of the previous page)
+  searchDoctors: async (filters = {}) => {
+    const response = await apiClient.get('/doctors/search', { params: filters });
+    return response.data;
+  },
+
+  getSpecialties: async () => {
+    const response = await apiClient.get('/doctors/specialties');
+    return response.data;
+  },
 };
 
 // Appointment API endpoints
@@ -136,10 +148,29 @@ export const appointmentAPI = {
     return response.data;
   },
 
+  getAvailabilityCalendar: async (doctorId, start, days = 30) => {
+    const response = await apiClient.get(`/appointments/availability-calendar/${doctorId}?start=${start}&days=${days}`);
+    return response.data;
+  },
+
+  getNextAvailableSlots: async (specialty, limit = 5) => {
+    const response = await apiClient.get(`/appointments/next-available?specialty=${encodeURIComponent(specialty)}&limit=${limit}`);
+    return response.data;
+  },
+
   getUpcomingAppointments: async (days = 30) => {
     const response = await apiClient.get(`/appointments/upcoming?days=${days}`);
     return response.data;
   },
 };
 
+// Search API endpoints
+export const searchAPI = {
+  // Completions for the search box, grouped into medicines, doctors and specialties
+  typeahead: async (query, limit = 5) => {
+    const response = await apiClient.get('/typeahead', { params: { q: query, limit } });
+    return response.data;
+  },
+};
+
 export default apiClient;
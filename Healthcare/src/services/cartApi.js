@@ -29,16 +29,11 @@ export const cartAPI = {
     return response.data;
   },
 
-  // Add item to cart
+  // Add item to cart; name, price and image come from the medicine catalog
   addToCart: async (item) => {
     const response = await apiClient.post('/cart', {
       medicine_id: item.id?.toString() || item.medicine_id,
-      name: item.name,
-      price: item.price,
-      quantity: item.quantity || 1,
-      image: item.image,
-      description: item.description,
-      requires_prescription: item.requiresPrescription || item.requires_prescription || false
+      quantity: item.quantity || 1
     });
     return response.data;
   },
@@ -55,6 +50,13 @@ export const cartAPI = {
     return response.data;
   },
 
+  // Apply several changes in one request, e.g.
+  // [{ op: 'update', medicine_id: 'med-1', quantity: 3 }, { op: 'remove', medicine_id: 'med-2' }]
+  batchUpdate: async (operations) => {
+    const response = await apiClient.post('/cart/batch', { operations });
+    return response.data;
+  },
+
   // Clear entire cart
   clearCart: async () => {
     const response = await apiClient.delete('/cart');
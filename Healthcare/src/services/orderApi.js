@@ -38,13 +38,10 @@ export const orderAPI = {
   // Create new order
   createOrder: async (orderData) => {
     const response = await apiClient.post('/orders', {
+      // Prices and line details are looked up by the server
       items: orderData.items.map(item => ({
         medicine_id: item.id?.toString() || item.medicine_id,
-        name: item.name,
-        price: item.price,
-        quantity: item.quantity,
-        image: item.image,
-        requires_prescription: item.requiresPrescription || item.requires_prescription || false
+        quantity: item.quantity
       })),
       delivery_address: {
         full_name: orderData.deliveryAddress.fullName,
@@ -59,6 +56,8 @@ export const orderAPI = {
       payment_method: orderData.paymentMethod || 'COD',
       prescription_uploaded: orderData.prescriptionUploaded || false,
       prescription_url: orderData.prescriptionUrl || null
+    }, {
+      headers: orderData.idempotencyKey ? { 'Idempotency-Key': orderData.idempotencyKey } : {}
     });
     return response.data;
   },
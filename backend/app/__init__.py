@@ -81,7 +81,7 @@ def create_app():
                  "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
                  "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
                  "supports_credentials": True,
-                 "expose_headers": ["Content-Type", "Authorization"],
+                 "expose_headers": ["Content-Type", "Authorization", "ETag"],
                  "max_age": 3600
              }
          })
@@ -110,6 +110,7 @@ def create_app():
     from app.routes.address_routes import address_bp
     from app.routes.profile_routes import profile_bp
     from app.routes.assessment_routes import assessment_bp
+    from app.routes.search_routes import search_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(doctor_bp)
     app.register_blueprint(appointment_bp)
@@ -120,6 +121,7 @@ def create_app():
     app.register_blueprint(address_bp)
     app.register_blueprint(profile_bp)
     app.register_blueprint(assessment_bp)
+    app.register_blueprint(search_bp)
     
     from app.routes.player_stats_routes import register_player_stats_routes
     register_player_stats_routes(app)
@@ -2,9 +2,20 @@ from app.models.admin_model import Admin
 from app.models.user_models import User
 from app.models.doctor_model import Doctor
 from app.models.appointments_models import Appointment
+from app.services.slot_index_service import sync_slot_status
+from app.services.appointment_cache_service import get_upcoming_cache_stats, invalidate_upcoming
+from app.models.doctor_schedule_model import DoctorSchedule
+from app.services.schedule_service import save_doctor_schedule
+from app.services.doctor_catalog_service import bump_catalog_version
+from app.services.specialty_facet_service import refresh_specialty_facets
+from app.services.batch_loader_service import load_references, reference_id
+from app.services.dashboard_counter_service import get_dashboard_counters, change_appointment_status
+from app.services.image_variant_service import variants_for
+from app.services.inventory_service import set_stock
 from flask import jsonify
 from app import bcrypt, socketio
 from flask_jwt_extended import create_access_token
+from mongoengine.errors import NotUniqueError
 from datetime import datetime
 
 def admin_login(data):
@@ -57,56 +68,21 @@ def get_dashboard_stats():
     try:
         print("=== Starting get_dashboard_stats ===")
         
-        total_users = User.objects.count()
-        print(f"Total users: {total_users}")
-        
-        total_doctors = Doctor.objects.count()
-        print(f"Total doctors: {total_doctors}")
-        
-        total_appointments = Appointment.objects.count()
-        print(f"Total appointments: {total_appointments}")
-        
-        # Appointments by status - handle case-insensitive matching
-        pending_appointments = Appointment.objects(status__iexact="pending").count()
-        print(f"Pending appointments: {pending_appointments}")
-        
-        confirmed_appointments = Appointment.objects(status__iexact="confirmed").count()
-        print(f"Confirmed appointments: {confirmed_appointments}")
-        
-        completed_appointments = Appointment.objects(status__iexact="completed").count()
-        print(f"Completed appointments: {completed_appointments}")
-        
-        cancelled_appointments = Appointment.objects(status__iexact="cancelled").count()
-        print(f"Cancelled appointments: {cancelled_appointments}")
+        # All counts come from the materialized dashboard_counters document
+        stats = get_dashboard_counters()
+        print(f"Dashboard counters: {stats}")
         
         # Recent appointments - order by appointment_date instead of created_at
         print("Fetching recent appointments...")
-        recent_appointments = Appointment.objects().order_by('-appointment_date').limit(10)
-        print(f"Found {recent_appointments.count()} recent appointments")
+        recent_appointments = Appointment.objects().order_by('-appointment_date', '-start_minute').limit(10)
         
-        # Serialize appointments with error handling
-        serialized_appointments = []
-        for apt in recent_appointments:
-            try:
-                serialized_appointments.append(_serialize_appointment(apt))
-            except Exception as e:
-                print(f"Error serializing appointment {apt.id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
+        # Serialize appointments with batched user/doctor lookups
+        serialized_appointments = _serialize_appointments(recent_appointments)
         
         print(f"Successfully serialized {len(serialized_appointments)} appointments")
         
         result = {
-            "stats": {
-                "total_users": total_users,
-                "total_doctors": total_doctors,
-                "total_appointments": total_appointments,
-                "pending_appointments": pending_appointments,
-                "confirmed_appointments": confirmed_appointments,
-                "completed_appointments": completed_appointments,
-                "cancelled_appointments": cancelled_appointments
-            },
+            "stats": stats,
             "recent_appointments": serialized_appointments
         }
         
@@ -133,9 +109,9 @@ def get_all_users_admin():
 def get_all_appointments_admin():
     """Get all appointments (admin only)"""
     try:
-        appointments = Appointment.objects().order_by('-appointment_date')
+        appointments = _serialize_appointments(Appointment.objects().order_by('-appointment_date', '-start_minute'))
         return {
-            "appointments": [_serialize_appointment(apt) for apt in appointments],
+            "appointments": appointments,
             "count": len(appointments)
         }, 200
     except Exception as e:
@@ -153,6 +129,7 @@ def get_all_doctors_admin():
                 "name": doctor.name,
                 "specialty": doctor.specialty,
                 "image": doctor.img if hasattr(doctor, 'img') else None,
+                "image_variants": variants_for(doctor.img, doctor.img_variants),
                 "experience": doctor.experience,
                 "rating": doctor.rating,
                 "consultation_fee": doctor.consultation_fee,
@@ -183,23 +160,38 @@ def update_appointment_status_admin(appointment_id, new_status):
             return {"message": "Appointment not found"}, 404
         
         # Update status
-        appointment.status = new_status
-        appointment.save()
+        previous_status = appointment.status
+        try:
+            appointment = change_appointment_status(appointment, new_status)
+        except NotUniqueError:
+            return {"message": "This time slot is already booked"}, 409
+        if appointment is None:
+            return {"message": "Appointment status was changed by another request, please retry"}, 409
+        sync_slot_status(appointment, previous_status)
+        invalidate_upcoming(reference_id(appointment, "user"))
+        serialized = _serialize_appointments([appointment])[0]
         
         # Emit WebSocket event for real-time update
         socketio.emit('appointment_updated', {
             'appointment_id': str(appointment.id),
             'status': new_status,
-            'appointment': _serialize_appointment(appointment)
+            'appointment': serialized
         }, namespace='/')
         
         return {
             "message": f"Appointment status updated to {new_status}",
-            "appointment": _serialize_appointment(appointment)
+            "appointment": serialized
         }, 200
     except Exception as e:
         return {"message": f"Error updating appointment: {str(e)}"}, 500
 
+def get_cache_stats_admin():
+    """Get hit/miss counters of the Redis-backed caches (admin only)"""
+    stats = get_upcoming_cache_stats()
+    if stats is None:
+        return {"message": "Cache statistics unavailable"}, 503
+    return {"upcoming_appointments": stats}, 200
+
 def update_doctor_availability_admin(doctor_id, is_active):
     """Update doctor availability status (admin only)"""
     try:
@@ -211,6 +203,8 @@ def update_doctor_availability_admin(doctor_id, is_active):
         # Update is_active field
         doctor.is_active = is_active
         doctor.save()
+        bump_catalog_version()
+        refresh_specialty_facets(doctor.specialty)
         
         # Emit WebSocket event for real-time update
         socketio.emit('doctor_status_updated', {
@@ -230,6 +224,59 @@ def update_doctor_availability_admin(doctor_id, is_active):
     except Exception as e:
         return {"message": f"Error updating doctor availability: {str(e)}"}, 500
 
+def update_medicine_stock_admin(medicine_id, stock):
+    """Set a medicine's stock level (admin only)"""
+    try:
+        if not isinstance(stock, int) or isinstance(stock, bool):
+            return {"message": "stock must be an integer"}, 400
+        if not set_stock(medicine_id, stock):
+            return {"message": "Medicine not found"}, 404
+        return {
+            "message": "Stock updated",
+            "medicine": {"id": medicine_id, "stock": stock, "in_stock": stock > 0}
+        }, 200
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    except Exception as e:
+        return {"message": f"Error updating stock: {str(e)}"}, 500
+
+def get_doctor_schedule_admin(doctor_id):
+    """Get a doctor's working schedule (admin only)"""
+    try:
+        doctor = Doctor.objects(doctor_id=doctor_id).first()
+        if not doctor:
+            return {"message": "Doctor not found"}, 404
+        
+        schedule = DoctorSchedule.objects(doctor_id=doctor_id).first()
+        return {
+            "doctor_id": doctor_id,
+            # Doctors without a stored schedule use the default 9 AM - 5 PM template
+            "schedule": schedule.to_dict() if schedule else None,
+            "availability": doctor.availability
+        }, 200
+    except Exception as e:
+        return {"message": f"Error fetching doctor schedule: {str(e)}"}, 500
+
+def update_doctor_schedule_admin(doctor_id, data):
+    """Replace a doctor's working schedule (admin only)"""
+    try:
+        doctor = Doctor.objects(doctor_id=doctor_id).first()
+        if not doctor:
+            return {"message": "Doctor not found"}, 404
+        
+        try:
+            schedule = save_doctor_schedule(doctor, data)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        
+        return {
+            "message": "Doctor schedule updated",
+            "schedule": schedule.to_dict(),
+            "availability": doctor.availability
+        }, 200
+    except Exception as e:
+        return {"message": f"Error updating doctor schedule: {str(e)}"}, 500
+
 def _serialize_user(user):
     """Serialize user data"""
     return {
@@ -241,24 +288,23 @@ def _serialize_user(user):
         "created_at": user.created_at.strftime("%Y-%m-%d") if hasattr(user, 'created_at') and user.created_at else None
     }
 
-def _serialize_appointment(appointment):
+def _serialize_appointments(appointments):
+    """Serialize appointments, fetching their users and doctors in one $in query each"""
+    appointments = list(appointments)
+    users = load_references(appointments, "user", User, only=("name", "email"))
+    doctors = load_references(appointments, "doctor", Doctor)
+    return [_serialize_appointment(apt, users, doctors) for apt in appointments]
+
+def _serialize_appointment(appointment, users, doctors):
     """Serialize appointment data with doctor image"""
-    try:
-        # Try to get user data with null check
-        user_data = {
-            "id": str(appointment.user.id) if appointment.user else None,
-            "name": appointment.user.name if appointment.user else "Unknown User",
-            "email": appointment.user.email if appointment.user else "N/A"
-        }
-    except Exception as e:
-        print(f"Error getting user data: {str(e)}")
-        user_data = {
-            "id": None,
-            "name": "Unknown User",
-            "email": "N/A"
-        }
+    user = users.get(reference_id(appointment, "user"))
+    user_data = {
+        "id": str(user.id) if user else None,
+        "name": user.name if user else "Unknown User",
+        "email": user.email if user else "N/A"
+    }
     
-    # Try to get doctor data with proper null checking
+    # Fall back to placeholder data for appointments whose doctor was removed
     doctor_data = {
         "id": None,
         "name": "Unknown Doctor",
@@ -269,25 +315,18 @@ def _serialize_appointment(appointment):
         "consultation_fee": 0
     }
     
-    try:
-        # Check if doctor reference exists and is valid
-        if appointment.doctor:
-            # Fetch doctor from database to ensure it exists
-            doctor = Doctor.objects(doctor_id=appointment.doctor.doctor_id).first()
-            if doctor:
-                doctor_data = {
-                    "id": doctor.doctor_id,
-                    "name": doctor.name,
-                    "specialty": doctor.specialty,
-                    "image": doctor.img if hasattr(doctor, 'img') else None,
-                    "rating": doctor.rating if hasattr(doctor, 'rating') else 4.5,
-                    "experience": doctor.experience if hasattr(doctor, 'experience') else 5,
-                    "consultation_fee": doctor.consultation_fee if hasattr(doctor, 'consultation_fee') else 500
-                }
-            else:
-                print(f"Doctor {appointment.doctor.doctor_id} not found in database")
-    except Exception as e:
-        print(f"Error getting doctor data: {str(e)}")
+    doctor = doctors.get(reference_id(appointment, "doctor"))
+    if doctor:
+        doctor_data = {
+            "id": doctor.doctor_id,
+            "name": doctor.name,
+            "specialty": doctor.specialty,
+            "image": doctor.img if hasattr(doctor, 'img') else None,
+            "image_variants": variants_for(doctor.img, doctor.img_variants),
+            "rating": doctor.rating if hasattr(doctor, 'rating') else 4.5,
+            "experience": doctor.experience if hasattr(doctor, 'experience') else 5,
+            "consultation_fee": doctor.consultation_fee if hasattr(doctor, 'consultation_fee') else 500
+        }
     
     return {
         "id": str(appointment.id),
@@ -1,8 +1,31 @@
 from app.models.appointments_models import Appointment
 from app.models.doctor_model import Doctor
 from app.models.user_models import User
+from app.services.appointment_cache_service import (
+    get_cached_upcoming,
+    invalidate_upcoming,
+    set_cached_upcoming
+)
+from app.services.batch_loader_service import load_references, reference_id
+from app.services.dashboard_counter_service import record_appointment_created, change_appointment_status
+from app.services.image_variant_service import variants_for
+from app.services.schedule_service import get_compiled_schedule
+from app.services.slot_search_service import find_next_available
+from app.services.slot_index_service import (
+    ACTIVE_STATUSES,
+    get_free_slots,
+    get_free_slots_in_range,
+    mark_slot_booked,
+    sync_slot_status
+)
 from datetime import datetime, timedelta
 from flask import jsonify
+from mongoengine.errors import NotUniqueError
+
+SLOT_TAKEN_MESSAGE = "This time slot is already booked"
+STATUS_CONFLICT_MESSAGE = "Appointment status was changed by another request, please retry"
+MAX_CALENDAR_DAYS = 62
+MAX_SEARCH_RESULTS = 50
 
 def create_appointment(data, user_id):
     """Create a new appointment"""
@@ -40,38 +63,44 @@ def create_appointment(data, user_id):
         if appointment_date.date() < datetime.now().date():
             return {"message": "Cannot book appointments in the past"}, 400
         
-        # Check if doctor is available on that day
-        day_name = appointment_date.strftime("%A")
-        if day_name not in doctor.availability:
-            return {"message": f"Doctor is not available on {day_name}"}, 400
-        
-        # Check for conflicting appointments
-        existing = Appointment.objects(
-            doctor=doctor,
-            appointment_date=appointment_date,
-            appointment_time=data["appointment_time"],
-            status__in=["pending", "confirmed"]
-        ).first()
-        
-        if existing:
-            return {"message": "This time slot is already booked"}, 409
+        # Check the doctor works that day and the time is one of the day's slots
+        schedule = get_compiled_schedule(doctor)
+        day_slots = schedule.slots_for(appointment_date)
+        if not day_slots.slots:
+            return {"message": _unavailable_message(schedule, appointment_date)}, 400
+        if data["appointment_time"] not in day_slots.starts:
+            return {"message": "Invalid time slot for this doctor"}, 400
+        # Slots of different lengths can overlap without sharing a start time
+        if data["appointment_time"] not in get_free_slots(doctor, appointment_date, day_slots):
+            return {"message": SLOT_TAKEN_MESSAGE}, 409
         
         # Create appointment
+        start_minute = day_slots.starts[data["appointment_time"]]
         appointment = Appointment(
             user=user,
             doctor=doctor,
             appointment_date=appointment_date,
             appointment_time=data["appointment_time"],
+            start_minute=start_minute,
+            end_minute=start_minute + day_slots.length,
             reason=data["reason"],
             notes=data.get("notes", ""),
             consultation_type=data.get("consultation_type", "in-person"),
             status="pending"
         )
-        appointment.save()
+        # The unique_active_minutes index rejects an active booking overlapping
+        # another one, so concurrent requests race safely inside MongoDB
+        try:
+            appointment.save()
+        except NotUniqueError:
+            return {"message": SLOT_TAKEN_MESSAGE}, 409
+        mark_slot_booked(appointment)
+        record_appointment_created(appointment.status)
+        invalidate_upcoming(user_id)
         
         return {
             "message": "Appointment booked successfully",
-            "appointment": _serialize_appointment(appointment)
+            "appointment": _serialize_appointments([appointment])[0]
         }, 201
         
     except Exception as e:
@@ -90,19 +119,12 @@ def get_user_appointments(user_id, status=None):
         
         # Filter by status if provided
         if status:
-            appointments = Appointment.objects(user=user, status=status).order_by('-appointment_date')
+            appointments = Appointment.objects(user=user, status=status).order_by('-appointment_date', '-start_minute')
         else:
-            appointments = Appointment.objects(user=user).order_by('-appointment_date')
-        
-        print(f"Found {len(appointments)} appointments")
+            appointments = Appointment.objects(user=user).order_by('-appointment_date', '-start_minute')
         
-        serialized = []
-        for apt in appointments:
-            try:
-                serialized.append(_serialize_appointment(apt))
-            except Exception as e:
-                print(f"Error serializing appointment {apt.id}: {str(e)}")
-                raise
+        serialized = _serialize_appointments(appointments)
+        print(f"Found {len(serialized)} appointments")
         
         return {
             "appointments": serialized,
@@ -124,10 +146,10 @@ def get_appointment_by_id(appointment_id, user_id):
             return {"message": "Appointment not found"}, 404
         
         # Verify user owns this appointment
-        if str(appointment.user.id) != user_id:
+        if str(reference_id(appointment, "user")) != user_id:
             return {"message": "Unauthorized"}, 403
         
-        return _serialize_appointment(appointment), 200
+        return _serialize_appointments([appointment])[0], 200
         
     except Exception as e:
         return {"message": f"Error fetching appointment: {str(e)}"}, 500
@@ -141,7 +163,7 @@ def update_appointment_status(appointment_id, user_id, new_status):
             return {"message": "Appointment not found"}, 404
         
         # Verify user owns this appointment
-        if str(appointment.user.id) != user_id:
+        if str(reference_id(appointment, "user")) != user_id:
             return {"message": "Unauthorized"}, 403
         
         # Validate status
@@ -149,12 +171,20 @@ def update_appointment_status(appointment_id, user_id, new_status):
         if new_status not in valid_statuses:
             return {"message": "Invalid status"}, 400
         
-        appointment.status = new_status
-        appointment.save()
+        previous_status = appointment.status
+        try:
+            appointment = change_appointment_status(appointment, new_status)
+        except NotUniqueError:
+            # Re-activating a cancelled appointment whose slot was rebooked
+            return {"message": SLOT_TAKEN_MESSAGE}, 409
+        if appointment is None:
+            return {"message": STATUS_CONFLICT_MESSAGE}, 409
+        sync_slot_status(appointment, previous_status)
+        invalidate_upcoming(user_id)
         
         return {
             "message": f"Appointment {new_status} successfully",
-            "appointment": _serialize_appointment(appointment)
+            "appointment": _serialize_appointments([appointment])[0]
         }, 200
         
     except Exception as e:
@@ -178,32 +208,17 @@ def get_available_slots(doctor_id, date):
             return {"message": "Invalid date format. Use YYYY-MM-DD"}, 400
         
         # Check if doctor is available on that day
-        day_name = appointment_date.strftime("%A")
-        if day_name not in doctor.availability:
+        schedule = get_compiled_schedule(doctor)
+        day_slots = schedule.slots_for(appointment_date)
+        if not day_slots.slots:
             return {
                 "available": False,
-                "message": f"Doctor is not available on {day_name}",
+                "message": _unavailable_message(schedule, appointment_date),
                 "slots": []
             }, 200
         
-        # Define time slots (9 AM to 5 PM)
-        all_slots = [
-            "09:00 AM", "09:30 AM", "10:00 AM", "10:30 AM",
-            "11:00 AM", "11:30 AM", "12:00 PM", "12:30 PM",
-            "01:00 PM", "01:30 PM", "02:00 PM", "02:30 PM",
-            "03:00 PM", "03:30 PM", "04:00 PM", "04:30 PM"
-        ]
-        
-        # Get booked slots
-        booked_appointments = Appointment.objects(
-            doctor=doctor,
-            appointment_date=appointment_date,
-            status__in=["pending", "confirmed"]
-        )
-        booked_slots = [apt.appointment_time for apt in booked_appointments]
-        
-        # Filter available slots
-        available_slots = [slot for slot in all_slots if slot not in booked_slots]
+        # Booked slots come from the per-(doctor, date) occupancy bitmap
+        available_slots = get_free_slots(doctor, appointment_date, day_slots)
         
         return {
             "available": True,
@@ -216,44 +231,130 @@ def get_available_slots(doctor_id, date):
     except Exception as e:
         return {"message": f"Error fetching available slots: {str(e)}"}, 500
 
+def get_availability_calendar(doctor_id, start, days=30):
+    """Get available time slots for a doctor over a range of days"""
+    try:
+        doctor = Doctor.objects(doctor_id=doctor_id).first()
+        if not doctor:
+            return {"message": "Doctor not found"}, 404
+        
+        # Parse start date
+        try:
+            start_date = datetime.strptime(start, "%Y-%m-%d")
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD"}, 400
+        
+        if days < 1 or days > MAX_CALENDAR_DAYS:
+            return {"message": f"Days must be between 1 and {MAX_CALENDAR_DAYS}"}, 400
+        
+        # One range query covers every day; days the doctor does not work are null
+        calendar = get_free_slots_in_range(doctor, start_date, days)
+        
+        return {
+            "doctor": doctor.name,
+            "start": start,
+            "days": days,
+            "calendar": calendar,
+            "total_slots": sum(len(slots) for slots in calendar.values() if slots)
+        }, 200
+        
+    except Exception as e:
+        return {"message": f"Error fetching availability calendar: {str(e)}"}, 500
+
+def get_next_available_slots(specialty, limit=5, days=30, max_fee=None, min_rating=None):
+    """Get the earliest free slots across all active doctors of a specialty"""
+    try:
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            return {"message": f"Limit must be between 1 and {MAX_SEARCH_RESULTS}"}, 400
+        
+        if days < 1 or days > MAX_CALENDAR_DAYS:
+            return {"message": f"Days must be between 1 and {MAX_CALENDAR_DAYS}"}, 400
+        
+        results = find_next_available(specialty, limit, days, max_fee, min_rating)
+        
+        return {
+            "specialty": specialty,
+            "slots": [
+                {
+                    "doctor": {
+                        "id": doctor.doctor_id,
+                        "name": doctor.name,
+                        "specialty": doctor.specialty,
+                        "image": doctor.img,
+                        "image_variants": variants_for(doctor.img, doctor.img_variants),
+                        "rating": doctor.rating,
+                        "consultation_fee": doctor.consultation_fee
+                    },
+                    "appointment_date": starts_at.strftime("%Y-%m-%d"),
+                    "appointment_time": slot
+                }
+                for doctor, starts_at, slot in results
+            ],
+            "count": len(results)
+        }, 200
+        
+    except Exception as e:
+        return {"message": f"Error searching available slots: {str(e)}"}, 500
+
 def get_upcoming_appointments(user_id, days=30):
     """Get upcoming appointments for a user"""
     try:
+        # Get appointments from today onwards
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        # Served from the per-user Redis view when possible, skipping MongoDB entirely
+        cached, generation = get_cached_upcoming(user_id, today, days)
+        if cached is not None:
+            return cached, 200
+        
         user = User.objects(id=user_id).first()
         if not user:
             return {"message": "User not found"}, 404
         
-        # Get appointments from today onwards
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         future_date = today + timedelta(days=days)
         
         appointments = Appointment.objects(
             user=user,
             appointment_date__gte=today,
             appointment_date__lte=future_date,
-            status__in=["pending", "confirmed"]
-        ).order_by('appointment_date')
+            status__in=ACTIVE_STATUSES
+        ).order_by('appointment_date', 'start_minute')
+        serialized = _serialize_appointments(appointments)
         
-        return {
-            "appointments": [_serialize_appointment(apt) for apt in appointments],
-            "count": len(appointments)
-        }, 200
+        result = {
+            "appointments": serialized,
+            "count": len(serialized)
+        }
+        set_cached_upcoming(user_id, today, days, result, generation)
+        return result, 200
         
     except Exception as e:
         return {"message": f"Error fetching upcoming appointments: {str(e)}"}, 500
 
-def _serialize_appointment(appointment):
+def _unavailable_message(schedule, appointment_date):
+    if not schedule.works_on_weekday(appointment_date):
+        return f"Doctor is not available on {appointment_date.strftime('%A')}"
+    return f"Doctor is not available on {appointment_date.strftime('%Y-%m-%d')}"
+
+def _serialize_appointments(appointments):
+    """Serialize appointments, fetching their doctors in one $in query"""
+    appointments = list(appointments)
+    doctors = load_references(appointments, "doctor", Doctor)
+    return [_serialize_appointment(apt, doctors) for apt in appointments]
+
+def _serialize_appointment(appointment, doctors):
     """Helper function to serialize appointment data"""
-    try:
-        doctor = appointment.doctor
+    doctor = doctors.get(reference_id(appointment, "doctor"))
+    if doctor:
         doctor_data = {
             "id": doctor.doctor_id,
             "name": doctor.name,
             "specialty": doctor.specialty,
             "image": doctor.img,
+            "image_variants": variants_for(doctor.img, doctor.img_variants),
             "consultation_fee": doctor.consultation_fee
-        } if doctor else None
-    except Exception:
+        }
+    else:
         doctor_data = {
             "id": None,
             "name": "Unknown Doctor",
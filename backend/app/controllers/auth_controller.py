@@ -1,6 +1,7 @@
 from app import bcrypt 
 from app.models.user_models import User 
 from app.models.profile_model import UserProfile, PersonalInfo, EmergencyContact
+from app.services.dashboard_counter_service import record_user_created
 from flask_jwt_extended import create_access_token
 from datetime import datetime, timedelta 
 
@@ -65,6 +66,7 @@ def register_user(data):
         password = hashed_password,
     )    
     user.save()
+    record_user_created()
 
     # Create UserProfile with personal info
     emergency_contact = EmergencyContact(name=data["emergency_contact_name"], phone=data["emergency_contact_phone"])
@@ -1,27 +1,34 @@
-from flask import jsonify
-from app.models.cart_model import Cart, CartItem
-from datetime import datetime
+from app.services import cart_store_service as cart_store
+from app.services.pricing_service import catalog_details
+
+
+def _is_add(operation):
+    return isinstance(operation, dict) and operation.get('op') == 'add' and isinstance(operation.get('medicine_id'), str)
+
+
+def _priced_operations(operations):
+    """Batch operations whose adds carry catalog details instead of anything the client sent"""
+    if not isinstance(operations, list):
+        return operations  # apply_batch reports the malformed payload
+    details = catalog_details(operation['medicine_id'] for operation in operations if _is_add(operation))
+    priced = []
+    for operation in operations:
+        if _is_add(operation):
+            if operation['medicine_id'] not in details:
+                raise ValueError(f"Medicine not found: {operation['medicine_id']}")
+            operation = dict(details[operation['medicine_id']], **{
+                key: operation[key] for key in ('op', 'medicine_id', 'quantity') if key in operation
+            })
+        priced.append(operation)
+    return priced
 
 
 def get_cart(user_id):
     """Get user's cart"""
     try:
-        cart = Cart.objects(user_id=user_id).first()
-        if not cart:
-            # Return empty cart
-            return {
-                'success': True,
-                'cart': {
-                    'user_id': user_id,
-                    'items': [],
-                    'total_items': 0,
-                    'total_price': 0
-                }
-            }, 200
-        
         return {
             'success': True,
-            'cart': cart.to_dict()
+            'cart': cart_store.cart_view(user_id, cart_store.get_cart_lines(user_id))
         }, 200
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
@@ -30,41 +37,23 @@ def get_cart(user_id):
 def add_to_cart(user_id, data):
     """Add item to cart"""
     try:
-        cart = Cart.objects(user_id=user_id).first()
-        
-        if not cart:
-            cart = Cart(user_id=user_id, items=[])
-        
-        # Check if item already exists in cart
-        existing_item = None
-        for item in cart.items:
-            if item.medicine_id == data.get('medicine_id'):
-                existing_item = item
-                break
-        
-        if existing_item:
-            # Update quantity
-            existing_item.quantity += data.get('quantity', 1)
-        else:
-            # Add new item
-            new_item = CartItem(
-                medicine_id=data.get('medicine_id'),
-                name=data.get('name'),
-                price=data.get('price'),
-                quantity=data.get('quantity', 1),
-                image=data.get('image'),
-                description=data.get('description'),
-                requires_prescription=data.get('requires_prescription', False)
-            )
-            cart.items.append(new_item)
-        
-        cart.updated_at = datetime.utcnow()
-        cart.save()
+        medicine_id = (data or {}).get('medicine_id')
+        if not medicine_id or not isinstance(medicine_id, str):
+            return {'success': False, 'message': 'medicine_id is required'}, 400
+        quantity = data.get('quantity', 1)
+        if not cart_store.valid_quantity(quantity):
+            return {'success': False, 'message': 'quantity must be a positive integer'}, 400
+        
+        # Name, price and image come from the catalog, not the request
+        details = catalog_details([medicine_id])
+        if medicine_id not in details:
+            return {'success': False, 'message': 'Medicine not found'}, 404
+        lines = cart_store.add_line(user_id, dict(details[medicine_id], medicine_id=medicine_id), quantity)
         
         return {
             'success': True,
             'message': 'Item added to cart',
-            'cart': cart.to_dict()
+            'cart': cart_store.cart_view(user_id, lines)
         }, 200
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
@@ -73,28 +62,20 @@ def add_to_cart(user_id, data):
 def update_cart_item(user_id, medicine_id, data):
     """Update cart item quantity"""
     try:
-        cart = Cart.objects(user_id=user_id).first()
-        
-        if not cart:
-            return {'success': False, 'message': 'Cart not found'}, 404
-        
-        item_found = False
-        for item in cart.items:
-            if item.medicine_id == medicine_id:
-                item.quantity = data.get('quantity', item.quantity)
-                item_found = True
-                break
-        
-        if not item_found:
+        quantity = (data or {}).get('quantity')
+        if quantity is None:
+            return {'success': False, 'message': 'quantity is required'}, 400
+        if not cart_store.valid_quantity(quantity):
+            return {'success': False, 'message': 'quantity must be a positive integer'}, 400
+        
+        lines = cart_store.set_quantity(user_id, medicine_id, quantity)
+        if lines is None:
             return {'success': False, 'message': 'Item not found in cart'}, 404
         
-        cart.updated_at = datetime.utcnow()
-        cart.save()
-        
         return {
             'success': True,
             'message': 'Cart updated',
-            'cart': cart.to_dict()
+            'cart': cart_store.cart_view(user_id, lines)
         }, 200
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
@@ -103,25 +84,31 @@ def update_cart_item(user_id, medicine_id, data):
 def remove_from_cart(user_id, medicine_id):
     """Remove item from cart"""
     try:
-        cart = Cart.objects(user_id=user_id).first()
-        
-        if not cart:
-            return {'success': False, 'message': 'Cart not found'}, 404
-        
-        original_length = len(cart.items)
-        cart.items = [item for item in cart.items if item.medicine_id != medicine_id]
-        
-        if len(cart.items) == original_length:
+        lines = cart_store.remove_line(user_id, medicine_id)
+        if lines is None:
             return {'success': False, 'message': 'Item not found in cart'}, 404
         
-        cart.updated_at = datetime.utcnow()
-        cart.save()
-        
         return {
             'success': True,
             'message': 'Item removed from cart',
-            'cart': cart.to_dict()
+            'cart': cart_store.cart_view(user_id, lines)
+        }, 200
+    except Exception as e:
+        return {'success': False, 'message': str(e)}, 500
+
+
+def batch_update_cart(user_id, data):
+    """Apply several add/update/remove operations to the cart at once"""
+    try:
+        lines = cart_store.apply_batch(user_id, _priced_operations((data or {}).get('operations')))
+        
+        return {
+            'success': True,
+            'message': 'Cart updated',
+            'cart': cart_store.cart_view(user_id, lines)
         }, 200
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}, 400
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
 
@@ -129,12 +116,7 @@ def remove_from_cart(user_id, medicine_id):
 def clear_cart(user_id):
     """Clear all items from cart"""
     try:
-        cart = Cart.objects(user_id=user_id).first()
-        
-        if cart:
-            cart.items = []
-            cart.updated_at = datetime.utcnow()
-            cart.save()
+        cart_store.clear(user_id)
         
         return {
             'success': True,
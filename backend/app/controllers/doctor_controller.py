@@ -1,26 +1,80 @@
+from flask import Response, request
 from app.models.doctor_model import Doctor
+from app.services.doctor_catalog_service import get_catalog_doctors, get_catalog_view
+from app.services.specialty_facet_service import get_specialty_facets
+from app.services.doctor_search_service import find_doctors
+from app.services.image_variant_service import variants_for
+
+DASHBOARD_DOCTOR_LIMIT = 4
+
+def _serialize_doctor(doctor):
+    """Full doctor card used by the listing endpoints"""
+    return {
+        "id": doctor.doctor_id,
+        "name": doctor.name,
+        "specialty": doctor.specialty,
+        "img": doctor.img,
+        "img_variants": variants_for(doctor.img, doctor.img_variants),
+        "experience": doctor.experience,
+        "rating": doctor.rating,
+        "consultation_fee": doctor.consultation_fee,
+        "availability": doctor.availability,
+        "qualifications": doctor.qualifications,
+        "about": doctor.about,
+        "is_active": doctor.is_active if hasattr(doctor, 'is_active') else True
+    }
+
+def _serialize_doctor_summary(doctor):
+    """Short doctor card used by the specialty listing"""
+    return {
+        "id": doctor.doctor_id,
+        "name": doctor.name,
+        "specialty": doctor.specialty,
+        "img": doctor.img,
+        "img_variants": variants_for(doctor.img, doctor.img_variants),
+        "experience": doctor.experience,
+        "rating": doctor.rating,
+        "consultation_fee": doctor.consultation_fee
+    }
+
+def _doctor_list(doctors, serializer=_serialize_doctor):
+    doctors_list = [serializer(doctor) for doctor in doctors]
+    return {"doctors": doctors_list, "count": len(doctors_list)}
+
+def _catalog_response(view, builder, cacheable=True):
+    """Serve a pre-serialized catalog view with a strong ETag, answering 304 when unchanged"""
+    body, etag = get_catalog_view(view, builder, cacheable)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Clients revalidate every time, which costs only a 304 while the catalog is unchanged
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+def _is_known_specialty(specialty):
+    return any(doctor.specialty == specialty for doctor in get_catalog_doctors())
+
+def get_active_doctors():
+    """Get all active doctors (for dashboard)"""
+    try:
+        return _catalog_response("active", lambda doctors: _doctor_list(
+            doctor for doctor in doctors if doctor.is_active
+        ))
+    except Exception as e:
+        return {"message": f"Error fetching doctors: {str(e)}"}, 500
 
 def get_all_doctors():
-    """Get all doctors from database"""
+    """Get all doctors including inactive (for appointment booking)"""
     try:
-        doctors = Doctor.objects()
-        doctors_list = []
-        
-        for doctor in doctors:
-            doctors_list.append({
-                "id": doctor.doctor_id,
-                "name": doctor.name,
-                "specialty": doctor.specialty,
-                "img": doctor.img,
-                "experience": doctor.experience,
-                "rating": doctor.rating,
-                "consultation_fee": doctor.consultation_fee,
-                "availability": doctor.availability,
-                "qualifications": doctor.qualifications,
-                "about": doctor.about
-            })
-        
-        return {"doctors": doctors_list, "count": len(doctors_list)}, 200
+        return _catalog_response("all", _doctor_list)
+    except Exception as e:
+        return {"message": f"Error fetching doctors: {str(e)}"}, 500
+
+def get_dashboard_doctors():
+    """Get limited active doctors for dashboard home"""
+    try:
+        return _catalog_response("dashboard", lambda doctors: _doctor_list(
+            [doctor for doctor in doctors if doctor.is_active][:DASHBOARD_DOCTOR_LIMIT]
+        ))
     except Exception as e:
         return {"message": f"Error fetching doctors: {str(e)}"}, 500
 
@@ -37,6 +91,7 @@ def get_doctor_by_id(doctor_id):
             "name": doctor.name,
             "specialty": doctor.specialty,
             "img": doctor.img,
+            "img_variants": variants_for(doctor.img, doctor.img_variants),
             "experience": doctor.experience,
             "rating": doctor.rating,
             "consultation_fee": doctor.consultation_fee,
@@ -50,29 +105,35 @@ def get_doctor_by_id(doctor_id):
 def get_doctors_by_specialty(specialty):
     """Get doctors filtered by specialty"""
     try:
-        doctors = Doctor.objects(specialty=specialty)
-        doctors_list = []
-        
-        for doctor in doctors:
-            doctors_list.append({
-                "id": doctor.doctor_id,
-                "name": doctor.name,
-                "specialty": doctor.specialty,
-                "img": doctor.img,
-                "experience": doctor.experience,
-                "rating": doctor.rating,
-                "consultation_fee": doctor.consultation_fee
-            })
-        
-        return {"doctors": doctors_list, "count": len(doctors_list)}, 200
+        def build(doctors):
+            return _doctor_list(
+                (doctor for doctor in doctors if doctor.specialty == specialty),
+                _serialize_doctor_summary
+            )
+        # Only real specialties are cached so arbitrary input cannot grow the cache
+        return _catalog_response(f"specialty:{specialty}", build, cacheable=_is_known_specialty(specialty))
     except Exception as e:
         return {"message": f"Error fetching doctors: {str(e)}"}, 500
 
+def search_doctors(filters, sort="rating", order=None, limit=20, cursor=None):
+    """Filtered, sorted doctor search with keyset pagination"""
+    try:
+        doctors, next_cursor = find_doctors(filters, sort, order, limit, cursor)
+        result = _doctor_list(doctors)
+        result["next_cursor"] = next_cursor
+        return result, 200
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    except Exception as e:
+        return {"message": f"Error searching doctors: {str(e)}"}, 500
+
 def get_specialties():
-    """Get all unique specialties"""
+    """Get all specialties with doctor counts and fee/rating ranges"""
     try:
-        doctors = Doctor.objects()
-        specialties = list(set([doctor.specialty for doctor in doctors]))
-        return {"specialties": sorted(specialties)}, 200
+        facets = get_specialty_facets()
+        return {
+            "specialties": [facet["specialty"] for facet in facets],
+            "facets": facets
+        }, 200
     except Exception as e:
         return {"message": f"Error fetching specialties: {str(e)}"}, 500
@@ -1,20 +1,21 @@
 from app.models.medicine_model import Medicine
-from flask import jsonify
+from app.services.medicine_search_service import search_catalog
+from app.services.medicine_query_service import find_medicines
 
 def get_all_medicines():
     """Get all medicines"""
     try:
         medicines = Medicine.objects()
-        return jsonify({
+        return {
             'success': True,
             'medicines': [medicine.to_dict() for medicine in medicines],
             'count': len(medicines)
-        }), 200
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error fetching medicines: {str(e)}'
-        }), 500
+        }, 500
 
 def get_medicine_by_id(medicine_id):
     """Get a specific medicine by ID"""
@@ -22,88 +23,113 @@ def get_medicine_by_id(medicine_id):
         medicine = Medicine.objects(medicine_id=medicine_id).first()
         
         if not medicine:
-            return jsonify({
+            return {
                 'success': False,
                 'message': 'Medicine not found'
-            }), 404
+            }, 404
             
-        return jsonify({
+        return {
             'success': True,
             'medicine': medicine.to_dict()
-        }), 200
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error fetching medicine: {str(e)}'
-        }), 500
+        }, 500
 
 def get_medicines_by_category(category):
     """Get medicines filtered by category"""
     try:
         medicines = Medicine.objects(category=category)
         
-        return jsonify({
+        return {
             'success': True,
             'medicines': [medicine.to_dict() for medicine in medicines],
             'count': len(medicines),
             'category': category
-        }), 200
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error fetching medicines by category: {str(e)}'
-        }), 500
+        }, 500
 
-def search_medicines(query):
-    """Search medicines by name or description"""
+def search_medicines(query, category=None, in_stock=None, limit=50):
+    """Search medicines by name or description, best matches first"""
     try:
-        # Case-insensitive search in name and description
-        medicines = Medicine.objects(
-            name__icontains=query
-        ) | Medicine.objects(
-            description__icontains=query
-        )
+        # Ranked lookup in the in-process search index; tolerates typos
+        results = search_catalog(query, category, in_stock, limit)
         
-        return jsonify({
+        return {
             'success': True,
-            'medicines': [medicine.to_dict() for medicine in medicines],
-            'count': len(medicines),
+            'medicines': [dict(medicine.to_dict(), score=round(score, 4)) for medicine, score in results],
+            'count': len(results),
             'query': query
-        }), 200
+        }, 200
+    except ValueError as e:
+        return {
+            'success': False,
+            'message': str(e)
+        }, 400
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error searching medicines: {str(e)}'
-        }), 500
+        }, 500
 
 def get_prescription_medicines():
     """Get all medicines that require prescription"""
     try:
         medicines = Medicine.objects(requires_prescription=True)
         
-        return jsonify({
+        return {
             'success': True,
             'medicines': [medicine.to_dict() for medicine in medicines],
             'count': len(medicines)
-        }), 200
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error fetching prescription medicines: {str(e)}'
-        }), 500
+        }, 500
 
 def get_in_stock_medicines():
     """Get all medicines that are in stock"""
     try:
         medicines = Medicine.objects(in_stock=True)
         
-        return jsonify({
+        return {
             'success': True,
             'medicines': [medicine.to_dict() for medicine in medicines],
             'count': len(medicines)
-        }), 200
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'message': f'Error fetching in-stock medicines: {str(e)}'
-        }), 500
+        }, 500
+
+def query_medicines(filters, sort="popularity", order=None, limit=24, cursor=None):
+    """Filtered, sorted medicine catalog page with facet counts on the first page"""
+    try:
+        medicines, next_cursor, facets = find_medicines(filters, sort, order, limit, cursor)
+        result = {
+            'success': True,
+            'medicines': [medicine.to_dict() for medicine in medicines],
+            'count': len(medicines),
+            'next_cursor': next_cursor
+        }
+        if facets is not None:
+            result['facets'] = facets
+        return result, 200
+    except ValueError as e:
+        return {
+            'success': False,
+            'message': str(e)
+        }, 400
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f'Error querying medicines: {str(e)}'
+        }, 500
@@ -1,9 +1,16 @@
 from flask import jsonify
 from app.models.order_model import Order, OrderItem, OrderAddress
-from app.models.cart_model import Cart
+from app.services import cart_store_service as cart_store
+from app.services.pricing_service import catalog_details, database_details, order_totals
+from app.services.checkout_service import (
+    IdempotencyKeyReused, check_idempotency_key, finish_replay, place_order, placed_order, replays_request
+)
+from app.services.inventory_service import order_quantities, release_stock
 from datetime import datetime
 import uuid
 
+KEY_REUSED_MESSAGE = 'Idempotency key was already used for a different order'
+
 
 def generate_order_id():
     """Generate unique order ID"""
@@ -12,6 +19,20 @@ def generate_order_id():
     return f"ORD{timestamp}{unique_id}"
 
 
+def _cancel(order):
+    """Atomically move `order` to Cancelled and release its stock.
+
+    The status guard makes exactly one of several concurrent cancellations
+    win, so stock is released once. Returns None if the status changed meanwhile.
+    """
+    cancelled = Order.objects(pk=order.pk, status=order.status).modify(
+        new=True, set__status='Cancelled', set__updated_at=datetime.utcnow()
+    )
+    if cancelled and cancelled.stock_reserved:
+        release_stock(order_quantities(cancelled.items))
+    return cancelled
+
+
 def get_user_orders(user_id):
     """Get all orders for a user"""
     try:
@@ -42,9 +63,16 @@ def get_order_by_id(user_id, order_id):
         return {'success': False, 'message': str(e)}, 500
 
 
-def create_order(user_id, data):
-    """Create a new order"""
+def create_order(user_id, data, idempotency_key=None):
+    """Create a new order; retries with the same idempotency key return the first order.
+
+    Reusing a key for different items is answered with 422 instead of a replay.
+    """
     try:
+        if idempotency_key is None:
+            idempotency_key = data.get('idempotency_key')
+        idempotency_key = check_idempotency_key(idempotency_key)
+        
         # Validate required fields
         if not data.get('items') or len(data.get('items', [])) == 0:
             return {'success': False, 'message': 'Order must contain at least one item'}, 400
@@ -52,18 +80,44 @@ def create_order(user_id, data):
         if not data.get('delivery_address'):
             return {'success': False, 'message': 'Delivery address is required'}, 400
         
-        # Create order items
-        order_items = []
+        # Only ids and quantities come from the client; names and prices come from the catalog
+        quantities = {}
         for item in data.get('items', []):
-            order_item = OrderItem(
-                medicine_id=item.get('medicine_id', item.get('id', '')),
-                name=item.get('name'),
-                price=item.get('price'),
-                quantity=item.get('quantity'),
-                image=item.get('image'),
-                requires_prescription=item.get('requires_prescription', item.get('requiresPrescription', False))
+            medicine_id = item.get('medicine_id', item.get('id')) if isinstance(item, dict) else None
+            if not medicine_id or not isinstance(medicine_id, str):
+                return {'success': False, 'message': 'Every item needs a medicine_id'}, 400
+            quantity = item.get('quantity')
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+                return {'success': False, 'message': 'Item quantities must be positive integers'}, 400
+            quantities[medicine_id] = quantities.get(medicine_id, 0) + quantity
+        
+        existing = placed_order(user_id, idempotency_key)
+        if existing:
+            if not replays_request(existing, quantities):
+                return {'success': False, 'message': KEY_REUSED_MESSAGE}, 422
+            return {
+                'success': True,
+                'message': 'Order already placed',
+                'order': finish_replay(existing).to_dict()
+            }, 200
+        
+        details = database_details(quantities)
+        unknown = [medicine_id for medicine_id in quantities if medicine_id not in details]
+        if unknown:
+            return {'success': False, 'message': f'Medicine not found: {unknown[0]}'}, 400
+        lines = [dict(details[medicine_id], medicine_id=medicine_id, quantity=quantity)
+                 for medicine_id, quantity in quantities.items()]
+        order_items = [
+            OrderItem(
+                medicine_id=line['medicine_id'],
+                name=line['name'],
+                price=line['price'],
+                quantity=line['quantity'],
+                image=line['image'],
+                requires_prescription=line['requires_prescription']
             )
-            order_items.append(order_item)
+            for line in lines
+        ]
         
         # Create delivery address
         addr_data = data.get('delivery_address', {})
@@ -79,9 +133,7 @@ def create_order(user_id, data):
         )
         
         # Calculate totals
-        subtotal = sum(item.price * item.quantity for item in order_items)
-        delivery_charges = 0 if subtotal >= 4000 else 50
-        total = subtotal + delivery_charges
+        subtotal, delivery_charges, total = order_totals(lines)
         
         # Create order
         order = Order(
@@ -96,22 +148,25 @@ def create_order(user_id, data):
             payment_method=data.get('payment_method', 'COD'),
             payment_status="Pending" if data.get('payment_method', 'COD') == 'COD' else "Paid",
             prescription_uploaded=data.get('prescription_uploaded', False),
-            prescription_url=data.get('prescription_url')
+            prescription_url=data.get('prescription_url'),
+            stock_reserved=True,
+            idempotency_key=idempotency_key
         )
-        order.save()
         
-        # Clear user's cart after successful order
-        cart = Cart.objects(user_id=user_id).first()
-        if cart:
-            cart.items = []
-            cart.updated_at = datetime.utcnow()
-            cart.save()
+        # Take stock, store the order and clear the cart; nothing is reserved if any line is short
+        order, short = place_order(order, quantities)
+        if short:
+            return {'success': False, 'message': f'Not enough stock for {details[short]["name"]}', 'medicine_id': short}, 409
         
         return {
             'success': True,
             'message': 'Order placed successfully',
             'order': order.to_dict()
         }, 201
+    except IdempotencyKeyReused:
+        return {'success': False, 'message': KEY_REUSED_MESSAGE}, 422
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}, 400
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
 
@@ -130,17 +185,29 @@ def update_order_status(user_id, order_id, data):
         if new_status and new_status not in valid_statuses:
             return {'success': False, 'message': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'}, 400
         
-        if new_status:
-            order.status = new_status
+        # Cancelled orders have released their stock and cannot be reopened
+        if order.status == 'Cancelled' and new_status and new_status != 'Cancelled':
+            return {'success': False, 'message': 'Cannot reopen a cancelled order'}, 400
         
-        if data.get('tracking_number'):
-            order.tracking_number = data.get('tracking_number')
+        if new_status == 'Cancelled' and order.status != 'Cancelled':
+            order = _cancel(order)
+            if not order:
+                return {'success': False, 'message': 'Order was updated concurrently, please retry'}, 409
         
+        updates = {'set__updated_at': datetime.utcnow()}
+        if new_status:
+            updates['set__status'] = new_status
+        if data.get('tracking_number'):
+            updates['set__tracking_number'] = data.get('tracking_number')
         if data.get('payment_status'):
-            order.payment_status = data.get('payment_status')
+            updates['set__payment_status'] = data.get('payment_status')
         
-        order.updated_at = datetime.utcnow()
-        order.save()
+        # A cancellation landing after the check above has already released the stock,
+        # so only write another status if the order is still not cancelled
+        guard = {'status__ne': 'Cancelled'} if new_status and new_status != 'Cancelled' else {}
+        order = Order.objects(pk=order.pk, **guard).modify(new=True, **updates)
+        if not order:
+            return {'success': False, 'message': 'Cannot reopen a cancelled order'}, 409
         
         return {
             'success': True,
@@ -163,9 +230,10 @@ def cancel_order(user_id, order_id):
         if order.status in ['Shipped', 'In Transit', 'Delivered']:
             return {'success': False, 'message': f'Cannot cancel order with status: {order.status}'}, 400
         
-        order.status = 'Cancelled'
-        order.updated_at = datetime.utcnow()
-        order.save()
+        if order.status != 'Cancelled':
+            order = _cancel(order)
+            if not order:
+                return {'success': False, 'message': 'Order was updated concurrently, please retry'}, 409
         
         return {
             'success': True,
@@ -184,41 +252,20 @@ def reorder(user_id, order_id):
         if not order:
             return {'success': False, 'message': 'Order not found'}, 404
         
-        # Get or create cart
-        cart = Cart.objects(user_id=user_id).first()
-        if not cart:
-            from app.models.cart_model import CartItem
-            cart = Cart(user_id=user_id, items=[])
-        
-        # Add order items to cart
-        from app.models.cart_model import CartItem
-        for order_item in order.items:
-            # Check if item already exists
-            existing = False
-            for cart_item in cart.items:
-                if cart_item.medicine_id == order_item.medicine_id:
-                    cart_item.quantity += order_item.quantity
-                    existing = True
-                    break
-            
-            if not existing:
-                new_item = CartItem(
-                    medicine_id=order_item.medicine_id,
-                    name=order_item.name,
-                    price=order_item.price,
-                    quantity=order_item.quantity,
-                    image=order_item.image,
-                    requires_prescription=order_item.requires_prescription
-                )
-                cart.items.append(new_item)
-        
-        cart.updated_at = datetime.utcnow()
-        cart.save()
+        # Add order items to cart in one write, at today's catalog prices
+        details = catalog_details(item.medicine_id for item in order.items)
+        available = [item for item in order.items if item.medicine_id in details]
+        if not available:
+            return {'success': False, 'message': 'None of the medicines in this order are available anymore'}, 400
+        lines = cart_store.add_lines(user_id, [
+            (dict(details[item.medicine_id], medicine_id=item.medicine_id), item.quantity)
+            for item in available
+        ])
         
         return {
             'success': True,
             'message': 'Items added to cart',
-            'cart': cart.to_dict()
+            'cart': cart_store.cart_view(user_id, lines)
         }, 200
     except Exception as e:
         return {'success': False, 'message': str(e)}, 500
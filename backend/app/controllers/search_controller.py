@@ -0,0 +1,11 @@
+from app.services.typeahead_service import complete
+
+def get_typeahead(query, limit=5, types=None):
+    """Autocomplete medicine names, doctor names and specialties for a typed prefix"""
+    try:
+        suggestions = complete(query, limit, types) if types else complete(query, limit)
+        return {"query": query, "suggestions": suggestions}, 200
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    except Exception as e:
+        return {"message": f"Error fetching suggestions: {str(e)}"}, 500
@@ -1,13 +1,43 @@
-from mongoengine import Document, StringField, DateTimeField, ReferenceField, BooleanField
-from datetime import datetime
+from mongoengine import Document, StringField, DateTimeField, ReferenceField, BooleanField, IntField, ListField
+from datetime import datetime, timedelta
 from app.models.user_models import User
 from app.models.doctor_model import Doctor
+from app.models.doctor_schedule_model import DEFAULT_SLOT_MINUTES, covered_minutes
+
+def parse_slot_minute(appointment_time):
+    """Convert a display time like "01:30 PM" to minutes after midnight (810)"""
+    try:
+        parsed = datetime.strptime(appointment_time.strip(), "%I:%M %p")
+    except (AttributeError, ValueError):
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+def slot_start_minute(start_minute, appointment_time):
+    """An appointment's start minute, parsing the display time for ones not backfilled yet"""
+    return start_minute if start_minute is not None else parse_slot_minute(appointment_time)
+
+def booked_minutes(start_minute, end_minute, appointment_time):
+    """Minutes an active appointment occupies (see covered_minutes).
+
+    Appointments booked before slot lengths were configurable have no
+    end_minute and last the default slot length.
+    """
+    start_minute = slot_start_minute(start_minute, appointment_time)
+    if start_minute is None:
+        return range(0)
+    return covered_minutes(start_minute, end_minute or start_minute + DEFAULT_SLOT_MINUTES)
 
 class Appointment(Document):
     user = ReferenceField(User, required=True)
     doctor = ReferenceField(Doctor, required=True)
     appointment_date = DateTimeField(required=True)
     appointment_time = StringField(required=True)  # e.g., "10:00 AM"
+    start_minute = IntField(min_value=0, max_value=24 * 60 - 1)  # minutes after midnight, derived from appointment_time
+    starts_at = DateTimeField()  # appointment_date + start_minute
+    end_minute = IntField(min_value=1, max_value=24 * 60)  # start_minute + the booked slot's length
+    # covered_minutes(start_minute, end_minute), derived on save; never stored empty,
+    # since empty arrays would all collide in the unique index
+    occupied_minutes = ListField(IntField(), default=None)
     reason = StringField(required=True)
     status = StringField(default="pending", choices=["pending", "confirmed", "cancelled", "completed"])
     notes = StringField(default="")
@@ -21,10 +51,49 @@ class Appointment(Document):
             'user',
             'doctor',
             'appointment_date',
-            'status'
+            'status',
+            # Range scans of one doctor's bookings across a date window,
+            # ordered by start time within each day
+            ('doctor', 'appointment_date', 'start_minute'),
+            # A patient's appointments in date and time order
+            ('user', 'appointment_date', 'start_minute'),
+            # Admin listings, newest first (walked in reverse)
+            ('appointment_date', 'start_minute'),
+            # No two active bookings of a doctor may share an occupied minute, so
+            # overlapping slots of any length are rejected atomically by MongoDB
+            # and concurrent bookings never need an application-level lock.
+            # Appointments the backfill has not reached yet are left out.
+            # $in in a partial filter needs MongoDB 6.0+ (so would $or).
+            {
+                'fields': ['doctor', 'appointment_date', 'occupied_minutes'],
+                'name': 'unique_active_minutes',
+                'unique': True,
+                'partialFilterExpression': {
+                    'status': {'$in': ['pending', 'confirmed']},
+                    'occupied_minutes': {'$exists': True}
+                }
+            }
         ]
     }
     
     def save(self, *args, **kwargs):
         self.updated_at = datetime.utcnow()
-        return super(Appointment, self).save(*args, **kwargs)
\ No newline at end of file
+        self.sync_start_fields()
+        return super(Appointment, self).save(*args, **kwargs)
+    
+    def sync_start_fields(self):
+        """Derive start_minute, starts_at, end_minute and occupied_minutes from the display date and time"""
+        if self.start_minute is None or 'appointment_time' in self._get_changed_fields():
+            # A moved appointment keeps its length
+            length = self.end_minute - self.start_minute if self.start_minute is not None and self.end_minute else None
+            self.start_minute = parse_slot_minute(self.appointment_time)
+            if length and self.start_minute is not None:
+                self.end_minute = self.start_minute + length
+        if self.start_minute is None:
+            return
+        if not self.end_minute:
+            self.end_minute = self.start_minute + DEFAULT_SLOT_MINUTES
+        self.occupied_minutes = list(covered_minutes(self.start_minute, self.end_minute))
+        if self.appointment_date:
+            midnight = self.appointment_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            self.starts_at = midnight + timedelta(minutes=self.start_minute)
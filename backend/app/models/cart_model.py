@@ -19,6 +19,7 @@ class Cart(Document):
     user_id = StringField(required=True, unique=True)
     items = ListField(EmbeddedDocumentField(CartItem), default=[])
     updated_at = DateTimeField(default=datetime.utcnow)
+    version = IntField(default=0)  # bumped by every change; stale write-behind flushes are ignored
     
     meta = {
         'collection': 'carts',
@@ -0,0 +1,30 @@
+from mongoengine import Document, StringField, IntField, DateTimeField
+from datetime import datetime
+
+
+class DashboardCounters(Document):
+    """Materialized admin dashboard counters, kept current by the write paths"""
+    key = StringField(required=True, unique=True, default="global")
+    total_users = IntField(default=0)
+    total_doctors = IntField(default=0)
+    total_appointments = IntField(default=0)
+    pending_appointments = IntField(default=0)
+    confirmed_appointments = IntField(default=0)
+    completed_appointments = IntField(default=0)
+    cancelled_appointments = IntField(default=0)
+    updated_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'dashboard_counters'
+    }
+    
+    def to_dict(self):
+        return {
+            'total_users': self.total_users,
+            'total_doctors': self.total_doctors,
+            'total_appointments': self.total_appointments,
+            'pending_appointments': self.pending_appointments,
+            'confirmed_appointments': self.confirmed_appointments,
+            'completed_appointments': self.completed_appointments,
+            'cancelled_appointments': self.cancelled_appointments
+        }
@@ -6,6 +6,7 @@ class Doctor(Document):
     name = StringField(required=True)
     specialty = StringField(required=True)
     img = StringField()
+    img_variants = DictField()  # {"thumbnail" | "card" | "full": url}
     experience = IntField(default=5)  # years of experience
     rating = FloatField(default=4.5)
     consultation_fee = IntField(default=500)  # in currency units
@@ -13,7 +14,18 @@ class Doctor(Document):
     qualifications = ListField(StringField(), default=[])
     about = StringField(default="")
     is_active = BooleanField(default=True)  # Doctor availability status
+    schedule_version = IntField(default=0)  # bumped whenever the doctor's DoctorSchedule changes
     
     meta = {
-        'collection': 'doctors'
+        'collection': 'doctors',
+        # Doctor search: every sort key is followed by _id for keyset pagination,
+        # with and without the specialty equality prefix
+        'indexes': [
+            ('rating', 'id'),
+            ('consultation_fee', 'id'),
+            ('experience', 'id'),
+            ('specialty', 'rating', 'id'),
+            ('specialty', 'consultation_fee', 'id'),
+            ('specialty', 'experience', 'id')
+        ]
     }
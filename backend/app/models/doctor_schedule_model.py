@@ -0,0 +1,78 @@
+from mongoengine import Document, EmbeddedDocument, StringField, IntField, ListField, EmbeddedDocumentField, DateTimeField
+from datetime import datetime
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Slot length for doctors without a schedule, and of every appointment booked before lengths were configurable
+DEFAULT_SLOT_MINUTES = 30
+# Slot starts and lengths are multiples of this; the occupancy bitmaps and the
+# unique booking index rely on it
+SLOT_GRANULARITY_MINUTES = 5
+
+
+def covered_minutes(start_minute, end_minute):
+    """Start of every SLOT_GRANULARITY_MINUTES step in [start_minute, end_minute).
+
+    Two bookings overlap exactly when they share one of these, which is what
+    the occupancy bitmaps and the unique booking index compare.
+    """
+    return range(start_minute, end_minute, SLOT_GRANULARITY_MINUTES)
+
+
+class WorkingHours(EmbeddedDocument):
+    """Working interval on a weekday; several per day allow split shifts"""
+    day = StringField(required=True, choices=WEEKDAYS)
+    start = StringField(required=True)  # 24h "HH:MM", e.g. "09:00"
+    end = StringField(required=True)    # 24h "HH:MM", e.g. "17:00"
+
+
+class ScheduleBreak(EmbeddedDocument):
+    """Recurring break such as lunch; applies to every working day when day is empty"""
+    day = StringField(choices=WEEKDAYS)
+    start = StringField(required=True)
+    end = StringField(required=True)
+
+
+class ScheduleException(EmbeddedDocument):
+    """Date-specific override: leave or holiday, or custom hours when start/end are set"""
+    date = DateTimeField(required=True)
+    reason = StringField(default="")  # e.g. "leave", "holiday"
+    start = StringField()
+    end = StringField()
+
+
+class DoctorSchedule(Document):
+    """Weekly working hours, slot length, breaks and date exceptions of a doctor"""
+    doctor_id = StringField(required=True, unique=True)
+    slot_minutes = IntField(default=30, min_value=5, max_value=240)
+    working_hours = ListField(EmbeddedDocumentField(WorkingHours), default=list)
+    breaks = ListField(EmbeddedDocumentField(ScheduleBreak), default=list)
+    exceptions = ListField(EmbeddedDocumentField(ScheduleException), default=list)
+    updated_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'doctor_schedules'
+    }
+    
+    def to_dict(self):
+        return {
+            'doctor_id': self.doctor_id,
+            'slot_minutes': self.slot_minutes,
+            'working_hours': [
+                {'day': hours.day, 'start': hours.start, 'end': hours.end}
+                for hours in self.working_hours
+            ],
+            'breaks': [
+                {'day': brk.day, 'start': brk.start, 'end': brk.end}
+                for brk in self.breaks
+            ],
+            'exceptions': [
+                {
+                    'date': exception.date.strftime("%Y-%m-%d"),
+                    'reason': exception.reason,
+                    'start': exception.start,
+                    'end': exception.end
+                }
+                for exception in self.exceptions
+            ],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,4 +1,5 @@
-from mongoengine import Document, StringField, IntField, FloatField, BooleanField
+from mongoengine import Document, StringField, IntField, FloatField, BooleanField, DictField
+from app.services.image_variant_service import variants_for
 
 class Medicine(Document):
     """Medicine model for storing medication information"""
@@ -9,16 +10,33 @@ class Medicine(Document):
     price = IntField(required=True)
     description = StringField(required=True)
     image = StringField(required=True)
+    image_variants = DictField()  # {"thumbnail" | "card" | "full": url}
     requires_prescription = BooleanField(default=False)
-    in_stock = BooleanField(default=True)
+    stock = IntField(default=0, min_value=0)
+    in_stock = BooleanField(default=False)  # derived from stock, never set directly
     rating = FloatField(default=0.0)
     reviews = IntField(default=0)
     
     meta = {
         'collection': 'medicines',
-        'indexes': ['medicine_id', 'category', 'name']
+        # Catalog query: every sort key is followed by _id for keyset pagination,
+        # with and without the category equality prefix
+        'indexes': [
+            'medicine_id',
+            ('price', 'id'),
+            ('rating', 'id'),
+            ('reviews', 'id'),
+            ('name', 'id'),
+            ('category', 'price', 'id'),
+            ('category', 'rating', 'id'),
+            ('category', 'reviews', 'id'),
+            ('category', 'name', 'id')
+        ]
     }
     
+    def clean(self):
+        self.in_stock = (self.stock or 0) > 0
+    
     def to_dict(self):
         """Convert medicine document to dictionary"""
         return {
@@ -29,8 +47,10 @@ class Medicine(Document):
             'price': self.price,
             'description': self.description,
             'image': self.image,
+            'image_variants': variants_for(self.image, self.image_variants),
             'requiresPrescription': self.requires_prescription,
             'inStock': self.in_stock,
+            'stock': self.stock,
             'rating': self.rating,
             'reviews': self.reviews
         }
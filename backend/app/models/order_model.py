@@ -37,6 +37,8 @@ class Order(Document):
     payment_method = StringField(default="COD")  # COD, Online
     payment_status = StringField(default="Pending")  # Pending, Paid, Failed, Refunded
     prescription_uploaded = BooleanField(default=False)
+    stock_reserved = BooleanField(default=False)  # orders placed before inventory tracking hold no stock
+    idempotency_key = StringField()  # set by clients that retry checkout; unique per user
     prescription_url = StringField()
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
@@ -45,7 +47,14 @@ class Order(Document):
     
     meta = {
         'collection': 'orders',
-        'indexes': ['user_id', 'order_id', 'status', 'created_at'],
+        'indexes': [
+            'user_id', 'order_id', 'status', 'created_at',
+            {
+                'fields': ['user_id', 'idempotency_key'],
+                'unique': True,
+                'partialFilterExpression': {'idempotency_key': {'$exists': True}}
+            }
+        ],
         'ordering': ['-created_at']
     }
     
@@ -8,7 +8,11 @@ from app.controllers.admin_controller import (
     get_all_appointments_admin,
     get_all_doctors_admin,
     update_appointment_status_admin,
-    update_doctor_availability_admin
+    update_doctor_availability_admin,
+    get_cache_stats_admin,
+    get_doctor_schedule_admin,
+    update_doctor_schedule_admin,
+    update_medicine_stock_admin
 )
 import traceback
 
@@ -117,6 +121,43 @@ class AdminDoctorDetail(Resource):
     def options(self, doctor_id):
         return {}, 200
 
+class AdminDoctorSchedule(Resource):
+    """Get or replace a doctor's working schedule"""
+    
+    @jwt_required()
+    def get(self, doctor_id):
+        error = admin_required()
+        if error:
+            return error
+        return get_doctor_schedule_admin(doctor_id)
+    
+    @jwt_required()
+    def put(self, doctor_id):
+        error = admin_required()
+        if error:
+            return error
+        data = request.get_json() or {}
+        return update_doctor_schedule_admin(doctor_id, data)
+    
+    def options(self, doctor_id):
+        return {}, 200
+
+class AdminMedicineStock(Resource):
+    """Restock a medicine"""
+    
+    @jwt_required()
+    def put(self, medicine_id):
+        error = admin_required()
+        if error:
+            return error
+        data = request.get_json() or {}
+        if data.get('stock') is None:
+            return {"message": "stock is required"}, 400
+        return update_medicine_stock_admin(medicine_id, data['stock'])
+    
+    def options(self, medicine_id):
+        return {}, 200
+
 class AdminAppointmentDetail(Resource):
     """Update specific appointment"""
     
@@ -134,6 +175,19 @@ class AdminAppointmentDetail(Resource):
     def options(self, appointment_id):
         return {}, 200
 
+class AdminCacheStats(Resource):
+    """Cache hit/miss counters"""
+    
+    @jwt_required()
+    def get(self):
+        error = admin_required()
+        if error:
+            return error
+        return get_cache_stats_admin()
+    
+    def options(self):
+        return {}, 200
+
 # Register resources
 api.add_resource(AdminLogin, '/login')
 api.add_resource(AdminDashboard, '/dashboard')
@@ -141,4 +195,7 @@ api.add_resource(AdminUsers, '/users')
 api.add_resource(AdminAppointments, '/appointments')
 api.add_resource(AdminDoctors, '/doctors')
 api.add_resource(AdminDoctorDetail, '/doctors/<string:doctor_id>')
+api.add_resource(AdminDoctorSchedule, '/doctors/<string:doctor_id>/schedule')
+api.add_resource(AdminMedicineStock, '/medicines/<string:medicine_id>/stock')
 api.add_resource(AdminAppointmentDetail, '/appointments/<string:appointment_id>')
+api.add_resource(AdminCacheStats, '/cache-stats')
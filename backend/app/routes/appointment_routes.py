@@ -8,6 +8,8 @@ from app.controllers.appointment_controller import (
     update_appointment_status,
     cancel_appointment,
     get_available_slots,
+    get_availability_calendar,
+    get_next_available_slots,
     get_upcoming_appointments
 )
 
@@ -66,6 +68,33 @@ class AvailableSlots(Resource):
         
         return get_available_slots(doctor_id, date)
 
+class AvailabilityCalendar(Resource):
+    @jwt_required()
+    def get(self, doctor_id):
+        """Get available time slots for a doctor over a range of days"""
+        start = request.args.get('start')
+        days = request.args.get('days', default=30, type=int)
+        
+        if not start:
+            return {"message": "Start parameter is required"}, 400
+        
+        return get_availability_calendar(doctor_id, start, days)
+
+class NextAvailableSlots(Resource):
+    @jwt_required()
+    def get(self):
+        """Get the earliest free slots across doctors of a specialty"""
+        specialty = request.args.get('specialty')
+        limit = request.args.get('limit', default=5, type=int)
+        days = request.args.get('days', default=30, type=int)
+        max_fee = request.args.get('max_fee', type=int)
+        min_rating = request.args.get('min_rating', type=float)
+        
+        if not specialty:
+            return {"message": "Specialty parameter is required"}, 400
+        
+        return get_next_available_slots(specialty, limit, days, max_fee, min_rating)
+
 class UpcomingAppointments(Resource):
     @jwt_required()
     def get(self):
@@ -79,4 +108,6 @@ api.add_resource(AppointmentCreate, "/appointments")
 api.add_resource(AppointmentList, "/appointments/my")
 api.add_resource(AppointmentDetail, "/appointments/<string:appointment_id>")
 api.add_resource(AvailableSlots, "/appointments/available-slots/<string:doctor_id>")
+api.add_resource(AvailabilityCalendar, "/appointments/availability-calendar/<string:doctor_id>")
+api.add_resource(NextAvailableSlots, "/appointments/next-available")
 api.add_resource(UpcomingAppointments, "/appointments/upcoming")
@@ -6,7 +6,8 @@ from app.controllers.cart_controller import (
     add_to_cart,
     update_cart_item,
     remove_from_cart,
-    clear_cart
+    clear_cart,
+    batch_update_cart
 )
 
 cart_bp = Blueprint('cart', __name__, url_prefix='/api')
@@ -53,6 +54,18 @@ class CartItemResource(Resource):
         return remove_from_cart(user_id, medicine_id)
 
 
+class CartBatchResource(Resource):
+    """Apply several cart changes in one request"""
+    
+    @jwt_required()
+    def post(self):
+        """Apply ordered add/update/remove operations and return the final cart"""
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        return batch_update_cart(user_id, data)
+
+
 # Register resources
 api.add_resource(CartResource, '/cart')
+api.add_resource(CartBatchResource, '/cart/batch')
 api.add_resource(CartItemResource, '/cart/<string:medicine_id>')
@@ -1,139 +1,79 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request
 from flask_restful import Api, Resource
-from app.models.doctor_model import Doctor
+from app.controllers.doctor_controller import (
+    get_active_doctors,
+    get_all_doctors,
+    get_dashboard_doctors,
+    get_doctor_by_id,
+    get_doctors_by_specialty,
+    get_specialties,
+    search_doctors
+)
 
 doctor_bp = Blueprint("doctors", __name__, url_prefix='/api')
 api = Api(doctor_bp)
 
+# Listings are served from the shared doctor catalog cache with ETag/304 support
+
 class DoctorList(Resource):
     def get(self):
         """Get all active doctors (for dashboard)"""
-        try:
-            # Only show active doctors to regular users
-            doctors = Doctor.objects(is_active=True)
-            doctors_list = []
-            
-            for doctor in doctors:
-                doctors_list.append({
-                    "id": doctor.doctor_id,
-                    "name": doctor.name,
-                    "specialty": doctor.specialty,
-                    "img": doctor.img,
-                    "experience": doctor.experience,
-                    "rating": doctor.rating,
-                    "consultation_fee": doctor.consultation_fee,
-                    "availability": doctor.availability,
-                    "qualifications": doctor.qualifications,
-                    "about": doctor.about,
-                    "is_active": doctor.is_active if hasattr(doctor, 'is_active') else True
-                })
-            
-            return {"doctors": doctors_list, "count": len(doctors_list)}, 200
-        except Exception as e:
-            return {"message": f"Error fetching doctors: {str(e)}"}, 500
+        # Only show active doctors to regular users
+        return get_active_doctors()
 
 class AllDoctorsList(Resource):
     def get(self):
         """Get all doctors including inactive (for appointment booking)"""
-        try:
-            # Show all doctors with their availability status
-            doctors = Doctor.objects()
-            doctors_list = []
-            
-            for doctor in doctors:
-                doctors_list.append({
-                    "id": doctor.doctor_id,
-                    "name": doctor.name,
-                    "specialty": doctor.specialty,
-                    "img": doctor.img,
-                    "experience": doctor.experience,
-                    "rating": doctor.rating,
-                    "consultation_fee": doctor.consultation_fee,
-                    "availability": doctor.availability,
-                    "qualifications": doctor.qualifications,
-                    "about": doctor.about,
-                    "is_active": doctor.is_active if hasattr(doctor, 'is_active') else True
-                })
-            
-            return {"doctors": doctors_list, "count": len(doctors_list)}, 200
-        except Exception as e:
-            return {"message": f"Error fetching doctors: {str(e)}"}, 500
+        # Show all doctors with their availability status
+        return get_all_doctors()
 
 class DashboardDoctorsList(Resource):
     def get(self):
         """Get limited active doctors for dashboard home (limit 4)"""
-        try:
-            # Only show active doctors, limit to 4
-            doctors = Doctor.objects(is_active=True).limit(4)
-            doctors_list = []
-            
-            for doctor in doctors:
-                doctors_list.append({
-                    "id": doctor.doctor_id,
-                    "name": doctor.name,
-                    "specialty": doctor.specialty,
-                    "img": doctor.img,
-                    "experience": doctor.experience,
-                    "rating": doctor.rating,
-                    "consultation_fee": doctor.consultation_fee,
-                    "availability": doctor.availability,
-                    "qualifications": doctor.qualifications,
-                    "about": doctor.about,
-                    "is_active": True
-                })
-            
-            return {"doctors": doctors_list, "count": len(doctors_list)}, 200
-        except Exception as e:
-            return {"message": f"Error fetching doctors: {str(e)}"}, 500
+        return get_dashboard_doctors()
 
 class DoctorDetail(Resource):
     def get(self, doctor_id):
         """Get a specific doctor by ID"""
-        try:
-            doctor = Doctor.objects(doctor_id=doctor_id).first()
-            
-            if not doctor:
-                return {"message": "Doctor not found"}, 404
-            
-            return {
-                "id": doctor.doctor_id,
-                "name": doctor.name,
-                "specialty": doctor.specialty,
-                "img": doctor.img,
-                "experience": doctor.experience,
-                "rating": doctor.rating,
-                "consultation_fee": doctor.consultation_fee,
-                "availability": doctor.availability,
-                "qualifications": doctor.qualifications,
-                "about": doctor.about
-            }, 200
-        except Exception as e:
-            return {"message": f"Error fetching doctor: {str(e)}"}, 500
+        return get_doctor_by_id(doctor_id)
 
 class DoctorsBySpecialty(Resource):
     def get(self, specialty):
         """Get doctors by specialty"""
-        try:
-            doctors = Doctor.objects(specialty=specialty)
-            doctors_list = []
-            
-            for doctor in doctors:
-                doctors_list.append({
-                    "id": doctor.doctor_id,
-                    "name": doctor.name,
-                    "specialty": doctor.specialty,
-                    "img": doctor.img,
-                    "experience": doctor.experience,
-                    "rating": doctor.rating,
-                    "consultation_fee": doctor.consultation_fee
-                })
-            
-            return {"doctors": doctors_list, "count": len(doctors_list)}, 200
-        except Exception as e:
-            return {"message": f"Error fetching doctors: {str(e)}"}, 500
+        return get_doctors_by_specialty(specialty)
+
+class DoctorSearch(Resource):
+    def get(self):
+        """Search doctors with server-side filters, sorting and keyset pagination"""
+        active = request.args.get('active')
+        if active is not None and active not in ('true', 'false'):
+            return {"message": "active must be 'true' or 'false'"}, 400
+        filters = {
+            "specialty": request.args.get('specialty'),
+            "min_fee": request.args.get('min_fee', type=int),
+            "max_fee": request.args.get('max_fee', type=int),
+            "min_rating": request.args.get('min_rating', type=float),
+            "min_experience": request.args.get('min_experience', type=int),
+            "day": request.args.get('day'),
+            "is_active": None if active is None else active == 'true'
+        }
+        return search_doctors(
+            filters,
+            sort=request.args.get('sort', default='rating'),
+            order=request.args.get('order'),
+            limit=request.args.get('limit', default=20, type=int),
+            cursor=request.args.get('cursor')
+        )
+
+class SpecialtyList(Resource):
+    def get(self):
+        """Get specialties with active/total doctor counts and fee/rating ranges"""
+        return get_specialties()
 
 api.add_resource(DoctorList, "/doctors")
 api.add_resource(AllDoctorsList, "/doctors/all")
 api.add_resource(DashboardDoctorsList, "/doctors/dashboard")
+api.add_resource(DoctorSearch, "/doctors/search")
+api.add_resource(SpecialtyList, "/doctors/specialties")
 api.add_resource(DoctorDetail, "/doctors/<string:doctor_id>")
 api.add_resource(DoctorsBySpecialty, "/doctors/specialty/<string:specialty>")
@@ -7,7 +7,8 @@ from app.controllers.medicine_controller import (
     get_medicines_by_category,
     search_medicines,
     get_prescription_medicines,
-    get_in_stock_medicines
+    get_in_stock_medicines,
+    query_medicines
 )
 
 medicine_bp = Blueprint('medicine', __name__, url_prefix='/api')
@@ -38,7 +39,16 @@ class MedicineSearch(Resource):
         query = request.args.get('q', '')
         if not query:
             return {'success': False, 'message': 'Search query is required'}, 400
-        return search_medicines(query)
+        try:
+            in_stock = _flag('in_stock')
+        except ValueError as e:
+            return {'success': False, 'message': str(e)}, 400
+        return search_medicines(
+            query,
+            category=request.args.get('category'),
+            in_stock=in_stock,
+            limit=request.args.get('limit', default=50, type=int)
+        )
 
 class PrescriptionMedicines(Resource):
     """Get all medicines requiring prescription"""
@@ -52,10 +62,41 @@ class InStockMedicines(Resource):
     def get(self):
         return get_in_stock_medicines()
 
+def _flag(name):
+    """Optional 'true'/'false' query parameter; raises ValueError otherwise"""
+    value = request.args.get(name)
+    if value is not None and value not in ('true', 'false'):
+        raise ValueError(f"{name} must be 'true' or 'false'")
+    return None if value is None else value == 'true'
+
+class MedicineQuery(Resource):
+    """Filter, sort and page through the catalog with facet counts"""
+    
+    def get(self):
+        try:
+            filters = {
+                'category': request.args.get('category'),
+                'min_price': request.args.get('min_price', type=int),
+                'max_price': request.args.get('max_price', type=int),
+                'in_stock': _flag('in_stock'),
+                'requires_prescription': _flag('requires_prescription'),
+                'min_rating': request.args.get('min_rating', type=float)
+            }
+        except ValueError as e:
+            return {'success': False, 'message': str(e)}, 400
+        return query_medicines(
+            filters,
+            sort=request.args.get('sort', default='popularity'),
+            order=request.args.get('order'),
+            limit=request.args.get('limit', default=24, type=int),
+            cursor=request.args.get('cursor')
+        )
+
 # Register resources
 api.add_resource(MedicineList, '/medicines')
 api.add_resource(MedicineDetail, '/medicines/<string:medicine_id>')
 api.add_resource(MedicinesByCategory, '/medicines/category/<string:category>')
 api.add_resource(MedicineSearch, '/medicines/search')
+api.add_resource(MedicineQuery, '/medicines/query')
 api.add_resource(PrescriptionMedicines, '/medicines/prescription-required')
 api.add_resource(InStockMedicines, '/medicines/in-stock')
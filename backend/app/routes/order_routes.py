@@ -28,7 +28,7 @@ class OrderListResource(Resource):
         """Create new order"""
         user_id = get_jwt_identity()
         data = request.get_json()
-        return create_order(user_id, data)
+        return create_order(user_id, data, request.headers.get('Idempotency-Key'))
 
 
 class OrderDetailResource(Resource):
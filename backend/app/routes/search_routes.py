@@ -0,0 +1,16 @@
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+from app.controllers.search_controller import get_typeahead
+
+search_bp = Blueprint("search", __name__, url_prefix='/api')
+api = Api(search_bp)
+
+class Typeahead(Resource):
+    def get(self):
+        """Prefix completions for the search box (medicines, doctors, specialties)"""
+        query = request.args.get('q', '')
+        limit = request.args.get('limit', default=5, type=int)
+        types = request.args.get('types')
+        return get_typeahead(query, limit, types.split(',') if types else None)
+
+api.add_resource(Typeahead, "/typeahead")
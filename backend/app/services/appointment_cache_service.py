@@ -0,0 +1,94 @@
+import json
+from redis import RedisError
+from app.services.redis_service import redis_client
+
+UPCOMING_CACHE_TTL_SECONDS = 10 * 60
+# Outlives any read-to-write window by far, so an expired counter cannot repeat a value a reader saw
+UPCOMING_GENERATION_TTL_SECONDS = 24 * 60 * 60
+UPCOMING_READS_KEY = "upcoming_appointments:stats:reads"
+UPCOMING_MISSES_KEY = "upcoming_appointments:stats:misses"
+
+
+# --- Helper Functions ---
+def upcoming_cache_key(user_id):
+    # One hash per user holding every cached horizon, so a single DEL invalidates them all
+    return f"upcoming_appointments:{user_id}"
+
+
+def upcoming_generation_key(user_id):
+    # Bumped by every invalidation; a view computed under an older generation is never cached
+    return f"upcoming_appointments:{user_id}:generation"
+
+
+def _view_field(today, days):
+    return f"{today.strftime('%Y-%m-%d')}:{days}"
+
+
+# --- Public API ---
+def get_cached_upcoming(user_id, today, days):
+    """Return (cached view or None, generation); counts the read in the same round trip.
+
+    Pass the generation to set_cached_upcoming after a miss. It is None when Redis
+    is unavailable, which skips caching.
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hget(upcoming_cache_key(user_id), _view_field(today, days))
+        pipe.get(upcoming_generation_key(user_id))
+        pipe.incr(UPCOMING_READS_KEY)
+        cached, generation, _ = pipe.execute()
+        if cached is None:
+            redis_client.incr(UPCOMING_MISSES_KEY)
+            return None, int(generation or 0)
+        return json.loads(cached), None
+    except RedisError as e:
+        print(f"[AppointmentCache] Failed to read upcoming appointments: {str(e)}")
+        return None, None
+
+
+def set_cached_upcoming(user_id, today, days, view, generation):
+    """Cache a view read from MongoDB unless the user's appointments changed since `generation`"""
+    if generation is None:
+        return
+    try:
+        key = upcoming_cache_key(user_id)
+        generation_key = upcoming_generation_key(user_id)
+
+        def store(pipe):
+            # A write that invalidated after our read would be undone by caching this view
+            if int(pipe.get(generation_key) or 0) != generation:
+                return
+            pipe.multi()
+            pipe.hset(key, _view_field(today, days), json.dumps(view))
+            pipe.expire(key, UPCOMING_CACHE_TTL_SECONDS)
+
+        redis_client.transaction(store, generation_key)
+    except RedisError as e:
+        print(f"[AppointmentCache] Failed to cache upcoming appointments: {str(e)}")
+
+
+def invalidate_upcoming(user_id):
+    """Drop every cached horizon for a user; called by all appointment write paths"""
+    try:
+        pipe = redis_client.pipeline()
+        pipe.incr(upcoming_generation_key(user_id))
+        pipe.expire(upcoming_generation_key(user_id), UPCOMING_GENERATION_TTL_SECONDS)
+        pipe.delete(upcoming_cache_key(user_id))
+        pipe.execute()
+    except RedisError as e:
+        print(f"[AppointmentCache] Failed to invalidate upcoming appointments: {str(e)}")
+
+
+def get_upcoming_cache_stats():
+    try:
+        reads, misses = redis_client.mget(UPCOMING_READS_KEY, UPCOMING_MISSES_KEY)
+    except RedisError as e:
+        print(f"[AppointmentCache] Failed to read cache stats: {str(e)}")
+        return None
+    reads = int(reads or 0)
+    misses = min(int(misses or 0), reads)
+    return {
+        "hits": reads - misses,
+        "misses": misses,
+        "hit_rate": round((reads - misses) / reads * 100, 2) if reads else 0.0
+    }
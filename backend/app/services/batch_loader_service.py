@@ -0,0 +1,32 @@
+def reference_id(document, field):
+    """Id stored in a ReferenceField without dereferencing it"""
+    value = document._data.get(field)
+    if value is None:
+        return None
+    # Already-dereferenced documents, DBRefs and raw ObjectIds all expose the id differently
+    return getattr(value, "pk", None) or getattr(value, "id", None) or value
+
+
+def load_references(documents, field, model, only=None):
+    """Fetch every document referenced by `field` across `documents` in one $in query.
+
+    Returns a dict of {id: referenced document}. References that were already
+    dereferenced (e.g. set when the document was created) are reused without a query.
+    """
+    loaded = {}
+    missing_ids = set()
+    for document in documents:
+        value = document._data.get(field)
+        if isinstance(value, model):
+            loaded[value.pk] = value
+        elif value is not None:
+            missing_ids.add(reference_id(document, field))
+
+    missing_ids.difference_update(loaded)
+    if missing_ids:
+        queryset = model.objects(id__in=list(missing_ids))
+        if only:
+            queryset = queryset.only(*only)
+        for referenced in queryset:
+            loaded[referenced.pk] = referenced
+    return loaded
@@ -0,0 +1,564 @@
+import json
+import threading
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from mongoengine.errors import NotUniqueError
+from redis import RedisError
+from app.models.cart_model import Cart, CartItem
+from app.services.pricing_service import reprice
+from app.services.redis_service import redis_client
+
+CART_TTL_SECONDS = 24 * 60 * 60
+# A cart is written to MongoDB this long after its first unsaved change, so a
+# burst of edits costs one write
+FLUSH_DELAY_SECONDS = 2
+FLUSH_INTERVAL_SECONDS = 1
+FLUSH_BATCH_SIZE = 500
+DIRTY_CARTS_KEY = "carts:dirty"   # sorted set: user_id -> time of first unsaved change
+# Every cached cart holds these, so an empty cart is still a cached one
+LOADED_FIELD = "_loaded"
+VERSION_FIELD = "_version"
+DUPLICATE_KEY_ERROR = 11000
+LINE_FIELDS = ("name", "price", "image", "description", "requires_prescription")
+BATCH_OPERATIONS = ("add", "update", "remove")
+MAX_BATCH_OPERATIONS = 100
+
+
+# --- Helper Functions ---
+def cart_key(user_id):
+    # Hash fields: "q:<medicine_id>" -> quantity, "m:<medicine_id>" -> line metadata as JSON
+    return f"cart:{user_id}"
+
+
+def _line_metadata(line, added_at=None):
+    metadata = {field: line.get(field) for field in LINE_FIELDS}
+    metadata["requires_prescription"] = bool(metadata["requires_prescription"])
+    metadata["added_at"] = (added_at or datetime.utcnow()).isoformat()
+    return json.dumps(metadata)
+
+
+def valid_quantity(quantity):
+    """Whether `quantity` can be stored on a cart line: a positive int, not a bool"""
+    return isinstance(quantity, int) and not isinstance(quantity, bool) and quantity >= 1
+
+
+def _check_quantity(quantity):
+    if not valid_quantity(quantity):
+        raise ValueError("quantity must be a positive integer")
+
+
+def _lines_from_hash(fields):
+    """Cart lines from a cached cart hash, oldest first"""
+    lines = []
+    for field, value in fields.items():
+        if not field.startswith("m:"):
+            continue
+        medicine_id = field[2:]
+        quantity = fields.get(f"q:{medicine_id}")
+        # Carts cached before quantities were validated may hold junk; drop those lines
+        if quantity is None or not quantity.isdigit() or int(quantity) < 1:
+            continue
+        line = json.loads(value)
+        line["medicine_id"] = medicine_id
+        line["quantity"] = int(quantity)
+        lines.append(line)
+    lines.sort(key=lambda line: line["added_at"] or "")
+    return lines
+
+
+def _lines_from_document(cart):
+    if not cart:
+        return []
+    return [
+        {
+            "medicine_id": item.medicine_id,
+            "name": item.name,
+            "price": item.price,
+            "quantity": item.quantity,
+            "image": item.image,
+            "description": item.description,
+            "requires_prescription": item.requires_prescription,
+            "added_at": item.added_at.isoformat() if item.added_at else None
+        }
+        for item in cart.items
+    ]
+
+
+def _cart_items(lines):
+    return [
+        CartItem(
+            medicine_id=line["medicine_id"],
+            name=line["name"],
+            price=line["price"],
+            quantity=line["quantity"],
+            image=line["image"],
+            description=line["description"],
+            requires_prescription=line["requires_prescription"],
+            added_at=datetime.fromisoformat(line["added_at"]) if line.get("added_at") else None
+        )
+        for line in lines
+    ]
+
+
+def _hash_mapping(lines, version):
+    """Cart hash fields for `lines` at `version`"""
+    mapping = {LOADED_FIELD: 1, VERSION_FIELD: version}
+    for line in lines:
+        mapping[f"q:{line['medicine_id']}"] = line["quantity"]
+        mapping[f"m:{line['medicine_id']}"] = json.dumps({
+            field: line.get(field) for field in LINE_FIELDS + ("added_at",)
+        })
+    return mapping
+
+
+def _load(user_id):
+    """Copy the user's MongoDB cart into Redis unless it is cached already.
+
+    WATCH makes a concurrent first write win over this copy instead of being
+    overwritten by it.
+    """
+    key = cart_key(user_id)
+
+    def populate(pipe):
+        if pipe.hexists(key, LOADED_FIELD):
+            return
+        cart = Cart.objects(user_id=user_id).first()
+        pipe.multi()
+        pipe.hset(key, mapping=_hash_mapping(_lines_from_document(cart), cart.version if cart else 0))
+        pipe.expire(key, CART_TTL_SECONDS)
+
+    redis_client.transaction(populate, key)
+
+
+def _mutate(user_id, commands):
+    """Apply `commands(pipe, key)` to the cached cart in one MULTI and return (results, lines).
+
+    Marks the cart dirty for the write-behind flusher and reads it back in the
+    same round trip.
+    """
+    _start_flusher()
+    _load(user_id)
+    key = cart_key(user_id)
+    pipe = redis_client.pipeline()
+    commands(pipe, key)
+    _mark_changed(pipe, user_id, key)
+    results = pipe.execute()
+    return results[:-4], _lines_from_hash(results[-1])
+
+
+def _mark_changed(pipe, user_id, key):
+    """Queue the version bump, TTL refresh, dirty mark and read-back that end every mutation"""
+    pipe.hincrby(key, VERSION_FIELD, 1)
+    pipe.expire(key, CART_TTL_SECONDS)
+    pipe.zadd(DIRTY_CARTS_KEY, {user_id: time.time()}, nx=True)
+    pipe.hgetall(key)
+
+
+def _validate_operations(operations):
+    """[(op, medicine_id, quantity, line)] for a batch request; raises ValueError naming the bad operation"""
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"A batch can hold at most {MAX_BATCH_OPERATIONS} operations")
+    validated = []
+    for position, operation in enumerate(operations, start=1):
+        if not isinstance(operation, dict):
+            raise ValueError(f"Operation {position} must be an object")
+        kind = operation.get("op")
+        if kind not in BATCH_OPERATIONS:
+            raise ValueError(f"Operation {position}: op must be one of: {', '.join(BATCH_OPERATIONS)}")
+        medicine_id = operation.get("medicine_id")
+        if not medicine_id or not isinstance(medicine_id, str):
+            raise ValueError(f"Operation {position}: medicine_id is required")
+        quantity = operation.get("quantity", 1 if kind == "add" else None)
+        if kind != "remove" and not valid_quantity(quantity):
+            raise ValueError(f"Operation {position}: quantity must be a positive integer")
+        validated.append((kind, medicine_id, quantity, operation))
+    return validated
+
+
+def _check_lines(operations, medicine_ids):
+    """Replay the batch against the cart's medicine ids; update and remove need an existing line"""
+    present = set(medicine_ids)
+    for position, (kind, medicine_id, _, _) in enumerate(operations, start=1):
+        if kind == "add":
+            present.add(medicine_id)
+        elif medicine_id not in present:
+            raise ValueError(f"Operation {position}: {medicine_id} is not in the cart")
+        elif kind == "remove":
+            present.discard(medicine_id)
+
+
+# --- MongoDB fallback, used while Redis is unreachable ---
+# Each change is a single atomic find_one_and_update (mongoengine modify) on the
+# cart document, so concurrent requests never lose each other's updates.
+def _mongo_change(**update):
+    return dict(update, inc__version=1, set__updated_at=datetime.utcnow())
+
+
+def _mongo_add_one(user_id, line, quantity):
+    medicine_id = line["medicine_id"]
+    while True:
+        # Existing line: increment its quantity in place
+        cart = Cart.objects(user_id=user_id, items__medicine_id=medicine_id).modify(
+            new=True, **_mongo_change(inc__items__S__quantity=quantity)
+        )
+        if cart:
+            return cart
+        # New line: push it, creating the cart if there is none
+        item = CartItem(
+            medicine_id=medicine_id, quantity=quantity,
+            **{field: line.get(field) for field in LINE_FIELDS if line.get(field) is not None}
+        )
+        try:
+            return Cart.objects(user_id=user_id, items__medicine_id__ne=medicine_id).modify(
+                upsert=True, new=True, **_mongo_change(push__items=item)
+            )
+        except NotUniqueError:
+            # Another request added the line first; increment it instead
+            continue
+
+
+def _mongo_add(user_id, additions):
+    cart = None
+    for line, quantity in additions:
+        cart = _mongo_add_one(user_id, line, quantity)
+    return _lines_from_document(cart)
+
+
+def _mongo_set_quantity(user_id, medicine_id, quantity):
+    cart = Cart.objects(user_id=user_id, items__medicine_id=medicine_id).modify(
+        new=True, **_mongo_change(set__items__S__quantity=quantity)
+    )
+    return _lines_from_document(cart) if cart else None
+
+
+def _mongo_remove(user_id, medicine_id):
+    cart = Cart.objects(user_id=user_id, items__medicine_id=medicine_id).modify(
+        new=True, **_mongo_change(pull__items__medicine_id=medicine_id)
+    )
+    return _lines_from_document(cart) if cart else None
+
+
+def _mongo_apply_batch(user_id, operations):
+    """Apply a validated batch as one version-guarded write of the whole item list"""
+    while True:
+        cart = Cart.objects(user_id=user_id).first()
+        lines = {line["medicine_id"]: line for line in _lines_from_document(cart)}
+        _check_lines(operations, lines)
+        for kind, medicine_id, quantity, line in operations:
+            if kind == "remove":
+                del lines[medicine_id]
+            elif kind == "update":
+                lines[medicine_id]["quantity"] = quantity
+            elif medicine_id in lines:
+                lines[medicine_id]["quantity"] += quantity
+            else:
+                lines[medicine_id] = dict(json.loads(_line_metadata(line)), medicine_id=medicine_id, quantity=quantity)
+        items = _cart_items(lines.values())
+        if not cart:
+            try:
+                Cart(user_id=user_id, items=items, version=1).save()
+            except NotUniqueError:
+                continue
+            return list(lines.values())
+        # Carts saved before versioning have no version field
+        version = cart.version if cart.version else {"$in": [0, None]}
+        if Cart.objects(__raw__={"user_id": user_id, "version": version}).update_one(**_mongo_change(set__items=items)):
+            return list(lines.values())
+
+
+def _mongo_clear(user_id):
+    Cart.objects(user_id=user_id).update_one(**_mongo_change(set__items=[]))
+    return []
+
+
+# --- Write-behind persistence ---
+def _flush_operation(user_id, fields, now):
+    """Version-guarded upsert writing one cached cart to MongoDB"""
+    return UpdateOne(
+        {"user_id": user_id, "version": {"$not": {"$gte": int(fields[VERSION_FIELD])}}},
+        {"$set": {
+            "items": [item.to_mongo() for item in _cart_items(_lines_from_hash(fields))],
+            "version": int(fields[VERSION_FIELD]),
+            "updated_at": now
+        }},
+        upsert=True
+    )
+
+
+def _mark_dirty_again(user_ids):
+    """Put claimed carts back for the next flush; best effort, Redis may be the reason they failed"""
+    if not user_ids:
+        return
+    try:
+        redis_client.zadd(DIRTY_CARTS_KEY, {user_id: time.time() for user_id in user_ids})
+    except RedisError as e:
+        print(f"[CartStore] Could not re-mark {len(user_ids)} carts dirty: {str(e)}")
+
+
+def flush_dirty_carts(older_than=FLUSH_DELAY_SECONDS):
+    """Write carts whose first unsaved change is at least `older_than` seconds old to MongoDB.
+
+    A cart is claimed by removing it from the dirty set, so concurrent flushers
+    never write the same change twice; a later edit marks it dirty again. The
+    version guard keeps a slow flusher from overwriting a newer copy. Nothing
+    raises after the claim: a cart that cannot be written goes back into the
+    dirty set, one that cannot be serialised is skipped and logged.
+    Returns the number of carts claimed.
+    """
+    user_ids = redis_client.zrangebyscore(
+        DIRTY_CARTS_KEY, "-inf", time.time() - older_than, start=0, num=FLUSH_BATCH_SIZE
+    )
+    if not user_ids:
+        return 0
+    pipe = redis_client.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.zrem(DIRTY_CARTS_KEY, user_id)
+    claimed = [user_id for user_id, removed in zip(user_ids, pipe.execute()) if removed]
+    if not claimed:
+        return 0
+
+    try:
+        for user_id in claimed:
+            pipe.hgetall(cart_key(user_id))
+        cached = [(user_id, fields) for user_id, fields in zip(claimed, pipe.execute()) if LOADED_FIELD in fields]
+    except Exception as e:
+        print(f"[CartStore] Failed to read {len(claimed)} claimed carts, will retry: {str(e)}")
+        _mark_dirty_again(claimed)
+        return len(claimed)
+
+    now = datetime.utcnow()
+    carts, operations = [], []
+    for user_id, fields in cached:
+        try:
+            operations.append(_flush_operation(user_id, fields, now))
+        except Exception as e:
+            # A cart that cannot be serialised would fail every retry too
+            print(f"[CartStore] Skipping unreadable cart of {user_id}: {str(e)}")
+            continue
+        carts.append((user_id, fields))
+    if not operations:
+        return len(claimed)
+
+    failed = []
+    try:
+        Cart._get_collection().bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details["writeErrors"]:
+            if error["code"] == DUPLICATE_KEY_ERROR:
+                # MongoDB already holds this version or a newer one
+                try:
+                    _reconcile(*carts[error["index"]])
+                except Exception as settle_error:
+                    print(f"[CartStore] Failed to settle cart of {carts[error['index']][0]}: {str(settle_error)}")
+                    failed.append(carts[error["index"]][0])
+            else:
+                failed.append(carts[error["index"]][0])
+    except Exception as e:
+        print(f"[CartStore] Failed to write carts: {str(e)}")
+        failed = [user_id for user_id, _ in carts]
+    if failed:
+        print(f"[CartStore] Failed to persist {len(failed)} carts, will retry")
+        _mark_dirty_again(failed)
+    return len(claimed)
+
+
+def _quantities(lines):
+    return {line["medicine_id"]: line["quantity"] for line in lines}
+
+
+def _reconcile(user_id, fields):
+    """Settle a cached cart whose version MongoDB has already reached or passed.
+
+    MongoDB only gets ahead of Redis through the fallback writes made while
+    Redis was unreachable, so both copies can carry edits the other lacks even
+    at the same version number. If they hold the same lines the cached copy is
+    dropped and the next read loads MongoDB's. Otherwise the two are merged,
+    keeping every line from either and the cached quantity where both have the
+    line, at a version above MongoDB's, and the cart is marked dirty so the
+    merge is persisted. A line removed in only one copy may come back, but no
+    added item or quantity is lost. A cart that changed since it was read is
+    either persisted by another flusher or dirty again and comes back here.
+    """
+    key = cart_key(user_id)
+    cart = Cart.objects(user_id=user_id).first()
+    stored = _lines_from_document(cart)
+    cached = _lines_from_hash(fields)
+
+    def settle(pipe):
+        if pipe.hget(key, VERSION_FIELD) != fields[VERSION_FIELD]:
+            return
+        pipe.multi()
+        if cart is None:
+            # MongoDB's copy is gone; write the cached one again
+            pipe.zadd(DIRTY_CARTS_KEY, {user_id: time.time()}, nx=True)
+            return
+        if _quantities(stored) == _quantities(cached):
+            pipe.delete(key)
+            return
+        merged = {line["medicine_id"]: line for line in stored}
+        merged.update({line["medicine_id"]: line for line in cached})
+        pipe.delete(key)
+        pipe.hset(key, mapping=_hash_mapping(merged.values(), (cart.version or 0) + 1))
+        pipe.expire(key, CART_TTL_SECONDS)
+        pipe.zadd(DIRTY_CARTS_KEY, {user_id: time.time()}, nx=True)
+        print(f"[CartStore] Merged diverged Redis and MongoDB copies of the cart of {user_id}")
+
+    redis_client.transaction(settle, key)
+
+
+_flusher_lock = threading.Lock()
+_flusher = None
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            while flush_dirty_carts() >= FLUSH_BATCH_SIZE:
+                pass
+        except Exception as e:
+            print(f"[CartStore] Failed to flush carts: {str(e)}")
+
+
+def _start_flusher():
+    """Start this process's write-behind thread on its first cart write"""
+    global _flusher
+    if _flusher is None:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_flush_loop, name="cart-flusher", daemon=True)
+                _flusher.start()
+
+
+# --- Public API ---
+# Each call returns the cart's lines after the change, oldest first.
+def get_cart_lines(user_id):
+    try:
+        fields = redis_client.hgetall(cart_key(user_id))
+        if LOADED_FIELD not in fields:
+            _load(user_id)
+            fields = redis_client.hgetall(cart_key(user_id))
+        return _lines_from_hash(fields)
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, reading cart from MongoDB: {str(e)}")
+        return _lines_from_document(Cart.objects(user_id=user_id).first())
+
+
+def add_lines(user_id, additions):
+    """Add [(line, quantity)] in one write; new lines keep the given name, price, image..."""
+    for _, quantity in additions:
+        _check_quantity(quantity)
+    try:
+        def commands(pipe, key):
+            for line, quantity in additions:
+                pipe.hincrby(key, f"q:{line['medicine_id']}", quantity)
+                pipe.hsetnx(key, f"m:{line['medicine_id']}", _line_metadata(line))
+        return _mutate(user_id, commands)[1]
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, writing cart to MongoDB: {str(e)}")
+        return _mongo_add(user_id, additions)
+
+
+def add_line(user_id, line, quantity=1):
+    return add_lines(user_id, [(line, quantity)])
+
+
+def set_quantity(user_id, medicine_id, quantity):
+    """Set a line's quantity; None if the medicine is not in the cart"""
+    _check_quantity(quantity)
+    try:
+        _load(user_id)
+        key = cart_key(user_id)
+
+        def update(pipe):
+            if not pipe.hexists(key, f"m:{medicine_id}"):
+                return False
+            pipe.multi()
+            pipe.hset(key, f"q:{medicine_id}", quantity)
+            return True
+
+        # WATCH keeps a concurrent removal from leaving a quantity without its line
+        if not redis_client.transaction(update, key, value_from_callable=True):
+            return None
+        return _mutate(user_id, lambda pipe, key: None)[1]
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, writing cart to MongoDB: {str(e)}")
+        return _mongo_set_quantity(user_id, medicine_id, quantity)
+
+
+def remove_line(user_id, medicine_id):
+    """Remove a line; None if the medicine is not in the cart"""
+    try:
+        def commands(pipe, key):
+            pipe.hdel(key, f"q:{medicine_id}", f"m:{medicine_id}")
+        (removed,), lines = _mutate(user_id, commands)
+        return lines if removed else None
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, writing cart to MongoDB: {str(e)}")
+        return _mongo_remove(user_id, medicine_id)
+
+
+def apply_batch(user_id, operations):
+    """Apply ordered add/update/remove operations atomically: all of them or, on a bad one, none.
+
+    operations: [{"op": "add" | "update" | "remove", "medicine_id": ..., "quantity": ...,
+    plus name, price, image... for adds}]. The batch is checked against the
+    cart's lines under WATCH and written in one MULTI.
+    """
+    operations = _validate_operations(operations)
+    try:
+        _start_flusher()
+        _load(user_id)
+        key = cart_key(user_id)
+
+        def apply(pipe):
+            _check_lines(operations, [field[2:] for field in pipe.hkeys(key) if field.startswith("m:")])
+            pipe.multi()
+            for kind, medicine_id, quantity, line in operations:
+                if kind == "add":
+                    pipe.hincrby(key, f"q:{medicine_id}", quantity)
+                    pipe.hsetnx(key, f"m:{medicine_id}", _line_metadata(line))
+                elif kind == "update":
+                    pipe.hset(key, f"q:{medicine_id}", quantity)
+                else:
+                    pipe.hdel(key, f"q:{medicine_id}", f"m:{medicine_id}")
+            _mark_changed(pipe, user_id, key)
+
+        return _lines_from_hash(redis_client.transaction(apply, key)[-1])
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, writing cart to MongoDB: {str(e)}")
+        return _mongo_apply_batch(user_id, operations)
+
+
+def clear(user_id):
+    try:
+        _load(user_id)
+        key = cart_key(user_id)
+
+        def update(pipe):
+            # Drop every line but keep the version, so the flush still supersedes MongoDB's copy
+            lines = [field for field in pipe.hkeys(key) if field not in (LOADED_FIELD, VERSION_FIELD)]
+            pipe.multi()
+            if lines:
+                pipe.hdel(key, *lines)
+
+        redis_client.transaction(update, key)
+        return _mutate(user_id, lambda pipe, key: None)[1]
+    except RedisError as e:
+        print(f"[CartStore] Redis unavailable, writing cart to MongoDB: {str(e)}")
+        return _mongo_clear(user_id)
+
+
+def cart_view(user_id, lines):
+    """API representation of a cart, priced from the catalog"""
+    lines = reprice(lines)
+    return {
+        'user_id': user_id,
+        'items': lines,
+        'total_items': sum(line['quantity'] for line in lines),
+        'total_price': sum(line['price'] * line['quantity'] for line in lines)
+    }
@@ -0,0 +1,321 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.models.doctor_model import Doctor
+from app.models.doctor_schedule_model import WEEKDAYS
+from app.models.medicine_model import Medicine
+from app.services.dashboard_counter_service import rebuild_dashboard_counters
+from app.services.doctor_catalog_service import bump_catalog_version
+from app.services.image_variant_service import derive_variants
+from app.services.medicine_catalog_service import record_medicine_changes
+from app.services.specialty_facet_service import rebuild_specialty_facets
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+# Only the first errors are kept in the report; the count covers all of them
+MAX_REPORTED_ERRORS = 1000
+# CSV cells hold list fields as "MBBS|MD - Cardiology"
+CSV_LIST_SEPARATOR = "|"
+
+
+# --- Field converters: raw CSV string or JSON value -> stored value, ValueError if invalid ---
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError("must be a string")
+    return value.strip()
+
+
+def _integer(minimum=None, maximum=None):
+    def convert(value):
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError("must be an integer")
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError("must be an integer")
+        return _check_range(number, minimum, maximum)
+    return convert
+
+
+def _number(minimum=None, maximum=None):
+    def convert(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError("must be a number")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError("must be a number")
+        return _check_range(number, minimum, maximum)
+    return convert
+
+
+def _check_range(number, minimum, maximum):
+    if minimum is not None and number < minimum:
+        raise ValueError(f"must be at least {minimum}")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"must be at most {maximum}")
+    return number
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "1", "yes"):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ("false", "0", "no"):
+        return False
+    raise ValueError("must be true or false")
+
+
+def _text_list(choices=None):
+    def convert(value):
+        if isinstance(value, str):
+            value = [item for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+        if not isinstance(value, list):
+            raise ValueError("must be a list")
+        items = [_text(item) for item in value]
+        if choices is not None:
+            invalid = [item for item in items if item not in choices]
+            if invalid:
+                raise ValueError(f"has invalid value '{invalid[0]}'")
+        return items
+    return convert
+
+
+class CatalogSchema:
+    """How rows of one catalog collection are validated and written.
+
+    `fields` maps a field name to (converter, required). Optional fields a row
+    leaves out keep their stored value on existing documents and get the model
+    default on new ones, so e.g. a file without a stock column leaves stock alone.
+    """
+
+    def __init__(self, document, key, fields, image_field, variants_field):
+        self.document = document
+        self.key = key
+        self.fields = fields
+        self.image_field = image_field
+        self.variants_field = variants_field
+        self._defaults = {}  # frozenset of fields present -> defaults for the rest
+
+    def parse(self, record):
+        """{field: value} for one raw record; raises ValueError naming the bad field"""
+        unknown = [name for name in record if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown field '{unknown[0]}'")
+        values = {}
+        for name, (convert, required) in self.fields.items():
+            raw = record.get(name)
+            if raw is None or raw == "":
+                if required:
+                    raise ValueError(f"{name} is required")
+                continue
+            try:
+                values[name] = convert(raw)
+            except ValueError as e:
+                raise ValueError(f"{name} {e}")
+        if not values[self.key]:
+            raise ValueError(f"{self.key} is required")
+        return values
+
+    def derived(self, values):
+        """Stored fields computed from the row rather than read from it"""
+        if self.image_field in values:
+            return {self.variants_field: derive_variants(values[self.image_field]) or {}}
+        return {}
+
+    def defaults(self, present):
+        """Model defaults for the fields a row leaves out, applied only when it inserts"""
+        present = frozenset(present)
+        defaults = self._defaults.get(present)
+        if defaults is None:
+            defaults = self._defaults[present] = {
+                field.db_field: field.default() if callable(field.default) else field.default
+                for name, field in self.document._fields.items()
+                if name not in ("id", self.key) and name not in present and field.default is not None
+            }
+        return defaults
+
+    def upsert(self, values):
+        changes = dict(values, **self.derived(values))
+        return UpdateOne(
+            {self.key: values[self.key]},
+            {"$set": changes, "$setOnInsert": self.defaults(changes)},
+            upsert=True
+        )
+
+
+class MedicineSchema(CatalogSchema):
+    def derived(self, values):
+        derived = super().derived(values)
+        # in_stock is never imported; it follows the stock level when one is given
+        if "stock" in values:
+            derived["in_stock"] = values["stock"] > 0
+        return derived
+
+
+SCHEMAS = {
+    "doctors": CatalogSchema(Doctor, "doctor_id", {
+        "doctor_id": (_text, True),
+        "name": (_text, True),
+        "specialty": (_text, True),
+        "img": (_text, False),
+        "experience": (_integer(minimum=0), False),
+        "rating": (_number(minimum=0, maximum=5), False),
+        "consultation_fee": (_integer(minimum=0), False),
+        "availability": (_text_list(WEEKDAYS), False),
+        "qualifications": (_text_list(), False),
+        "about": (_text, False),
+        "is_active": (_flag, False)
+    }, image_field="img", variants_field="img_variants"),
+    "medicines": MedicineSchema(Medicine, "medicine_id", {
+        "medicine_id": (_text, True),
+        "name": (_text, True),
+        "category": (_text, True),
+        "price": (_integer(minimum=0), True),
+        "description": (_text, True),
+        "image": (_text, True),
+        "requires_prescription": (_flag, False),
+        "stock": (_integer(minimum=0), False),
+        "rating": (_number(minimum=0, maximum=5), False),
+        "reviews": (_integer(minimum=0), False)
+    }, image_field="image", variants_field="image_variants")
+}
+
+
+# --- Readers: yield (line number, record) without loading the file ---
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, ValueError("Row has more cells than the header")
+        else:
+            yield reader.line_num, record
+
+
+def read_jsonl(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError("Each line must be a JSON object")
+            continue
+        yield line_number, record
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class ImportReport:
+    """Counts and the first per-row errors of one import run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []  # [(line number, message)]
+
+    def add_error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+
+def _write_batch(collection, batch):
+    """Upsert one batch; returns (result counts, [(line number, error)])"""
+    line_numbers = list(batch)
+    try:
+        result = collection.bulk_write(list(batch.values()), ordered=False).bulk_api_result
+        return result, []
+    except BulkWriteError as e:
+        errors = [(line_numbers[error["index"]], error["errmsg"]) for error in e.details["writeErrors"]]
+        return e.details, errors
+
+
+def _collect(report, outcome):
+    result, errors = outcome
+    report.inserted += result["nUpserted"]
+    report.updated += result["nModified"]
+    report.unchanged += result["nMatched"] - result["nModified"]
+    for line_number, message in errors:
+        report.add_error(line_number, message)
+
+
+def _refresh_caches(kind):
+    if kind == "doctors":
+        bump_catalog_version()
+        rebuild_specialty_facets()
+        rebuild_dashboard_counters()
+    else:
+        record_medicine_changes()
+
+
+# --- Public API ---
+def import_records(kind, records, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+    """Validate and upsert (line number, record) pairs into the doctors or medicines catalog.
+
+    Nothing is deleted. Rows are upserted keyed on doctor_id / medicine_id in
+    unordered bulk writes of `batch_size`, with up to `workers` batches in
+    flight while the next ones are parsed. Invalid rows are reported and
+    skipped. Within a batch a repeated id keeps its last row; across batches
+    that are in flight together, pass workers=1 if file order must win. A
+    record may be an Exception from the reader, reported as that line's error.
+    """
+    if kind not in SCHEMAS:
+        raise ValueError(f"Invalid catalog. Must be one of: {', '.join(SCHEMAS)}")
+    if batch_size < 1 or workers < 1:
+        raise ValueError("batch_size and workers must be positive")
+    schema = SCHEMAS[kind]
+    collection = schema.document._get_collection()
+    report = ImportReport()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = []
+        batch = {}
+        keys = {}
+        for line_number, record in records:
+            report.rows += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                values = schema.parse(record)
+            except ValueError as e:
+                report.add_error(line_number, str(e))
+                continue
+            # Later rows for the same id replace earlier ones in this batch
+            previous = keys.pop(values[schema.key], None)
+            if previous is not None:
+                del batch[previous]
+            keys[values[schema.key]] = line_number
+            batch[line_number] = schema.upsert(values)
+            if len(batch) >= batch_size:
+                in_flight.append(executor.submit(_write_batch, collection, batch))
+                batch, keys = {}, {}
+                if len(in_flight) >= workers:
+                    _collect(report, in_flight.pop(0).result())
+        if batch:
+            in_flight.append(executor.submit(_write_batch, collection, batch))
+        for future in in_flight:
+            _collect(report, future.result())
+
+    if report.inserted or report.updated:
+        _refresh_caches(kind)
+    return report
+
+
+def import_file(kind, path, file_format=None, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+    """Stream a CSV or JSONL file into a catalog; the format defaults to the file extension"""
+    file_format = file_format or path.rsplit(".", 1)[-1].lower()
+    if file_format not in READERS:
+        raise ValueError(f"Invalid format. Must be one of: {', '.join(READERS)}")
+    with open(path, newline="", encoding="utf-8") as f:
+        return import_records(kind, READERS[file_format](f), batch_size, workers)
@@ -0,0 +1,127 @@
+from mongoengine.errors import NotUniqueError
+from pymongo.errors import DuplicateKeyError
+from app.models.order_model import Order
+from app.services import cart_store_service as cart_store
+from app.services.inventory_service import order_quantities, release_stock, reserve_stock, take_stock_in_transaction
+from app.services.medicine_catalog_service import record_medicine_changes
+
+# Deployments that support multi-document transactions; a standalone server does not
+TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded")
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+class _ShortStock(Exception):
+    """Raised inside the transaction to abort it when a line lacks stock"""
+
+    def __init__(self, medicine_id):
+        super().__init__(medicine_id)
+        self.medicine_id = medicine_id
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an idempotency key already placed an order for different lines"""
+
+
+# --- Helper Functions ---
+def _place_in_transaction(client, order, quantities):
+    """Stock reservation and order insert in one transaction; returns the short medicine_id or None"""
+    # The raw insert skips mongoengine, so check the order as save() would
+    order.validate()
+    document = order.to_mongo()
+
+    def place(session):
+        short = take_stock_in_transaction(quantities, session)
+        if short:
+            raise _ShortStock(short)
+        Order._get_collection().insert_one(document, session=session)
+
+    try:
+        # with_transaction retries write conflicts on contended medicines
+        with client.start_session() as session:
+            session.with_transaction(place)
+    except _ShortStock as e:
+        return e.medicine_id
+    order.id = document["_id"]
+    record_medicine_changes(list(quantities))
+    return None
+
+
+def _place_with_compensation(order, quantities):
+    """Standalone servers: reserve, insert, and give the stock back if the insert fails"""
+    short = reserve_stock(quantities)
+    if short:
+        return short
+    try:
+        order.save(force_insert=True)
+    except Exception:
+        release_stock(quantities)
+        raise
+    return None
+
+
+# --- Public API ---
+def supports_transactions(client):
+    """Whether the MongoDB deployment behind `client` can run multi-document transactions"""
+    description = getattr(client, "topology_description", None)
+    return description is not None and description.topology_type_name in TRANSACTION_TOPOLOGIES
+
+
+def check_idempotency_key(key):
+    """The client's idempotency key, or None; raises ValueError if it is malformed"""
+    if key is None:
+        return None
+    if not isinstance(key, str) or not key.strip() or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValueError(f"Idempotency key must be a non-empty string of at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    return key.strip()
+
+
+def placed_order(user_id, idempotency_key):
+    """The order an earlier attempt with this key placed, if any"""
+    if not idempotency_key:
+        return None
+    return Order.objects(user_id=user_id, idempotency_key=idempotency_key).first()
+
+
+def replays_request(order, quantities):
+    """Whether a stored order was placed for the same {medicine_id: quantity} lines"""
+    return order_quantities(order.items) == quantities
+
+
+def finish_replay(order):
+    """A retry of a placed order: clear the cart in case the first attempt died before doing so"""
+    cart_store.clear(order.user_id)
+    return order
+
+
+def place_order(order, quantities):
+    """Reserve stock for `quantities`, insert `order` and clear the user's cart.
+
+    On a replica set or sharded cluster the reservation and the insert commit
+    together in one multi-document transaction. A standalone server falls back
+    to the guarded stock reservation followed by the insert, giving the stock
+    back if the insert fails. The cart lives in Redis, outside either, and is
+    cleared once the order is stored; a retry with the same idempotency key
+    clears it again.
+
+    Returns (order, short medicine_id). When a concurrent attempt with the same
+    idempotency key won, its order is returned instead, or IdempotencyKeyReused
+    is raised if that order has different lines.
+    """
+    client = Order._get_db().client
+    try:
+        if supports_transactions(client):
+            short = _place_in_transaction(client, order, quantities)
+        else:
+            short = _place_with_compensation(order, quantities)
+    except (DuplicateKeyError, NotUniqueError):
+        # This attempt's stock was already given back by the abort or the compensation
+        winner = placed_order(order.user_id, order.idempotency_key)
+        if winner is None:
+            raise
+        if not replays_request(winner, quantities):
+            raise IdempotencyKeyReused()
+        return finish_replay(winner), None
+    if short:
+        return None, short
+    cart_store.clear(order.user_id)
+    return order, None
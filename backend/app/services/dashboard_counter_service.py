@@ -0,0 +1,115 @@
+from datetime import datetime
+from app.models.appointments_models import Appointment
+from app.models.dashboard_counters_model import DashboardCounters
+from app.models.doctor_model import Doctor
+from app.models.user_models import User
+
+COUNTERS_KEY = "global"
+COUNTED_STATUSES = ["pending", "confirmed", "completed", "cancelled"]
+
+
+# --- Helper Functions ---
+def _status_field(status):
+    status = str(status or "").lower()
+    return f"{status}_appointments" if status in COUNTED_STATUSES else None
+
+
+def _increment(counters):
+    """Apply increments to the counters document.
+
+    Never upserts: a missing document is rebuilt from scratch on the next read,
+    so creating it here from a single increment would store wrong totals.
+    """
+    try:
+        DashboardCounters.objects(key=COUNTERS_KEY).update_one(
+            set__updated_at=datetime.utcnow(),
+            **{f"inc__{field}": amount for field, amount in counters.items()}
+        )
+    except Exception as e:
+        print(f"[DashboardCounters] Failed to update counters: {str(e)}")
+
+
+def count_appointments_by_status():
+    """Count all appointments per status in a single aggregation pass"""
+    pipeline = [
+        {"$group": {"_id": {"$toLower": "$status"}, "count": {"$sum": 1}}}
+    ]
+    counts = {status: 0 for status in COUNTED_STATUSES}
+    total = 0
+    for row in Appointment.objects.aggregate(pipeline):
+        total += row["count"]
+        if row["_id"] in counts:
+            counts[row["_id"]] = row["count"]
+    return total, counts
+
+
+# --- Public API ---
+def rebuild_dashboard_counters():
+    """Recompute every counter from the source collections and store them"""
+    total_appointments, by_status = count_appointments_by_status()
+    values = {
+        "total_users": User.objects.count(),
+        "total_doctors": Doctor.objects.count(),
+        "total_appointments": total_appointments,
+    }
+    values.update({_status_field(status): count for status, count in by_status.items()})
+
+    DashboardCounters.objects(key=COUNTERS_KEY).update_one(
+        upsert=True,
+        set__updated_at=datetime.utcnow(),
+        **{f"set__{field}": value for field, value in values.items()}
+    )
+    return values
+
+
+def get_dashboard_counters():
+    """Read the materialized counters, rebuilding them if they do not exist yet"""
+    counters = DashboardCounters.objects(key=COUNTERS_KEY).first()
+    if not counters:
+        return rebuild_dashboard_counters()
+    return counters.to_dict()
+
+
+def record_user_created():
+    _increment({"total_users": 1})
+
+
+def record_appointment_created(status):
+    changes = {"total_appointments": 1}
+    status_field = _status_field(status)
+    if status_field:
+        changes[status_field] = 1
+    _increment(changes)
+
+
+def change_appointment_status(appointment, new_status):
+    """Move `appointment` to `new_status` and count the transition.
+
+    The write only applies while the stored status is still the one this copy
+    read, so two concurrent updates cannot both count the same transition.
+    Returns the updated appointment, or None when another request changed the
+    status first. Raises NotUniqueError when reactivating a rebooked slot.
+    """
+    previous_status = appointment.status
+    updated = Appointment.objects(pk=appointment.pk, status=previous_status).modify(
+        new=True,
+        set__status=new_status,
+        set__updated_at=datetime.utcnow()
+    )
+    if updated is not None:
+        record_appointment_status_change(previous_status, new_status)
+    return updated
+
+
+def record_appointment_status_change(previous_status, new_status):
+    """Move one appointment between status counters; only call after a guarded status write"""
+    previous_field = _status_field(previous_status)
+    new_field = _status_field(new_status)
+    if previous_field == new_field:
+        return
+    changes = {}
+    if previous_field:
+        changes[previous_field] = -1
+    if new_field:
+        changes[new_field] = 1
+    _increment(changes)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from redis import RedisError
+from app.models.doctor_model import Doctor
+from app.services.redis_service import redis_client
+
+CATALOG_VERSION_KEY = "doctor_catalog:version"
+# How often a worker asks Redis whether another process changed the catalog
+VERSION_CHECK_INTERVAL_SECONDS = 1.0
+
+_lock = threading.Lock()
+_state = {
+    "version": None,     # last catalog version seen in Redis
+    "checked_at": 0.0,   # monotonic time of the last version check
+    "doctors": None,     # Doctor documents of the current version
+    "views": {}          # view name -> (serialized body, strong ETag)
+}
+
+
+# --- Helper Functions ---
+def _reset_local():
+    with _lock:
+        _state["version"] = None
+        _state["checked_at"] = 0.0
+        _state["doctors"] = None
+        _state["views"] = {}
+
+
+def _refresh_version():
+    """Drop cached views when the shared catalog version moved on"""
+    now = time.monotonic()
+    if now - _state["checked_at"] < VERSION_CHECK_INTERVAL_SECONDS and _state["doctors"] is not None:
+        return
+    try:
+        version = int(redis_client.get(CATALOG_VERSION_KEY) or 0)
+    except RedisError as e:
+        # Without Redis we cannot see other workers' bumps; reload once per interval instead
+        print(f"[DoctorCatalog] Failed to read catalog version: {str(e)}")
+        version = None
+    with _lock:
+        if version is None or version != _state["version"]:
+            _state["doctors"] = None
+            _state["views"] = {}
+        _state["version"] = version
+        _state["checked_at"] = now
+
+
+def _catalog_doctors():
+    # The views dict is replaced on every reset, so it doubles as a generation marker
+    generation = _state["views"]
+    doctors = _state["doctors"]
+    if doctors is None:
+        doctors = list(Doctor.objects())
+        with _lock:
+            if _state["views"] is generation:
+                _state["doctors"] = doctors
+    return doctors
+
+
+# --- Public API ---
+def bump_catalog_version():
+    """Invalidate the doctor catalog in every worker; call after any doctor write"""
+    try:
+        redis_client.incr(CATALOG_VERSION_KEY)
+    except RedisError as e:
+        print(f"[DoctorCatalog] Failed to bump catalog version: {str(e)}")
+    _reset_local()
+
+
+def get_catalog_doctors():
+    """All Doctor documents of the current catalog version"""
+    _refresh_version()
+    return _catalog_doctors()
+
+
+def get_catalog_view(name, builder, cacheable=True):
+    """Serialized body and strong ETag of a catalog view.
+
+    `builder` turns the list of Doctor documents into the response payload. The
+    result is cached per catalog version unless `cacheable` is False (e.g. views
+    keyed by arbitrary user input).
+    """
+    _refresh_version()
+    views = _state["views"]
+    view = views.get(name)
+    if view is None:
+        body = json.dumps(builder(_catalog_doctors()), separators=(",", ":")).encode("utf-8")
+        view = (body, hashlib.sha1(body).hexdigest())
+        if cacheable:
+            # Stored in the dict captured above, so a view built from a catalog
+            # that was invalidated meanwhile is never kept
+            views[name] = view
+    return view
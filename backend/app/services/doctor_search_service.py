@@ -0,0 +1,71 @@
+from app.models.doctor_model import Doctor
+from app.models.doctor_schedule_model import WEEKDAYS
+from app.services.pagination_service import (
+    combine, encode_cursor, keyset_clause, ordering, range_condition, resolve_sort
+)
+
+# sort name -> (Doctor field, default direction); every one is backed by a
+# (field, _id) and a (specialty, field, _id) index on Doctor
+SORT_FIELDS = {
+    "rating": ("rating", -1),
+    "fee": ("consultation_fee", 1),
+    "experience": ("experience", -1)
+}
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+# --- Helper Functions ---
+def build_search_query(filters, sort="rating", order=None, cursor=None):
+    """MongoDB filter and sort spec for a doctor search; raises ValueError on bad input.
+
+    `filters` may hold specialty, min_fee, max_fee, min_rating, min_experience,
+    day (weekday name) and is_active. Ties are broken on _id so keyset
+    pagination never skips or repeats a doctor.
+    """
+    field, direction = resolve_sort(SORT_FIELDS, sort, order)
+
+    clauses = []
+    if filters.get("specialty"):
+        clauses.append({"specialty": filters["specialty"]})
+    if filters.get("is_active") is not None:
+        # Doctors saved before is_active existed are active, like the model default
+        clauses.append({"is_active": {"$ne": False}} if filters["is_active"] else {"is_active": False})
+    if filters.get("day"):
+        if filters["day"] not in WEEKDAYS:
+            raise ValueError(f"Invalid day. Must be one of: {', '.join(WEEKDAYS)}")
+        clauses.append({"availability": filters["day"]})
+
+    fee_range = range_condition(filters.get("min_fee"), filters.get("max_fee"))
+    if fee_range:
+        clauses.append({"consultation_fee": fee_range})
+    if filters.get("min_rating") is not None:
+        clauses.append({"rating": range_condition(filters["min_rating"])})
+    if filters.get("min_experience") is not None:
+        clauses.append({"experience": range_condition(filters["min_experience"])})
+
+    if cursor:
+        clauses.append(keyset_clause(field, direction, cursor))
+
+    return combine(clauses), ordering(field, direction)
+
+
+def search_queryset(filters, sort="rating", order=None, cursor=None):
+    query, order_by = build_search_query(filters, sort, order, cursor)
+    return Doctor.objects(__raw__=query).order_by(*order_by)
+
+
+# --- Public API ---
+def find_doctors(filters, sort="rating", order=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """One page of matching doctors and the cursor of the next page (None on the last page)"""
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    # Fetch one extra doctor to learn whether another page exists
+    doctors = list(search_queryset(filters, sort, order, cursor).limit(limit + 1))
+    next_cursor = None
+    if len(doctors) > limit:
+        doctors = doctors[:limit]
+        last = doctors[-1]
+        next_cursor = encode_cursor(getattr(last, SORT_FIELDS[sort][0]), last.pk)
+    return doctors, next_cursor
@@ -0,0 +1,82 @@
+import os
+import shutil
+from app.services.image_variant_service import derive_variants, render_variants
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Flask serves app/static at /static, so locally stored images work without extra routes
+DEFAULT_LOCAL_MEDIA_ROOT = os.path.join(BASE_DIR, "static", "uploads")
+DEFAULT_LOCAL_MEDIA_URL = "/static/uploads"
+
+
+class StorageBackend:
+    """Where uploaded images end up; implementations return a public URL per key"""
+
+    name = None
+
+    def upload(self, local_path, key):
+        """Store the file at `local_path` under `key` (no extension) and return its URL"""
+        raise NotImplementedError
+
+    def upload_variants(self, local_path, key, url):
+        """Store thumbnail/card/full renditions of an uploaded image; returns {variant: url}"""
+        return render_variants(local_path, key, self.upload)
+
+
+class CloudinaryBackend(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self):
+        # Imported here so the local backend works without the Cloudinary SDK or credentials
+        import cloudinary
+        import cloudinary.uploader
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+        self._uploader = cloudinary.uploader
+
+    def upload(self, local_path, key):
+        result = self._uploader.upload(
+            local_path,
+            public_id=key,
+            overwrite=True,
+            resource_type="image"
+        )
+        return result["secure_url"]
+
+    def upload_variants(self, local_path, key, url):
+        # Cloudinary renders variants from URL transformations on first request and caches them
+        return derive_variants(url) or {}
+
+
+class LocalFilesystemBackend(StorageBackend):
+    name = "local"
+
+    def __init__(self, root=None, base_url=None):
+        self.root = root or os.getenv("LOCAL_MEDIA_ROOT", DEFAULT_LOCAL_MEDIA_ROOT)
+        self.base_url = (base_url or os.getenv("LOCAL_MEDIA_URL", DEFAULT_LOCAL_MEDIA_URL)).rstrip("/")
+
+    def upload(self, local_path, key):
+        filename = key + os.path.splitext(local_path)[1].lower()
+        destination = os.path.join(self.root, *filename.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        # Copy then rename, so a reader never sees a half-written file
+        partial = destination + ".part"
+        shutil.copyfile(local_path, partial)
+        os.replace(partial, destination)
+        return f"{self.base_url}/{filename}"
+
+
+STORAGE_BACKENDS = {
+    CloudinaryBackend.name: CloudinaryBackend,
+    LocalFilesystemBackend.name: LocalFilesystemBackend
+}
+
+
+def get_storage_backend(name=None, **options):
+    """Build the backend named `name`, defaulting to the STORAGE_BACKEND env var (cloudinary)"""
+    name = name or os.getenv("STORAGE_BACKEND", CloudinaryBackend.name)
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Must be one of: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name](**options)
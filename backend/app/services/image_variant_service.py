@@ -0,0 +1,93 @@
+import os
+import tempfile
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, urlencode
+
+# variant -> (width, height); a height of None keeps the aspect ratio
+VARIANT_SIZES = {
+    "thumbnail": (96, 96),
+    "card": (400, 400),
+    "full": (1200, None)
+}
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+
+CLOUDINARY_UPLOAD_MARKER = "/image/upload/"
+UNSPLASH_HOST = "images.unsplash.com"
+
+
+# --- Helper Functions ---
+def _cloudinary_variant(url, width, height):
+    # f_auto/q_auto let the CDN pick AVIF/WebP per browser; derived images are cached after the first request
+    if height:
+        transformation = f"c_fill,g_auto,w_{width},h_{height},f_auto,q_auto"
+    else:
+        transformation = f"c_limit,w_{width},f_auto,q_auto"
+    head, tail = url.split(CLOUDINARY_UPLOAD_MARKER, 1)
+    return f"{head}{CLOUDINARY_UPLOAD_MARKER}{transformation}/{tail}"
+
+
+def _unsplash_variant(url, width, height):
+    params = {"w": width, "auto": "format", "q": VARIANT_QUALITY}
+    if height:
+        params.update(h=height, fit="crop")
+    else:
+        params["fit"] = "max"
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ""))
+
+
+@lru_cache(maxsize=4096)
+def _derived_variants(url):
+    if CLOUDINARY_UPLOAD_MARKER in url and "res.cloudinary.com" in url:
+        build = _cloudinary_variant
+    elif urlsplit(url).netloc == UNSPLASH_HOST:
+        build = _unsplash_variant
+    else:
+        return None
+    return tuple((name, build(url, width, height)) for name, (width, height) in VARIANT_SIZES.items())
+
+
+# --- Public API ---
+def derive_variants(url):
+    """Variant URLs served by the image CDN itself, or None when the host cannot resize"""
+    if not url:
+        return None
+    derived = _derived_variants(url)
+    return dict(derived) if derived else None
+
+
+def variants_for(url, stored=None):
+    """Variants to return from a serializer: stored ones, else CDN-derived, else the original"""
+    if stored:
+        return stored
+    return derive_variants(url) or {name: url for name in VARIANT_SIZES}
+
+
+def render_variants(local_path, key, save):
+    """Resize a local image into every variant and hand each file to `save(path, variant_key)`.
+
+    Used by storage backends that cannot resize on request. Returns {variant: url}, or
+    {} when Pillow is not installed.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        print("[ImageVariants] Pillow is not installed; skipping variant generation")
+        return {}
+
+    variants = {}
+    with tempfile.TemporaryDirectory() as workdir, Image.open(local_path) as original:
+        original = ImageOps.exif_transpose(original)
+        for name, (width, height) in VARIANT_SIZES.items():
+            if height:
+                image = ImageOps.fit(original, (width, height))
+            else:
+                image = original.copy()
+                image.thumbnail((width, width * 4))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            variant_path = os.path.join(workdir, f"{name}.{VARIANT_FORMAT}")
+            image.save(variant_path, VARIANT_FORMAT.upper(), quality=VARIANT_QUALITY)
+            variants[name] = save(variant_path, f"{key}.{name}")
+    return variants
@@ -0,0 +1,131 @@
+from collections import Counter
+from pymongo import UpdateOne
+from app.models.medicine_model import Medicine
+from app.services.medicine_catalog_service import record_medicine_changes
+
+
+# --- Helper Functions ---
+def _stock_change(amount):
+    """Pipeline update adding `amount` to stock and re-deriving in_stock from the result"""
+    return [
+        {"$set": {"stock": {"$add": [{"$ifNull": ["$stock", 0]}, amount]}}},
+        {"$set": {"in_stock": {"$gt": ["$stock", 0]}}}
+    ]
+
+
+def order_quantities(items):
+    """{medicine_id: total quantity} for order or cart lines; repeated medicines are merged"""
+    quantities = Counter()
+    for item in items:
+        quantities[item.medicine_id] += item.quantity
+    return dict(quantities)
+
+
+def _release(quantities):
+    if not quantities:
+        return
+    Medicine._get_collection().bulk_write([
+        UpdateOne({"medicine_id": medicine_id}, _stock_change(quantity))
+        for medicine_id, quantity in quantities.items()
+    ], ordered=False)
+
+
+def _has_stock(medicine_id, quantity):
+    """Filter that only matches while the medicine has enough stock, so a deleted one is never created"""
+    return {"medicine_id": medicine_id, "stock": {"$gte": quantity}}
+
+
+def _take(lines):
+    """Guarded decrements, one line at a time; returns the index of the short line, or None.
+
+    The lines already taken are released again when one comes up short or
+    the write fails.
+    """
+    collection = Medicine._get_collection()
+    for index, (medicine_id, quantity) in enumerate(lines):
+        try:
+            result = collection.update_one(_has_stock(medicine_id, quantity), _stock_change(-quantity))
+        except Exception:
+            _release(dict(lines[:index]))
+            raise
+        if result.matched_count == 0:
+            _release(dict(lines[:index]))
+            return index
+    return None
+
+
+def _short_medicine(lines):
+    """A line the committed stock cannot cover; only names the 409 after an aborted transaction"""
+    stock = {
+        document["medicine_id"]: document.get("stock") or 0
+        for document in Medicine._get_collection().find(
+            {"medicine_id": {"$in": [medicine_id for medicine_id, _ in lines]}}, {"medicine_id": 1, "stock": 1}
+        )
+    }
+    for medicine_id, quantity in lines:
+        if stock.get(medicine_id, 0) < quantity:
+            return medicine_id
+    # Restocked since the transaction read it; still report a line so the caller aborts
+    return lines[0][0]
+
+
+# --- Public API ---
+def reserve_stock(quantities):
+    """Take stock for every line, giving back what was taken if any line is short.
+
+    This is the standalone-server path and it is compensating, not atomic:
+    each line is a guarded decrement in its own round trip and, when one
+    matches nothing, the lines before it are released again. Until then other
+    requests can see the earlier lines' stock lowered, and a process that dies
+    in between leaves those units taken until an admin restocks. Checkout on a
+    replica set uses take_stock_in_transaction instead. A medicine that does
+    not exist counts as out of stock.
+
+    Returns None on success, or the medicine_id that did not have enough stock.
+    """
+    lines = list(quantities.items())
+    if not lines:
+        return None
+    short = _take(lines)
+    if short is not None:
+        return lines[short][0]
+    # in_stock may have flipped; keep the in-process catalogs in step
+    record_medicine_changes(list(quantities))
+    return None
+
+
+def take_stock_in_transaction(quantities, session):
+    """Take stock for every line in one bulk write inside the caller's transaction.
+
+    All guarded decrements go to the server in a single round trip. If fewer
+    lines matched than were sent, the returned medicine_id tells the caller to
+    abort, which undoes every line at once, so nothing is released here and no
+    partial reservation is ever visible. The caller records the medicine
+    changes once the transaction commits.
+    """
+    lines = list(quantities.items())
+    if not lines:
+        return None
+    result = Medicine._get_collection().bulk_write(
+        [UpdateOne(_has_stock(medicine_id, quantity), _stock_change(-quantity)) for medicine_id, quantity in lines],
+        ordered=False, session=session
+    )
+    if result.matched_count == len(lines):
+        return None
+    return _short_medicine(lines)
+
+
+def release_stock(quantities):
+    """Return reserved stock, e.g. when an order is cancelled"""
+    _release(quantities)
+    record_medicine_changes(list(quantities))
+
+
+def set_stock(medicine_id, quantity):
+    """Replace a medicine's stock level (restocking); returns False if the medicine does not exist"""
+    if quantity < 0:
+        raise ValueError("Stock cannot be negative")
+    updated = Medicine.objects(medicine_id=medicine_id).update_one(set__stock=quantity, set__in_stock=quantity > 0)
+    if updated:
+        record_medicine_changes([medicine_id])
+    return bool(updated)
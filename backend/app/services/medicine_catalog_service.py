@@ -0,0 +1,132 @@
+import threading
+import time
+from redis import RedisError
+from app.models.medicine_model import Medicine
+from app.services.redis_service import redis_client
+
+# Stream of medicine changes shared by every worker; each entry lists the changed
+# medicine ids, or FULL_RELOAD. The id of the last entry seen is a worker's catalog version.
+MEDICINE_CHANGES_KEY = "medicine_catalog:changes"
+CHANGE_LOG_LENGTH = 10000
+FULL_RELOAD = "*"
+EMPTY_STREAM_ID = "0-0"
+# How often a worker reads the change stream
+VERSION_CHECK_INTERVAL_SECONDS = 1.0
+# Without Redis other workers' changes are invisible, so reload everything now and then
+FALLBACK_RELOAD_INTERVAL_SECONDS = 30.0
+
+_lock = threading.RLock()
+_listeners = []
+_state = {
+    "last_id": None,     # id of the last change stream entry applied
+    "checked_at": 0.0,   # monotonic time of the last stream read
+    "loaded_at": 0.0,    # monotonic time of the last full load
+    "medicines": None    # {medicine_id: Medicine}
+}
+
+
+# --- Helper Functions ---
+def _notify(method, *args):
+    for listener in _listeners:
+        getattr(listener, method)(*args)
+
+
+def _full_load(last_id):
+    medicines = {medicine.medicine_id: medicine for medicine in Medicine.objects()}
+    _state["medicines"] = medicines
+    _state["last_id"] = last_id
+    _state["loaded_at"] = time.monotonic()
+    _notify("reset", list(medicines.values()))
+
+
+def _apply_changes(entries):
+    changed_ids = set()
+    for _, fields in entries:
+        if fields.get("ids") == FULL_RELOAD:
+            _full_load(entries[-1][0])
+            return
+        changed_ids.update(fields.get("ids", "").split(","))
+    changed_ids.discard("")
+
+    updated = list(Medicine.objects(medicine_id__in=list(changed_ids))) if changed_ids else []
+    removed = changed_ids.difference(medicine.medicine_id for medicine in updated)
+    medicines = _state["medicines"]
+    for medicine_id in removed:
+        medicines.pop(medicine_id, None)
+    for medicine in updated:
+        medicines[medicine.medicine_id] = medicine
+    _state["last_id"] = entries[-1][0]
+    _notify("apply", updated, removed)
+
+
+def _sync():
+    """Bring the local catalog up to date with the change stream"""
+    now = time.monotonic()
+    if _state["medicines"] is not None and now - _state["checked_at"] < VERSION_CHECK_INTERVAL_SECONDS:
+        return
+    with _lock:
+        if _state["medicines"] is not None and now - _state["checked_at"] < VERSION_CHECK_INTERVAL_SECONDS:
+            return
+        last_id = _state["last_id"]
+        try:
+            if _state["medicines"] is None or last_id is None:
+                # Note the stream position before loading, so changes made during the load are replayed
+                latest = redis_client.xrevrange(MEDICINE_CHANGES_KEY, count=1)
+                _full_load(latest[0][0] if latest else EMPTY_STREAM_ID)
+            else:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.xrange(MEDICINE_CHANGES_KEY, min=last_id, max=last_id)
+                pipe.xrange(MEDICINE_CHANGES_KEY, min=f"({last_id}")
+                current, entries = pipe.execute()
+                if last_id != EMPTY_STREAM_ID and not current:
+                    # Our position was trimmed from the stream, so changes may have been missed
+                    latest = redis_client.xrevrange(MEDICINE_CHANGES_KEY, count=1)
+                    _full_load(latest[0][0] if latest else EMPTY_STREAM_ID)
+                elif entries:
+                    _apply_changes(entries)
+        except RedisError as e:
+            print(f"[MedicineCatalog] Failed to read medicine changes: {str(e)}")
+            if _state["medicines"] is None or now - _state["loaded_at"] >= FALLBACK_RELOAD_INTERVAL_SECONDS:
+                _full_load(None)
+        _state["checked_at"] = now
+
+
+# --- Public API ---
+def register_catalog_listener(listener):
+    """Keep `listener` in step with the catalog.
+
+    The listener gets reset(medicines) after every full load and
+    apply(updated_medicines, removed_ids) for incremental changes, always under
+    the catalog lock.
+    """
+    with _lock:
+        _listeners.append(listener)
+        if _state["medicines"] is not None:
+            listener.reset(list(_state["medicines"].values()))
+
+
+def record_medicine_changes(medicine_ids=None):
+    """Tell every worker which medicines changed; None reloads the whole catalog"""
+    ids = FULL_RELOAD if medicine_ids is None else ",".join(sorted(set(medicine_ids)))
+    if not ids:
+        return
+    try:
+        redis_client.xadd(MEDICINE_CHANGES_KEY, {"ids": ids}, maxlen=CHANGE_LOG_LENGTH, approximate=True)
+    except RedisError as e:
+        print(f"[MedicineCatalog] Failed to record medicine changes: {str(e)}")
+        with _lock:
+            _state["medicines"] = None
+    # Make this worker pick the change up on its next read
+    _state["checked_at"] = 0.0
+
+
+def get_catalog_medicines():
+    """{medicine_id: Medicine} of the current catalog"""
+    _sync()
+    return _state["medicines"]
+
+
+def catalog_lock():
+    """Lock held while the catalog and its listeners change; hold it to read listener state"""
+    _sync()
+    return _lock
@@ -0,0 +1,89 @@
+from app.models.medicine_model import Medicine
+from app.services.pagination_service import (
+    combine, encode_cursor, keyset_clause, ordering, range_condition, resolve_sort
+)
+
+# sort name -> (Medicine field, default direction); every one is backed by a
+# (field, _id) and a (category, field, _id) index on Medicine
+SORT_FIELDS = {
+    "price": ("price", 1),
+    "rating": ("rating", -1),
+    "popularity": ("reviews", -1),
+    "name": ("name", 1)
+}
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+# --- Helper Functions ---
+def build_filter(filters):
+    """MongoDB filter for the catalog filters (everything except the page cursor)"""
+    clauses = []
+    if filters.get("category"):
+        clauses.append({"category": filters["category"]})
+    if filters.get("in_stock") is not None:
+        clauses.append({"in_stock": filters["in_stock"]})
+    if filters.get("requires_prescription") is not None:
+        clauses.append({"requires_prescription": filters["requires_prescription"]})
+    price_range = range_condition(filters.get("min_price"), filters.get("max_price"))
+    if price_range:
+        clauses.append({"price": price_range})
+    if filters.get("min_rating") is not None:
+        clauses.append({"rating": range_condition(filters["min_rating"])})
+    return clauses
+
+
+def query_queryset(filters, sort="popularity", order=None, cursor=None):
+    field, direction = resolve_sort(SORT_FIELDS, sort, order)
+    clauses = build_filter(filters)
+    if cursor:
+        clauses.append(keyset_clause(field, direction, cursor))
+    return Medicine.objects(__raw__=combine(clauses)).order_by(*ordering(field, direction))
+
+
+def facet_counts(filters):
+    """Category, stock and prescription counts for the filtered catalog in one $facet aggregation"""
+    pipeline = []
+    clauses = build_filter(filters)
+    if clauses:
+        pipeline.append({"$match": combine(clauses)})
+    pipeline.append({"$facet": {
+        "categories": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}, {"$sort": {"_id": 1}}],
+        "in_stock": [{"$group": {"_id": "$in_stock", "count": {"$sum": 1}}}],
+        "prescription": [{"$group": {"_id": "$requires_prescription", "count": {"$sum": 1}}}],
+        "total": [{"$count": "count"}]
+    }})
+    result = next(Medicine.objects.aggregate(pipeline))
+
+    def flags(rows):
+        counts = {"true": 0, "false": 0}
+        for row in rows:
+            counts["true" if row["_id"] else "false"] += row["count"]
+        return counts
+
+    return {
+        "categories": {row["_id"]: row["count"] for row in result["categories"]},
+        "in_stock": flags(result["in_stock"]),
+        "prescription": flags(result["prescription"]),
+        "total": result["total"][0]["count"] if result["total"] else 0
+    }
+
+
+# --- Public API ---
+def find_medicines(filters, sort="popularity", order=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """One page of matching medicines, the next page's cursor and, on the first page, facet counts.
+
+    Facets only depend on the filters, so later pages of the same query skip them.
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    # Fetch one extra medicine to learn whether another page exists
+    medicines = list(query_queryset(filters, sort, order, cursor).limit(limit + 1))
+    next_cursor = None
+    if len(medicines) > limit:
+        medicines = medicines[:limit]
+        last = medicines[-1]
+        next_cursor = encode_cursor(getattr(last, SORT_FIELDS[sort][0]), last.pk)
+    facets = None if cursor else facet_counts(filters)
+    return medicines, next_cursor, facets
@@ -0,0 +1,198 @@
+import heapq
+import math
+import re
+from collections import Counter
+from app.services.medicine_catalog_service import catalog_lock, get_catalog_medicines, register_catalog_listener
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# A name match counts three times as much as the same match in the description
+FIELD_WEIGHTS = (("name", 3.0), ("description", 1.0))
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Typo tolerance: vocabulary terms whose trigram Jaccard similarity reaches this stand in for unknown terms
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_MAX_EXPANSIONS = 3
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 100
+
+
+# --- Helper Functions ---
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def _field_texts(medicine):
+    return tuple(getattr(medicine, field) or "" for field, _ in FIELD_WEIGHTS)
+
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MedicineSearchIndex:
+    """Inverted index over medicine names and descriptions with BM25 ranking.
+
+    Postings map term -> {medicine_id: (tf in name, tf in description)}. A trigram
+    index over the vocabulary finds close spellings for query terms that do not
+    occur in the catalog. Kept current through the medicine catalog listener hooks.
+
+    Each term's field-weighted BM25 contributions are computed on first use and
+    cached until a medicine containing the term is re-indexed or the catalog-wide
+    field-length averages move, so a query only adds up precomputed numbers.
+    """
+
+    def __init__(self):
+        self.reset([])
+
+    # --- catalog listener hooks ---
+    def reset(self, medicines):
+        self.postings = {}
+        self.trigram_terms = {}
+        self.documents = {}   # medicine_id -> (category, in_stock, field lengths, terms, field texts)
+        self.field_length_totals = [0] * len(FIELD_WEIGHTS)
+        self.impacts = {}     # term -> {medicine_id: BM25 contribution without idf}
+        for medicine in medicines:
+            self._add(medicine)
+
+    def apply(self, updated, removed_ids):
+        averages = self._averages()
+        touched = set()
+        for medicine_id in removed_ids:
+            touched.update(self._remove(medicine_id))
+        for medicine in updated:
+            document = self.documents.get(medicine.medicine_id)
+            if document is not None and document[4] == _field_texts(medicine):
+                # Stock and price updates from every checkout only refresh the filter fields
+                self.documents[medicine.medicine_id] = (medicine.category, medicine.in_stock) + document[2:]
+                continue
+            touched.update(self._remove(medicine.medicine_id))
+            touched.update(self._add(medicine))
+        if self._averages() != averages:
+            # Length normalization depends on catalog-wide averages, so every cached impact is stale
+            self.impacts = {}
+            return
+        for term in touched:
+            self.impacts.pop(term, None)
+
+    # --- maintenance ---
+    def _averages(self):
+        total = len(self.documents)
+        return [max(length / total, 1.0) for length in self.field_length_totals] if total else None
+
+    def _add(self, medicine):
+        counts = [Counter(tokenize(getattr(medicine, field))) for field, _ in FIELD_WEIGHTS]
+        lengths = tuple(sum(count.values()) for count in counts)
+        terms = set().union(*counts)
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                for gram in trigrams(term):
+                    self.trigram_terms.setdefault(gram, set()).add(term)
+            postings[medicine.medicine_id] = tuple(count[term] for count in counts)
+        for position, length in enumerate(lengths):
+            self.field_length_totals[position] += length
+        self.documents[medicine.medicine_id] = (
+            medicine.category, medicine.in_stock, lengths, terms, _field_texts(medicine)
+        )
+        return terms
+
+    def _remove(self, medicine_id):
+        document = self.documents.pop(medicine_id, None)
+        if document is None:
+            return ()
+        _, _, lengths, terms, _ = document
+        for position, length in enumerate(lengths):
+            self.field_length_totals[position] -= length
+        for term in terms:
+            postings = self.postings[term]
+            del postings[medicine_id]
+            if not postings:
+                del self.postings[term]
+                for gram in trigrams(term):
+                    self.trigram_terms[gram].discard(term)
+                    if not self.trigram_terms[gram]:
+                        del self.trigram_terms[gram]
+        return terms
+
+    # --- querying ---
+    def term_impacts(self, term):
+        impacts = self.impacts.get(term)
+        if impacts is None:
+            averages = self._averages()
+            weighted_fields = [
+                (position, field_weight, averages[position])
+                for position, (_, field_weight) in enumerate(FIELD_WEIGHTS)
+            ]
+            impacts = {}
+            for medicine_id, frequencies in self.postings[term].items():
+                lengths = self.documents[medicine_id][2]
+                impact = 0.0
+                for position, field_weight, average in weighted_fields:
+                    frequency = frequencies[position]
+                    if frequency:
+                        norm = 1 - BM25_B + BM25_B * lengths[position] / average
+                        impact += field_weight * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                impacts[medicine_id] = impact
+            self.impacts[term] = impacts
+        return impacts
+
+    def expand_term(self, term):
+        """[(vocabulary term, weight)] for a query term: itself if known, else close spellings"""
+        if term in self.postings:
+            return [(term, 1.0)]
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_terms.get(gram, ()))
+        matches = []
+        for candidate, common in shared.items():
+            similarity = common / (len(grams) + len(trigrams(candidate)) - common)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+        return heapq.nlargest(FUZZY_MAX_EXPANSIONS, matches, key=lambda match: match[1])
+
+    def search(self, query, category=None, in_stock=None, limit=DEFAULT_SEARCH_LIMIT):
+        """Top `limit` (medicine_id, score) pairs for a free-text query"""
+        total = len(self.documents)
+        if not total:
+            return []
+
+        scores = {}
+        for query_term in set(tokenize(query)):
+            for term, weight in self.expand_term(query_term):
+                impacts = self.term_impacts(term)
+                idf = math.log(1 + (total - len(impacts) + 0.5) / (len(impacts) + 0.5))
+                factor = weight * idf
+                if not scores:
+                    scores = {medicine_id: factor * impact for medicine_id, impact in impacts.items()}
+                    continue
+                get = scores.get
+                for medicine_id, impact in impacts.items():
+                    scores[medicine_id] = get(medicine_id, 0.0) + factor * impact
+
+        if category is not None or in_stock is not None:
+            scores = {
+                medicine_id: score for medicine_id, score in scores.items()
+                if (category is None or self.documents[medicine_id][0] == category)
+                and (in_stock is None or self.documents[medicine_id][1] == in_stock)
+            }
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+_index = MedicineSearchIndex()
+register_catalog_listener(_index)
+
+
+# --- Public API ---
+def search_catalog(query, category=None, in_stock=None, limit=DEFAULT_SEARCH_LIMIT):
+    """Ranked medicines matching `query`, as [(Medicine, score)]"""
+    if limit < 1 or limit > MAX_SEARCH_LIMIT:
+        raise ValueError(f"Limit must be between 1 and {MAX_SEARCH_LIMIT}")
+    with catalog_lock():
+        medicines = get_catalog_medicines()
+        return [
+            (medicines[medicine_id], score)
+            for medicine_id, score in _index.search(query, category, in_stock, limit)
+        ]
@@ -0,0 +1,64 @@
+import base64
+import json
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(value, document_pk):
+    """Opaque cursor pointing just after a document in the current sort order"""
+    raw = json.dumps([value, str(document_pk)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        value, document_pk = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return value, ObjectId(document_pk)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def range_condition(minimum=None, maximum=None):
+    condition = {}
+    if minimum is not None:
+        condition["$gte"] = minimum
+    if maximum is not None:
+        condition["$lte"] = maximum
+    return condition
+
+
+def resolve_sort(sort_fields, sort, order=None):
+    """(field, direction) for a sort name from {name: (field, default direction)}"""
+    if sort not in sort_fields:
+        raise ValueError(f"Invalid sort. Must be one of: {', '.join(sort_fields)}")
+    field, direction = sort_fields[sort]
+    if order is not None:
+        if order not in ("asc", "desc"):
+            raise ValueError("Invalid order. Must be 'asc' or 'desc'")
+        direction = 1 if order == "asc" else -1
+    return field, direction
+
+
+def keyset_clause(field, direction, cursor):
+    """Filter for documents after `cursor` when sorting on (field, _id) in `direction`.
+
+    Ties on the sort field are broken on _id, so pages never skip or repeat a document.
+    """
+    value, document_pk = decode_cursor(cursor)
+    beyond = "$gt" if direction == 1 else "$lt"
+    return {"$or": [
+        {field: {beyond: value}},
+        {field: value, "_id": {beyond: document_pk}}
+    ]}
+
+
+def ordering(field, direction):
+    """mongoengine order_by() arguments for a (field, _id) keyset sort"""
+    prefix = "" if direction == 1 else "-"
+    return [f"{prefix}{field}", f"{prefix}id"]
+
+
+def combine(clauses):
+    if len(clauses) > 1:
+        return {"$and": clauses}
+    return clauses[0] if clauses else {}
@@ -0,0 +1,55 @@
+from app.models.medicine_model import Medicine
+from app.services.medicine_catalog_service import catalog_lock, get_catalog_medicines
+
+FREE_DELIVERY_THRESHOLD = 4000
+DELIVERY_CHARGE = 50
+DETAIL_FIELDS = ("name", "price", "image", "description", "requires_prescription")
+
+
+# --- Helper Functions ---
+def line_details(medicine):
+    """Cart/order line fields taken from the catalog"""
+    return {
+        "name": medicine.name,
+        "price": medicine.price,
+        "image": medicine.image,
+        "description": medicine.description,
+        "requires_prescription": medicine.requires_prescription
+    }
+
+
+# --- Public API ---
+def catalog_details(medicine_ids):
+    """{medicine_id: line details} from the in-process catalog snapshot; unknown ids are left out.
+
+    The snapshot follows the medicine change stream, so it can trail MongoDB by
+    about a second. Good enough to price a cart; orders use database_details.
+    """
+    with catalog_lock():
+        medicines = get_catalog_medicines()
+        return {
+            medicine_id: line_details(medicines[medicine_id])
+            for medicine_id in set(medicine_ids) if medicine_id in medicines
+        }
+
+
+def database_details(medicine_ids):
+    """{medicine_id: line details} read from MongoDB with one $in query"""
+    medicines = Medicine.objects(medicine_id__in=list(set(medicine_ids))).only("medicine_id", *DETAIL_FIELDS)
+    return {medicine.medicine_id: line_details(medicine) for medicine in medicines}
+
+
+def reprice(lines):
+    """Cart lines with name, price, image... refreshed from the catalog snapshot.
+
+    Lines whose medicine left the catalog keep the details they were added with.
+    """
+    details = catalog_details(line["medicine_id"] for line in lines)
+    return [dict(line, **details.get(line["medicine_id"], {})) for line in lines]
+
+
+def order_totals(lines):
+    """(subtotal, delivery charges, total) for priced lines"""
+    subtotal = sum(line["price"] * line["quantity"] for line in lines)
+    delivery_charges = 0 if subtotal >= FREE_DELIVERY_THRESHOLD else DELIVERY_CHARGE
+    return subtotal, delivery_charges, subtotal + delivery_charges
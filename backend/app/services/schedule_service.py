@@ -0,0 +1,223 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from app.models.doctor_model import Doctor
+from app.services.doctor_catalog_service import bump_catalog_version
+from app.models.doctor_schedule_model import (
+    DEFAULT_SLOT_MINUTES, SLOT_GRANULARITY_MINUTES, WEEKDAYS,
+    DoctorSchedule, WorkingHours, ScheduleBreak, ScheduleException, covered_minutes
+)
+
+# Used for doctors without a DoctorSchedule: 9 AM to 5 PM in 30-minute slots
+DEFAULT_START_MINUTE = 9 * 60
+DEFAULT_END_MINUTE = 17 * 60
+
+# slots: display strings in time order; starts: {display string: start minute};
+# length: minutes every slot of the template lasts
+SlotTemplate = namedtuple("SlotTemplate", ["slots", "starts", "length"])
+EMPTY_TEMPLATE = SlotTemplate((), {}, 0)
+
+# doctor pk -> (cache key, CompiledSchedule)
+_compiled_schedules = {}
+_compiled_lock = threading.Lock()
+
+
+class CompiledSchedule:
+    """Precomputed slot templates of one doctor, shared by every availability read"""
+
+    __slots__ = ("weekly", "exceptions")
+
+    def __init__(self, weekly, exceptions):
+        self.weekly = weekly          # {"Monday": SlotTemplate, ...}
+        self.exceptions = exceptions  # {date: SlotTemplate}
+
+    def slots_for(self, day):
+        """Slot template for a date, honouring leave, holidays and custom hours"""
+        template = self.exceptions.get(day.date())
+        if template is None:
+            template = self.weekly.get(day.strftime("%A"), EMPTY_TEMPLATE)
+        return template
+
+    def works_on_weekday(self, day):
+        return bool(self.weekly.get(day.strftime("%A")))
+
+
+# --- Helper Functions ---
+def format_slot(minute):
+    """Minutes after midnight to the display format used by appointments ("01:30 PM")"""
+    hour, minute = divmod(minute, 60)
+    return f"{(hour % 12) or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def parse_clock(value):
+    """24h "HH:MM" to minutes after midnight"""
+    try:
+        parsed = datetime.strptime(value.strip(), "%H:%M")
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time '{value}'. Use HH:MM (24-hour)")
+    return parsed.hour * 60 + parsed.minute
+
+
+@lru_cache(maxsize=1024)
+def build_template(intervals, breaks, slot_minutes):
+    """Slot template for working intervals minus breaks.
+
+    Cached on its arguments, so doctors with identical hours share one template.
+    """
+    starts = {}
+    for start, end in sorted(intervals):
+        minute = start
+        while minute + slot_minutes <= end:
+            slot_end = minute + slot_minutes
+            if not any(minute < break_end and slot_end > break_start for break_start, break_end in breaks):
+                starts[format_slot(minute)] = minute
+            minute += slot_minutes
+    return SlotTemplate(tuple(starts), starts, slot_minutes)
+
+
+def compile_schedule(doctor, schedule=None):
+    """Compile a doctor's schedule (or the default one) into per-weekday templates"""
+    if schedule is None:
+        template = build_template(((DEFAULT_START_MINUTE, DEFAULT_END_MINUTE),), (), DEFAULT_SLOT_MINUTES)
+        return CompiledSchedule({day: template for day in (doctor.availability or [])}, {})
+
+    intervals_by_day = {}
+    for hours in schedule.working_hours:
+        intervals_by_day.setdefault(hours.day, []).append((parse_clock(hours.start), parse_clock(hours.end)))
+
+    def breaks_for(day):
+        return tuple(sorted(
+            (parse_clock(brk.start), parse_clock(brk.end))
+            for brk in schedule.breaks if not brk.day or brk.day == day
+        ))
+
+    weekly = {
+        day: build_template(tuple(intervals), breaks_for(day), schedule.slot_minutes)
+        for day, intervals in intervals_by_day.items()
+    }
+
+    exceptions = {}
+    for exception in schedule.exceptions:
+        if exception.start and exception.end:
+            day = exception.date.strftime("%A")
+            interval = ((parse_clock(exception.start), parse_clock(exception.end)),)
+            exceptions[exception.date.date()] = build_template(interval, breaks_for(day), schedule.slot_minutes)
+        else:
+            exceptions[exception.date.date()] = EMPTY_TEMPLATE
+    return CompiledSchedule(weekly, exceptions)
+
+
+def _cache_key(doctor):
+    # Doctors without a schedule compile from their weekday list, so it is part of the key
+    return (doctor.schedule_version or 0, tuple(doctor.availability or []))
+
+
+# --- Public API ---
+def get_compiled_schedules(doctors):
+    """Compiled schedules for many doctors; at most one query for all cache misses"""
+    compiled = {}
+    stale = []
+    for doctor in doctors:
+        cached = _compiled_schedules.get(doctor.pk)
+        if cached and cached[0] == _cache_key(doctor):
+            compiled[doctor.pk] = cached[1]
+        else:
+            stale.append(doctor)
+
+    if stale:
+        with_schedule = [doctor.doctor_id for doctor in stale if doctor.schedule_version]
+        schedules = {
+            schedule.doctor_id: schedule
+            for schedule in DoctorSchedule.objects(doctor_id__in=with_schedule)
+        } if with_schedule else {}
+        with _compiled_lock:
+            for doctor in stale:
+                schedule = compile_schedule(doctor, schedules.get(doctor.doctor_id))
+                _compiled_schedules[doctor.pk] = (_cache_key(doctor), schedule)
+                compiled[doctor.pk] = schedule
+    return compiled
+
+
+def get_compiled_schedule(doctor):
+    return get_compiled_schedules([doctor])[doctor.pk]
+
+
+def validate_schedule_data(data):
+    """Build an unsaved DoctorSchedule from request data; raises ValueError when invalid"""
+    if not isinstance(data, dict):
+        raise ValueError("Schedule must be a JSON object")
+    slot_minutes = data.get("slot_minutes", DEFAULT_SLOT_MINUTES)
+    if not isinstance(slot_minutes, int) or isinstance(slot_minutes, bool) or slot_minutes < 5 \
+            or slot_minutes > 240 or slot_minutes % SLOT_GRANULARITY_MINUTES:
+        raise ValueError(f"slot_minutes must be a multiple of {SLOT_GRANULARITY_MINUTES} between 5 and 240")
+
+    def items(field):
+        value = data.get(field, [])
+        if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+            raise ValueError(f"{field} must be a list of objects")
+        return value
+
+    def interval(item, label):
+        start, end = parse_clock(item.get("start")), parse_clock(item.get("end"))
+        if start >= end:
+            raise ValueError(f"{label} must end after it starts")
+        if start % SLOT_GRANULARITY_MINUTES:
+            raise ValueError(f"{label} must start on a multiple of {SLOT_GRANULARITY_MINUTES} minutes")
+        return item["start"], item["end"]
+
+    def weekday(item, required):
+        day = item.get("day")
+        if (required or day) and day not in WEEKDAYS:
+            raise ValueError(f"Invalid day '{day}'. Must be one of: {', '.join(WEEKDAYS)}")
+        return day or None
+
+    working_hours = []
+    for item in items("working_hours"):
+        start, end = interval(item, "Working hours")
+        working_hours.append(WorkingHours(day=weekday(item, True), start=start, end=end))
+
+    breaks = []
+    for item in items("breaks"):
+        start, end = interval(item, "Break")
+        breaks.append(ScheduleBreak(day=weekday(item, False), start=start, end=end))
+
+    exceptions = []
+    for item in items("exceptions"):
+        try:
+            date = datetime.strptime(item.get("date", ""), "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ValueError("Invalid exception date format. Use YYYY-MM-DD")
+        reason = item.get("reason", "")
+        if not isinstance(reason, str):
+            raise ValueError("Exception reason must be a string")
+        start = end = None
+        if item.get("start") or item.get("end"):
+            start, end = interval(item, "Exception hours")
+        exceptions.append(ScheduleException(date=date, reason=reason, start=start, end=end))
+
+    return DoctorSchedule(
+        slot_minutes=slot_minutes,
+        working_hours=working_hours,
+        breaks=breaks,
+        exceptions=exceptions
+    )
+
+
+def save_doctor_schedule(doctor, data):
+    """Validate and store a doctor's schedule, then bump the doctor's schedule version"""
+    new_schedule = validate_schedule_data(data)
+    schedule = DoctorSchedule.objects(doctor_id=doctor.doctor_id).first() or DoctorSchedule(doctor_id=doctor.doctor_id)
+    schedule.slot_minutes = new_schedule.slot_minutes
+    schedule.working_hours = new_schedule.working_hours
+    schedule.breaks = new_schedule.breaks
+    schedule.exceptions = new_schedule.exceptions
+    schedule.updated_at = datetime.utcnow()
+    schedule.save()
+
+    # Keep the weekday list shown on doctor cards in line with the working hours
+    working_days = [day for day in WEEKDAYS if any(hours.day == day for hours in schedule.working_hours)]
+    Doctor.objects(pk=doctor.pk).update_one(inc__schedule_version=1, set__availability=working_days)
+    doctor.reload("schedule_version", "availability")
+    bump_catalog_version()
+    return schedule
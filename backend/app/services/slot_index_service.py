@@ -0,0 +1,216 @@
+import uuid
+from datetime import timedelta
+from redis import RedisError
+from app.models.appointments_models import Appointment, booked_minutes
+from app.services.redis_service import redis_client
+from app.services.schedule_service import SLOT_GRANULARITY_MINUTES, covered_minutes, get_compiled_schedule
+
+# Statuses that keep a time slot occupied
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+# Bit 0 of every bitmap marks it as built from MongoDB; the step starting at minute m
+# lives at bit m // SLOT_GRANULARITY_MINUTES + 1 and is set while any active
+# appointment covers it, so bitmaps do not depend on any doctor's slot template.
+# A key that only ever received write-path SETBITs still reads as missing and
+# gets rebuilt on the next lookup.
+# Every write bumps a per-(doctor, date) generation counter before touching the
+# bitmap, so a rebuild can tell that its MongoDB read went stale before it lands.
+BUILT_FLAG_OFFSET = 0
+BITMAP_WIDTH = 24 * 60 // SLOT_GRANULARITY_MINUTES + 1
+# BITFIELD reads at most 63 unsigned bits per field
+BITFIELD_CHUNK = 63
+SLOT_INDEX_TTL_SECONDS = 24 * 60 * 60
+
+
+# --- Helper Functions ---
+def slot_index_key(doctor_pk, appointment_date):
+    return f"slot_occupancy:{doctor_pk}:{appointment_date.strftime('%Y-%m-%d')}"
+
+
+def slot_generation_key(doctor_pk, appointment_date):
+    return f"{slot_index_key(doctor_pk, appointment_date)}:generation"
+
+
+def _minute_offset(start_minute):
+    return None if start_minute is None else start_minute // SLOT_GRANULARITY_MINUTES + 1
+
+
+def _is_set(bitmap, offset):
+    return (bitmap >> (BITMAP_WIDTH - 1 - offset)) & 1
+
+
+def _doctor_pk(appointment):
+    """Doctor ObjectId of an appointment without dereferencing the reference"""
+    return appointment.to_mongo().get("doctor")
+
+
+def _read_bitmap(key):
+    """Read the whole bitmap in one BITFIELD call; returns an int or None if missing"""
+    chunks = [
+        (offset, min(BITFIELD_CHUNK, BITMAP_WIDTH - offset))
+        for offset in range(0, BITMAP_WIDTH, BITFIELD_CHUNK)
+    ]
+    command = redis_client.bitfield(key)
+    for offset, width in chunks:
+        command.get(f"u{width}", offset)
+
+    value = 0
+    for (_, width), chunk in zip(chunks, command.execute()):
+        value = (value << width) | chunk
+    if not _is_set(value, BUILT_FLAG_OFFSET):
+        return None
+    return value
+
+
+def _booked_minutes(doctor, appointment_date):
+    """Every minute step occupied by the doctor's active appointments on a date"""
+    booked = set()
+    for start_minute, end_minute, appointment_time in Appointment.objects(
+        doctor=doctor,
+        appointment_date=appointment_date,
+        status__in=ACTIVE_STATUSES
+    ).scalar("start_minute", "end_minute", "appointment_time"):
+        booked.update(booked_minutes(start_minute, end_minute, appointment_time))
+    return booked
+
+
+def _rebuild_bitmap(doctor, appointment_date):
+    """Rebuild a (doctor, date) bitmap from MongoDB and swap it into Redis.
+
+    The bitmap is written under a temporary key and RENAMEd over the live one, so
+    bits of cancelled appointments do not survive the rebuild. The swap is skipped
+    when the generation moved while MongoDB was read: a booking or cancellation
+    made meanwhile has already been applied to the live key and the snapshot
+    could undo it, so the next lookup rebuilds again.
+    """
+    key = slot_index_key(doctor.pk, appointment_date)
+    generation_key = slot_generation_key(doctor.pk, appointment_date)
+    generation = redis_client.get(generation_key)
+
+    offsets = [BUILT_FLAG_OFFSET]
+    offsets.extend(
+        offset for offset in map(_minute_offset, _booked_minutes(doctor, appointment_date))
+        if offset is not None
+    )
+    staging_key = f"{key}:rebuild:{uuid.uuid4().hex}"
+
+    def swap(pipe):
+        if pipe.get(generation_key) != generation:
+            return
+        pipe.multi()
+        for offset in offsets:
+            pipe.setbit(staging_key, offset, 1)
+        pipe.rename(staging_key, key)
+        pipe.expire(key, SLOT_INDEX_TTL_SECONDS)
+
+    redis_client.transaction(swap, generation_key)
+
+    value = 0
+    for offset in offsets:
+        value |= 1 << (BITMAP_WIDTH - 1 - offset)
+    return value
+
+
+def _set_slot(doctor_pk, appointment, occupied):
+    minutes = booked_minutes(appointment.start_minute, appointment.end_minute, appointment.appointment_time)
+    if not minutes:
+        return
+    key = slot_index_key(doctor_pk, appointment.appointment_date)
+    generation_key = slot_generation_key(doctor_pk, appointment.appointment_date)
+    try:
+        pipe = redis_client.pipeline()
+        # Bump the generation first so a rebuild reading MongoDB concurrently discards its snapshot
+        pipe.incr(generation_key)
+        pipe.expire(generation_key, SLOT_INDEX_TTL_SECONDS)
+        for minute in minutes:
+            pipe.setbit(key, _minute_offset(minute), 1 if occupied else 0)
+        pipe.execute()
+    except RedisError as e:
+        # Drop the bitmap so the next lookup rebuilds it from MongoDB
+        print(f"[SlotIndex] Failed to update slot bitmap: {str(e)}")
+        invalidate_slot_index(doctor_pk, appointment.appointment_date)
+
+
+# --- Public API ---
+def slot_is_free(template, slot, booked):
+    """Whether none of the minute steps `slot` covers is in `booked`"""
+    start_minute = template.starts[slot]
+    return not any(minute in booked for minute in covered_minutes(start_minute, start_minute + template.length))
+
+
+def invalidate_slot_index(doctor_pk, appointment_date):
+    try:
+        pipe = redis_client.pipeline()
+        pipe.incr(slot_generation_key(doctor_pk, appointment_date))
+        pipe.expire(slot_generation_key(doctor_pk, appointment_date), SLOT_INDEX_TTL_SECONDS)
+        pipe.delete(slot_index_key(doctor_pk, appointment_date))
+        pipe.execute()
+    except RedisError as e:
+        print(f"[SlotIndex] Failed to invalidate slot bitmap: {str(e)}")
+
+
+def mark_slot_booked(appointment):
+    _set_slot(_doctor_pk(appointment), appointment, True)
+
+
+def sync_slot_status(appointment, previous_status):
+    """Keep the bitmap in step with a status change on an existing appointment"""
+    was_active = previous_status in ACTIVE_STATUSES
+    is_active = appointment.status in ACTIVE_STATUSES
+    if was_active != is_active:
+        _set_slot(_doctor_pk(appointment), appointment, is_active)
+
+
+def get_free_slots(doctor, appointment_date, template=None):
+    """Return the free slots of a doctor on a date with a single Redis lookup"""
+    if template is None:
+        template = get_compiled_schedule(doctor).slots_for(appointment_date)
+    if not template.slots:
+        return []
+
+    try:
+        bitmap = _read_bitmap(slot_index_key(doctor.pk, appointment_date))
+        if bitmap is None:
+            bitmap = _rebuild_bitmap(doctor, appointment_date)
+    except RedisError as e:
+        print(f"[SlotIndex] Redis unavailable, reading slots from MongoDB: {str(e)}")
+        booked = _booked_minutes(doctor, appointment_date)
+        return [slot for slot in template.slots if slot_is_free(template, slot, booked)]
+
+    return [
+        slot for slot in template.slots
+        if not any(
+            _is_set(bitmap, _minute_offset(minute))
+            for minute in covered_minutes(template.starts[slot], template.starts[slot] + template.length)
+        )
+    ]
+
+
+def get_free_slots_in_range(doctor, start_date, days):
+    """Free slots per day for `days` days from `start_date` with one range query.
+
+    Days the doctor does not work (weekday off, leave, holiday) map to None.
+    """
+    schedule = get_compiled_schedule(doctor)
+    end_date = start_date + timedelta(days=days)
+    booked = {}
+    for appointment_date, start_minute, end_minute, appointment_time in Appointment.objects(
+        doctor=doctor,
+        appointment_date__gte=start_date,
+        appointment_date__lt=end_date,
+        status__in=ACTIVE_STATUSES
+    ).scalar("appointment_date", "start_minute", "end_minute", "appointment_time"):
+        booked.setdefault(appointment_date.date(), set()).update(
+            booked_minutes(start_minute, end_minute, appointment_time)
+        )
+
+    calendar = {}
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        template = schedule.slots_for(day)
+        if not template.slots:
+            calendar[day.strftime("%Y-%m-%d")] = None
+            continue
+        taken = booked.get(day.date(), ())
+        calendar[day.strftime("%Y-%m-%d")] = [slot for slot in template.slots if slot_is_free(template, slot, taken)]
+    return calendar
@@ -0,0 +1,76 @@
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from app.models.appointments_models import Appointment, booked_minutes
+from app.models.doctor_model import Doctor
+from app.services.schedule_service import get_compiled_schedules
+from app.services.slot_index_service import ACTIVE_STATUSES, slot_is_free
+
+
+# --- Helper Functions ---
+def _iter_free_slots(doctor_rank, schedule, booked, start_date, days, not_before):
+    """Yield (starts_at, doctor_rank, slot) for every free slot of one doctor, in time order"""
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        template = schedule.slots_for(day)
+        taken = booked.get(day.date(), ())
+        for slot in template.slots:
+            if not slot_is_free(template, slot, taken):
+                continue
+            starts_at = day + timedelta(minutes=template.starts[slot])
+            if starts_at >= not_before:
+                yield starts_at, doctor_rank, slot
+
+
+def earliest_free_slots(doctors, schedules, booked_by_doctor, start_date, days, limit, not_before=None):
+    """K-way merge of every doctor's free-slot stream, returning the `limit` earliest.
+
+    `doctors` is ordered by preference; ties on start time go to the earlier doctor.
+    `schedules` maps doctor pk -> CompiledSchedule and `booked_by_doctor` maps
+    doctor pk -> {date: set of occupied minute steps}.
+    Each stream is lazy, so the merge only walks as far as the answer needs.
+    """
+    not_before = not_before or start_date
+    streams = [
+        _iter_free_slots(rank, schedules[doctor.pk], booked_by_doctor.get(doctor.pk, {}), start_date, days, not_before)
+        for rank, doctor in enumerate(doctors)
+    ]
+    return [
+        (doctors[rank], starts_at, slot)
+        for starts_at, rank, slot in islice(heapq.merge(*streams), limit)
+    ]
+
+
+def load_booked_slots(doctor_pks, start_date, days):
+    """Occupancy of many doctors over a date window from one bulk query"""
+    booked = {}
+    for row in Appointment.objects(
+        doctor__in=doctor_pks,
+        appointment_date__gte=start_date,
+        appointment_date__lt=start_date + timedelta(days=days),
+        status__in=ACTIVE_STATUSES
+    ).only("doctor", "appointment_date", "start_minute", "end_minute", "appointment_time").as_pymongo():
+        booked.setdefault(row["doctor"], {}).setdefault(row["appointment_date"].date(), set()).update(
+            booked_minutes(row.get("start_minute"), row.get("end_minute"), row.get("appointment_time"))
+        )
+    return booked
+
+
+# --- Public API ---
+def find_next_available(specialty, limit=5, days=30, max_fee=None, min_rating=None):
+    """Earliest free slots across all active doctors of a specialty"""
+    filters = {"specialty": specialty, "is_active": True}
+    if max_fee is not None:
+        filters["consultation_fee__lte"] = max_fee
+    if min_rating is not None:
+        filters["rating__gte"] = min_rating
+
+    doctors = list(Doctor.objects(**filters).order_by("-rating"))
+    if not doctors:
+        return []
+
+    now = datetime.now()
+    start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    schedules = get_compiled_schedules(doctors)
+    booked = load_booked_slots([doctor.pk for doctor in doctors], start_date, days)
+    return earliest_free_slots(doctors, schedules, booked, start_date, days, limit, not_before=now)
@@ -0,0 +1,97 @@
+import json
+from redis import RedisError
+from app.models.doctor_model import Doctor
+from app.services.redis_service import redis_client
+
+# specialty -> JSON facet; one hash so the whole index is read with a single HGETALL
+SPECIALTY_FACETS_KEY = "doctor_specialty_facets"
+
+
+# --- Helper Functions ---
+def _aggregate_facets(specialties=None):
+    """Per-specialty counts and ranges computed by MongoDB; optionally limited to some specialties"""
+    pipeline = []
+    if specialties is not None:
+        pipeline.append({"$match": {"specialty": {"$in": list(specialties)}}})
+    pipeline.append({"$group": {
+        "_id": "$specialty",
+        "total": {"$sum": 1},
+        # Doctors saved before is_active existed count as active, like the model default
+        "active": {"$sum": {"$cond": [{"$eq": ["$is_active", False]}, 0, 1]}},
+        "min_fee": {"$min": "$consultation_fee"},
+        "max_fee": {"$max": "$consultation_fee"},
+        "min_rating": {"$min": "$rating"},
+        "max_rating": {"$max": "$rating"}
+    }})
+    return {
+        row["_id"]: {
+            "specialty": row["_id"],
+            "total": row["total"],
+            "active": row["active"],
+            "fee_range": {"min": row["min_fee"], "max": row["max_fee"]},
+            "rating_range": {"min": row["min_rating"], "max": row["max_rating"]}
+        }
+        for row in Doctor.objects.aggregate(pipeline)
+        if row["_id"]
+    }
+
+
+def _sorted_facets(facets):
+    return [facets[specialty] for specialty in sorted(facets)]
+
+
+# --- Public API ---
+def rebuild_specialty_facets():
+    """Recompute every specialty facet; used on a cold cache and after seeding"""
+    facets = _aggregate_facets()
+    try:
+        pipe = redis_client.pipeline()
+        pipe.delete(SPECIALTY_FACETS_KEY)
+        if facets:
+            pipe.hset(SPECIALTY_FACETS_KEY, mapping={
+                specialty: json.dumps(facet) for specialty, facet in facets.items()
+            })
+        pipe.execute()
+    except RedisError as e:
+        print(f"[SpecialtyFacets] Failed to store specialty facets: {str(e)}")
+    return _sorted_facets(facets)
+
+
+def refresh_specialty_facets(*specialties):
+    """Recompute only the given specialties after a doctor is created, edited or toggled.
+
+    Pass both the old and the new specialty when a doctor changes specialty.
+    """
+    specialties = {specialty for specialty in specialties if specialty}
+    if not specialties:
+        return
+    facets = _aggregate_facets(specialties)
+    try:
+        pipe = redis_client.pipeline()
+        if facets:
+            pipe.hset(SPECIALTY_FACETS_KEY, mapping={
+                specialty: json.dumps(facet) for specialty, facet in facets.items()
+            })
+        emptied = specialties.difference(facets)
+        if emptied:
+            pipe.hdel(SPECIALTY_FACETS_KEY, *emptied)
+        pipe.execute()
+    except RedisError as e:
+        # A stale facet would never heal on its own, so drop the index and rebuild on next read
+        print(f"[SpecialtyFacets] Failed to refresh specialty facets: {str(e)}")
+        try:
+            redis_client.delete(SPECIALTY_FACETS_KEY)
+        except RedisError:
+            pass
+
+
+def get_specialty_facets():
+    """Facets for every specialty, sorted by name"""
+    try:
+        cached = redis_client.hgetall(SPECIALTY_FACETS_KEY)
+    except RedisError as e:
+        print(f"[SpecialtyFacets] Redis unavailable, aggregating facets: {str(e)}")
+        return _sorted_facets(_aggregate_facets())
+    if not cached:
+        return rebuild_specialty_facets()
+    return _sorted_facets({specialty: json.loads(facet) for specialty, facet in cached.items()})
@@ -0,0 +1,179 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from app.services.doctor_catalog_service import get_catalog_doctors
+from app.services.medicine_catalog_service import catalog_lock, get_catalog_medicines, register_catalog_listener
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Leading titles that users rarely type ("Dr. Sarah Johnson" is found by "sarah")
+IGNORED_TITLES = {"dr"}
+# Prefixes matching more keys than this get their top completions precomputed
+RANGE_SCAN_LIMIT = 256
+MAX_COMPLETIONS = 10
+SUGGESTION_TYPES = ("medicines", "doctors", "specialties")
+
+
+# --- Helper Functions ---
+def normalize(text):
+    return " ".join(WORD_PATTERN.findall((text or "").lower()))
+
+
+class PrefixIndex:
+    """Sorted array of search keys answered with binary search.
+
+    Every entry is indexed under each of its word starts, so "johnson" finds
+    "Dr. Sarah Johnson". Entries are (popularity, text, id) tuples. Prefixes
+    that match a wide range of keys have their top completions precomputed,
+    built bottom-up from the next character's ranges; narrower ranges are
+    scanned at query time.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = []
+        for position, (_, text, _) in enumerate(entries):
+            words = normalize(text).split()
+            while words and words[0] in IGNORED_TITLES:
+                words = words[1:]
+            for start in range(len(words)):
+                pairs.append((" ".join(words[start:]), position))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.positions = [position for _, position in pairs]
+        self.precomputed = {}
+        self._precompute("", 0, len(self.keys))
+
+    def _best(self, positions, limit):
+        return heapq.nsmallest(
+            limit, set(positions),
+            key=lambda position: (-self.entries[position][0], self.entries[position][1])
+        )
+
+    def _precompute(self, prefix, low, high):
+        """Top completions of keys[low:high], which all start with `prefix`"""
+        if high - low <= RANGE_SCAN_LIMIT:
+            return self._best(self.positions[low:high], MAX_COMPLETIONS)
+        depth = len(prefix)
+        candidates = []
+        position = low
+        # A key equal to the prefix sorts before all longer keys
+        while position < high and len(self.keys[position]) == depth:
+            candidates.append(self.positions[position])
+            position += 1
+        while position < high:
+            child = self.keys[position][:depth + 1]
+            end = bisect_left(self.keys, child + "\uffff", position, high)
+            candidates.extend(self._precompute(child, position, end))
+            position = end
+        top = self._best(candidates, MAX_COMPLETIONS)
+        self.precomputed[prefix] = top
+        return top
+
+    def complete(self, prefix, limit):
+        """Top `limit` entries by popularity whose words start with `prefix`"""
+        if not prefix:
+            return []
+        positions = self.precomputed.get(prefix)
+        if positions is None:
+            low = bisect_left(self.keys, prefix)
+            high = bisect_left(self.keys, prefix + "\uffff", low)
+            positions = self._best(self.positions[low:high], limit)
+        return [self.entries[position] for position in positions[:limit]]
+
+
+def _medicine_entry(medicine):
+    # Reviews are the best popularity signal the catalog has for medicines
+    return (medicine.reviews or 0, medicine.name)
+
+
+class _MedicineEntries:
+    """Catalog listener keeping the (reviews, name) of every medicine.
+
+    Only a change to those fields marks the index stale; the stock updates
+    every checkout records leave them alone and so never cost a rebuild.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.changed = True
+
+    def reset(self, medicines):
+        entries = {medicine.medicine_id: _medicine_entry(medicine) for medicine in medicines}
+        if entries != self.entries:
+            self.entries = entries
+            self.changed = True
+
+    def apply(self, updated, removed_ids):
+        for medicine in updated:
+            entry = _medicine_entry(medicine)
+            if self.entries.get(medicine.medicine_id) != entry:
+                self.entries[medicine.medicine_id] = entry
+                self.changed = True
+        for medicine_id in removed_ids:
+            if self.entries.pop(medicine_id, None) is not None:
+                self.changed = True
+
+
+_medicine_entries = _MedicineEntries()
+register_catalog_listener(_medicine_entries)
+
+_lock = threading.Lock()
+_indexes = {"doctors_source": None, "medicines": None, "doctors": None, "specialties": None}
+
+
+def _build_medicine_index():
+    # Listener state only changes under the catalog lock
+    with catalog_lock():
+        entries = [(reviews, name, medicine_id) for medicine_id, (reviews, name) in _medicine_entries.entries.items()]
+        _medicine_entries.changed = False
+    return PrefixIndex(entries)
+
+
+def _build_doctor_indexes(doctors):
+    doctor_index = PrefixIndex([
+        (doctor.rating or 0, doctor.name, doctor.doctor_id)
+        for doctor in doctors if doctor.is_active
+    ])
+    # A specialty is as popular as it has doctors
+    specialty_counts = Counter(doctor.specialty for doctor in doctors if doctor.specialty)
+    specialty_index = PrefixIndex([(count, specialty, specialty) for specialty, count in specialty_counts.items()])
+    return doctor_index, specialty_index
+
+
+def _current_indexes():
+    """Prefix indexes for the current catalogs, rebuilt when either catalog version changes"""
+    doctors = get_catalog_doctors()
+    # Reading the medicine catalog picks up pending changes, which may flip the listener flag
+    get_catalog_medicines()
+    # The doctor catalog hands out a new list after every version bump
+    doctors_changed = doctors is not _indexes["doctors_source"]
+    if doctors_changed or _medicine_entries.changed:
+        with _lock:
+            if doctors is not _indexes["doctors_source"]:
+                _indexes["doctors"], _indexes["specialties"] = _build_doctor_indexes(doctors)
+                _indexes["doctors_source"] = doctors
+            if _medicine_entries.changed:
+                _indexes["medicines"] = _build_medicine_index()
+    return _indexes
+
+
+# --- Public API ---
+def complete(query, limit=5, types=SUGGESTION_TYPES):
+    """Top completions per suggestion type for a typed prefix"""
+    if limit < 1 or limit > MAX_COMPLETIONS:
+        raise ValueError(f"Limit must be between 1 and {MAX_COMPLETIONS}")
+    unknown = set(types).difference(SUGGESTION_TYPES)
+    if unknown:
+        raise ValueError(f"Invalid type '{sorted(unknown)[0]}'. Must be one of: {', '.join(SUGGESTION_TYPES)}")
+
+    prefix = normalize(query)
+    indexes = _current_indexes()
+    return {
+        suggestion_type: [
+            {"id": entry_id, "text": text}
+            for _, text, entry_id in indexes[suggestion_type].complete(prefix, limit)
+        ]
+        for suggestion_type in types
+    }
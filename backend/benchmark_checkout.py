@@ -0,0 +1,123 @@
+"""
+Latency benchmark for the full checkout path.
+
+Each simulated user fills a cart and places an order through create_order:
+catalog lookup, stock reservation, order insert and cart clear. The same
+request is then retried with its idempotency key, as a client would after a
+timeout, to show that replays are cheap and never create a second order.
+Reports whether placement ran as a multi-document transaction (replica set)
+or with compensation (standalone server).
+
+Needs running MongoDB and Redis. Creates temporary medicines, carts and
+orders and removes them afterwards.
+
+Usage: python benchmark_checkout.py [--checkouts 500] [--lines 3] [--workers 32]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from mongoengine import connect
+from app.config import Config
+from app.controllers.cart_controller import add_to_cart
+from app.controllers.order_controller import create_order
+from app.models.cart_model import Cart
+from app.models.medicine_model import Medicine
+from app.models.order_model import Order
+from app.services import cart_store_service as cart_store
+from app.services.checkout_service import supports_transactions
+from app.services.medicine_catalog_service import record_medicine_changes
+
+SKU_PREFIX = "bench-checkout-sku-"
+USER_PREFIX = "bench-checkout-user-"
+ADDRESS = {
+    "full_name": "Benchmark User", "phone": "9999999999", "address_line1": "1 Test Street",
+    "city": "Pune", "state": "Maharashtra", "pincode": "411001"
+}
+
+# Connect to MongoDB
+connect(host=Config.MONGO_URI)
+
+
+def create_medicines(lines, stock):
+    medicine_ids = [f"{SKU_PREFIX}{index}" for index in range(lines)]
+    Medicine.objects(medicine_id__in=medicine_ids).delete()
+    for medicine_id in medicine_ids:
+        Medicine(
+            medicine_id=medicine_id, name=medicine_id, category="benchmark", price=100,
+            description="Checkout benchmark", image="", stock=stock
+        ).save()
+    record_medicine_changes(medicine_ids)
+    return medicine_ids
+
+
+def cleanup(user_ids):
+    for user_id in user_ids:
+        cart_store.clear(user_id)
+    Cart.objects(user_id__in=user_ids).delete()
+    Order.objects(user_id__in=user_ids).delete()
+    Medicine.objects(medicine_id__startswith=SKU_PREFIX).delete()
+    record_medicine_changes()
+
+
+def checkout(user_id, medicine_ids):
+    """Fill the cart, place the order, then retry it; returns (placed, checkout ms, retry ms, same order)"""
+    for medicine_id in medicine_ids:
+        add_to_cart(user_id, {"medicine_id": medicine_id, "quantity": 1})
+    body = {
+        "items": [{"medicine_id": medicine_id, "quantity": 1} for medicine_id in medicine_ids],
+        "delivery_address": ADDRESS
+    }
+    key = str(uuid.uuid4())
+
+    started = time.perf_counter()
+    placed, code = create_order(user_id, body, key)
+    checkout_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    replayed, _ = create_order(user_id, body, key)
+    retry_ms = (time.perf_counter() - started) * 1000
+    same = code == 201 and replayed.get("order", {}).get("order_id") == placed["order"]["order_id"]
+    return code == 201, checkout_ms, retry_ms, same
+
+
+def percentile(timings, fraction):
+    return timings[max(int(len(timings) * fraction) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    user_ids = [f"{USER_PREFIX}{index}" for index in range(args.checkouts)]
+    mode = "transaction" if supports_transactions(Order._get_db().client) else "compensation"
+    print(f"{args.checkouts} checkouts of {args.lines} lines, {args.workers} concurrent workers, placement by {mode}\n")
+    try:
+        medicine_ids = create_medicines(args.lines, args.checkouts)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(lambda user_id: checkout(user_id, medicine_ids), user_ids))
+        elapsed = time.perf_counter() - started
+
+        placed = sum(1 for succeeded, _, _, _ in results if succeeded)
+        print(f"{'request':<10}{'p50':>11}{'p95':>11}{'p99':>11}")
+        for label, column in (("checkout", 1), ("retry", 2)):
+            timings = sorted(result[column] for result in results)
+            print(
+                f"{label:<10}{statistics.median(timings):>9.1f}ms"
+                f"{percentile(timings, 0.95):>9.1f}ms{percentile(timings, 0.99):>9.1f}ms"
+            )
+        orders = Order.objects(user_id__in=user_ids).count()
+        left = Medicine.objects(medicine_id=medicine_ids[0]).first().stock
+        print(f"\nplaced {placed}/{args.checkouts} in {elapsed:.1f}s, {orders} orders stored, {left} units left per SKU")
+        print(f"retries answered with the original order: {sum(1 for *_, same in results if same)}")
+    finally:
+        cleanup(user_ids)
+
+
+if __name__ == "__main__":
+    main()
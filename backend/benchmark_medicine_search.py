@@ -0,0 +1,91 @@
+"""
+Latency benchmark for medicine search.
+
+Builds a synthetic 100k-medicine catalog in memory and compares the ranked
+inverted index behind /medicines/search with the previous path, which ran two
+case-insensitive substring regexes (name, description) over every document.
+The regex side is replayed in Python, so no database is needed; MongoDB does
+the same full scan without the index.
+"""
+import random
+import re
+import statistics
+import time
+from types import SimpleNamespace
+from app.services.medicine_search_service import MedicineSearchIndex
+
+CATALOG_SIZE = 100_000
+RUNS = 20
+RESULT_LIMIT = 50
+CATEGORIES = ["Pain Relief", "Vitamins", "Antibiotics", "Allergy", "Digestive", "Cold & Flu", "Skin Care", "Heart"]
+INGREDIENTS = [
+    "paracetamol", "ibuprofen", "aspirin", "cetirizine", "loratadine", "amoxicillin", "azithromycin",
+    "omeprazole", "ranitidine", "metformin", "atorvastatin", "amlodipine", "vitamin", "calcium",
+    "zinc", "magnesium", "iron", "folic", "biotin", "melatonin", "diclofenac", "naproxen", "guaifenesin"
+]
+FORMS = ["tablets", "capsules", "syrup", "gel", "drops", "cream", "spray", "sachets"]
+WORDS = [
+    "relief", "fast", "acting", "daily", "support", "immune", "formula", "extended", "release",
+    "adults", "children", "pain", "fever", "headache", "allergy", "symptoms", "digestive", "health",
+    "heart", "strength", "gentle", "stomach", "cold", "flu", "skin", "dryness", "sleep", "energy"
+]
+QUERIES = ["paracetamol", "vitamin tablets", "ibuprofn", "pain relief fast", "amoxicilin capsules", "melatonin sleep"]
+
+
+def build_catalog(seed=42):
+    rng = random.Random(seed)
+    catalog = []
+    for index in range(CATALOG_SIZE):
+        ingredient = rng.choice(INGREDIENTS)
+        catalog.append(SimpleNamespace(
+            medicine_id=f"med-{index}",
+            name=f"{ingredient.title()} {rng.choice([100, 200, 250, 500, 1000])}mg {rng.choice(FORMS).title()}",
+            description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))),
+            category=rng.choice(CATEGORIES),
+            in_stock=rng.random() < 0.9
+        ))
+    return catalog
+
+
+def regex_search(catalog, query):
+    """The previous search: name icontains OR description icontains, unranked"""
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    return [medicine for medicine in catalog if pattern.search(medicine.name) or pattern.search(medicine.description)]
+
+
+def time_runs(function):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    catalog = build_catalog()
+    print(f"Catalog: {len(catalog)} medicines")
+
+    started = time.perf_counter()
+    index = MedicineSearchIndex()
+    index.reset(catalog)
+    print(f"Index build: {(time.perf_counter() - started) * 1000:.0f} ms, {len(index.postings)} terms")
+    # The first query of each term computes its BM25 impacts once per catalog version
+    started = time.perf_counter()
+    for query in QUERIES:
+        index.search(query, limit=RESULT_LIMIT)
+    print(f"Impact warm-up: {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    print(f"{'query':<22}{'index p50':>12}{'index p95':>12}{'regex p50':>12}{'regex p95':>12}{'regex hits':>12}")
+    for query in QUERIES:
+        index_p50, index_p95 = time_runs(lambda: index.search(query, limit=RESULT_LIMIT))
+        regex_p50, regex_p95 = time_runs(lambda: regex_search(catalog, query))
+        hits = len(regex_search(catalog, query))
+        print(f"{query:<22}{index_p50:>10.2f}ms{index_p95:>10.2f}ms{regex_p50:>10.2f}ms{regex_p95:>10.2f}ms{hits:>12}")
+
+    print("\nTypo queries (ibuprofn, amoxicilin) find nothing with the regex path; the index ranks fuzzy matches.")
+
+
+if __name__ == "__main__":
+    main()
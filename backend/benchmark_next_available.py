@@ -0,0 +1,141 @@
+"""
+Latency benchmark for the next-available slot search.
+
+Seeds 500 doctors of one specialty with 90 days of bookings and times
+find_next_available end to end: doctor query, compiled schedules, the bulk
+appointment query with its decode, and the k-way merge. The bulk appointment
+load and the merge are also timed on their own, so the query cost is visible
+next to the in-memory work.
+
+Needs a running MongoDB. Creates temporary doctors, a user and appointments
+and removes them afterwards.
+
+Usage: python benchmark_next_available.py [--doctors 500] [--days 90] [--runs 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from mongoengine import connect
+from app.config import Config
+from app.models.appointments_models import Appointment
+from app.models.doctor_model import Doctor
+from app.models.user_models import User
+from app.services.schedule_service import compile_schedule, covered_minutes, get_compiled_schedules
+from app.services.slot_search_service import earliest_free_slots, find_next_available, load_booked_slots
+
+SPECIALTY = "Benchmark Next Available"
+DOCTOR_PREFIX = "bench-next-available-"
+USER_EMAIL = "bench-next-available@example.com"
+BOOKED_RATIO = 0.9
+RESULT_LIMIT = 10
+INSERT_BATCH_SIZE = 10000
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Connect to MongoDB
+connect(host=Config.MONGO_URI)
+
+
+def cleanup():
+    doctor_pks = list(Doctor.objects(doctor_id__startswith=DOCTOR_PREFIX).scalar("id"))
+    if doctor_pks:
+        Appointment.objects(doctor__in=doctor_pks).delete()
+    Doctor.objects(doctor_id__startswith=DOCTOR_PREFIX).delete()
+    User.objects(email=USER_EMAIL).delete()
+
+
+def seed(doctor_count, days, seed=42):
+    """Doctors of SPECIALTY with BOOKED_RATIO of their slots booked; returns the booking count"""
+    rng = random.Random(seed)
+    user = User(name="Benchmark User", email=USER_EMAIL, password="benchmark").save()
+    doctors = Doctor.objects.insert([
+        Doctor(
+            doctor_id=f"{DOCTOR_PREFIX}{index}", name=f"Dr Benchmark {index}", specialty=SPECIALTY,
+            availability=rng.sample(WEEKDAYS, 5), rating=round(rng.uniform(3.5, 5.0), 1)
+        )
+        for index in range(doctor_count)
+    ])
+
+    start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    collection = Appointment._get_collection()
+    batch = []
+    booking_count = 0
+    for doctor in doctors:
+        schedule = compile_schedule(doctor)
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            template = schedule.slots_for(day)
+            for slot in template.slots:
+                if rng.random() >= BOOKED_RATIO:
+                    continue
+                start_minute = template.starts[slot]
+                end_minute = start_minute + template.length
+                batch.append({
+                    "user": user.pk, "doctor": doctor.pk, "appointment_date": day, "appointment_time": slot,
+                    "start_minute": start_minute, "end_minute": end_minute,
+                    "occupied_minutes": list(covered_minutes(start_minute, end_minute)),
+                    "starts_at": day + timedelta(minutes=start_minute),
+                    "reason": "Benchmark", "status": "confirmed"
+                })
+                if len(batch) == INSERT_BATCH_SIZE:
+                    collection.insert_many(batch, ordered=False)
+                    booking_count += len(batch)
+                    batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        booking_count += len(batch)
+    return booking_count
+
+
+def timed(runs, call):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    cleanup()
+    try:
+        print("Seeding...")
+        booking_count = seed(args.doctors, args.days)
+        print(f"{args.doctors} doctors, {args.days} days, {booking_count} bookings\n")
+
+        doctors = list(Doctor.objects(specialty=SPECIALTY, is_active=True).order_by("-rating"))
+        doctor_pks = [doctor.pk for doctor in doctors]
+        schedules = get_compiled_schedules(doctors)
+        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        booked = load_booked_slots(doctor_pks, start_date, args.days)
+
+        rows = [
+            ("end to end", lambda: find_next_available(SPECIALTY, RESULT_LIMIT, args.days)),
+            ("booking load", lambda: load_booked_slots(doctor_pks, start_date, args.days)),
+            ("merge", lambda: earliest_free_slots(doctors, schedules, booked, start_date, args.days, RESULT_LIMIT))
+        ]
+        print(f"{'stage':<14}{'p50':>11}{'p95':>11}{'max':>11}")
+        results = {}
+        for label, call in rows:
+            timings, results[label] = timed(args.runs, call)
+            print(
+                f"{label:<14}{statistics.median(timings):>9.1f}ms"
+                f"{timings[max(int(len(timings) * 0.95) - 1, 0)]:>9.1f}ms{timings[-1]:>9.1f}ms"
+            )
+        found = results["end to end"]
+        print(f"\nResults per query: {len(found)}")
+        if found:
+            print(f"First result: {found[0][0].doctor_id} at {found[0][1]}")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Contention benchmark for stock reservation.
+
+Hundreds of concurrent checkouts compete for the same SKU. The reservations
+behind create_order (guarded conditional decrements) are compared with the
+read-check-save pattern they replace, which oversells under load: the
+standalone path (one decrement per line, compensated when a line is short)
+always, and on a replica set also the transactional path (one bulk write per
+order, aborted as a whole). Every checkout also takes one unit of a second,
+plentiful SKU, so multi-line orders that fail give everything back.
+
+Needs running MongoDB and Redis. Creates two temporary medicines and removes
+them afterwards.
+
+Usage: python benchmark_stock_contention.py [--checkouts 500] [--stock 100] [--workers 64]
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mongoengine import connect
+from app.config import Config
+from app.models.medicine_model import Medicine
+from app.services.checkout_service import supports_transactions
+from app.services.inventory_service import reserve_stock, take_stock_in_transaction
+
+HOT_SKU = "bench-hot-sku"
+SIDE_SKU = "bench-side-sku"
+
+# Connect to MongoDB
+connect(host=Config.MONGO_URI)
+
+
+def create_medicines(hot_stock, side_stock):
+    Medicine.objects(medicine_id__in=[HOT_SKU, SIDE_SKU]).delete()
+    for medicine_id, stock in ((HOT_SKU, hot_stock), (SIDE_SKU, side_stock)):
+        Medicine(
+            medicine_id=medicine_id, name=medicine_id, category="benchmark", price=1,
+            description="Contention benchmark", image="", stock=stock
+        ).save()
+
+
+def stock_levels():
+    return {medicine.medicine_id: medicine.stock for medicine in Medicine.objects(medicine_id__in=[HOT_SKU, SIDE_SKU])}
+
+
+class ShortStock(Exception):
+    pass
+
+
+def guarded_checkout():
+    return reserve_stock({HOT_SKU: 1, SIDE_SKU: 1}) is None
+
+
+def transaction_checkout():
+    def take(session):
+        if take_stock_in_transaction({HOT_SKU: 1, SIDE_SKU: 1}, session):
+            raise ShortStock()
+
+    try:
+        with Medicine._get_db().client.start_session() as session:
+            session.with_transaction(take)
+    except ShortStock:
+        return False
+    return True
+
+
+def read_check_save_checkout():
+    """The previous pattern: load each medicine, check, then save the new level"""
+    medicines = {medicine.medicine_id: medicine for medicine in Medicine.objects(medicine_id__in=[HOT_SKU, SIDE_SKU])}
+    if any(medicine.stock < 1 for medicine in medicines.values()):
+        return False
+    for medicine in medicines.values():
+        medicine.stock -= 1
+        medicine.save()
+    return True
+
+
+def run(label, checkout, checkouts, hot_stock, workers):
+    create_medicines(hot_stock, checkouts)
+
+    def timed(_):
+        started = time.perf_counter()
+        succeeded = checkout()
+        return succeeded, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(timed, range(checkouts)))
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(latency for _, latency in results)
+    sold = sum(1 for succeeded, _ in results if succeeded)
+    levels = stock_levels()
+    # Units actually removed from the hot SKU versus checkouts that were told they succeeded
+    oversold = sold - (hot_stock - levels[HOT_SKU])
+    print(
+        f"{label:<18}{sold:>6}{hot_stock:>7}{levels[HOT_SKU]:>7}{levels[SIDE_SKU]:>7}{max(oversold, 0):>10}"
+        f"{statistics.median(timings):>9.1f}ms{timings[int(len(timings) * 0.95) - 1]:>9.1f}ms{checkouts / elapsed:>10.0f}/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{args.checkouts} checkouts of 1 unit against {args.stock} units, {args.workers} concurrent workers\n")
+    print(f"{'path':<18}{'sold':>6}{'stock':>7}{'left':>7}{'side':>7}{'oversold':>10}{'p50':>11}{'p95':>11}{'rate':>12}")
+    try:
+        run("guarded", guarded_checkout, args.checkouts, args.stock, args.workers)
+        if supports_transactions(Medicine._get_db().client):
+            run("transaction", transaction_checkout, args.checkouts, args.stock, args.workers)
+        run("read-check-save", read_check_save_checkout, args.checkouts, args.stock, args.workers)
+    finally:
+        Medicine.objects(medicine_id__in=[HOT_SKU, SIDE_SKU]).delete()
+
+    print("\nThe guarded paths sell exactly the available units; the side SKU only loses units for orders that went through.")
+
+
+if __name__ == "__main__":
+    main()
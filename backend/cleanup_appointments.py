@@ -1,51 +1,103 @@
 """
 Cleanup script to remove appointments with invalid doctor references
+
+Streams appointments in _id order and anti-joins them against the set of
+existing doctor ids held in memory, deleting orphans with one delete_many
+per chunk. Progress is checkpointed after every chunk, so an interrupted run
+picks up where it stopped.
+
+Usage: python cleanup_appointments.py [--dry-run] [--chunk-size 5000] [--restart]
 """
+import argparse
+import json
+import os
+from bson import ObjectId
 from mongoengine import connect
 from app.models.appointments_models import Appointment
 from app.models.doctor_model import Doctor
 from app.config import Config
+from app.services.dashboard_counter_service import rebuild_dashboard_counters
 
 # Connect to MongoDB
 connect(host=Config.MONGO_URI)
 
-def cleanup_invalid_appointments():
-    """Remove or fix appointments with invalid doctor references"""
+CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cleanup_appointments.checkpoint")
+
+
+def _load_checkpoint():
+    if not os.path.exists(CHECKPOINT_FILE):
+        return None
+    with open(CHECKPOINT_FILE) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(last_id, scanned, deleted):
+    with open(CHECKPOINT_FILE, "w") as f:
+        json.dump({"last_id": str(last_id), "scanned": scanned, "deleted": deleted}, f)
+
+
+def cleanup_invalid_appointments(chunk_size=5000, dry_run=False, restart=False):
+    """Remove appointments whose doctor reference no longer resolves"""
     print("Starting cleanup of invalid appointments...")
-    
-    # Get all appointments
-    all_appointments = Appointment.objects()
-    print(f"Total appointments: {all_appointments.count()}")
-    
-    invalid_count = 0
-    fixed_count = 0
-    
-    for appointment in all_appointments:
-        try:
-            # Try to access doctor
-            if appointment.doctor:
-                doctor_id = appointment.doctor.doctor_id
-                # Check if doctor exists in database
-                doctor = Doctor.objects(doctor_id=doctor_id).first()
-                if not doctor:
-                    print(f"⚠️  Appointment {appointment.id} references non-existent doctor {doctor_id}")
-                    # Delete the invalid appointment
-                    appointment.delete()
-                    invalid_count += 1
-                    print(f"   Deleted appointment {appointment.id}")
-        except Exception as e:
-            print(f"❌ Error processing appointment {appointment.id}: {str(e)}")
-            # Delete problematic appointment
-            try:
-                appointment.delete()
-                invalid_count += 1
-                print(f"   Deleted problematic appointment {appointment.id}")
-            except:
-                pass
-    
+    if dry_run:
+        print("DRY RUN - nothing will be deleted")
+
+    collection = Appointment._get_collection()
+    total = collection.estimated_document_count()
+    print(f"Total appointments: {total}")
+
+    # The doctors collection is small, so the anti-join side fits in memory
+    doctor_ids = set(Doctor._get_collection().distinct("_id"))
+    print(f"Known doctors: {len(doctor_ids)}")
+
+    last_id = None
+    scanned = 0
+    deleted = 0
+    checkpoint = None if (restart or dry_run) else _load_checkpoint()
+    if checkpoint:
+        last_id = ObjectId(checkpoint["last_id"])
+        scanned = checkpoint["scanned"]
+        deleted = checkpoint["deleted"]
+        print(f"Resuming after appointment {last_id} ({scanned} scanned, {deleted} deleted)")
+
+    while True:
+        batch_filter = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = list(
+            collection.find(batch_filter, {"doctor": 1})
+            .sort("_id", 1)
+            .limit(chunk_size)
+        )
+        if not batch:
+            break
+
+        orphan_ids = [doc["_id"] for doc in batch if doc.get("doctor") not in doctor_ids]
+        if orphan_ids and not dry_run:
+            deleted += collection.delete_many({"_id": {"$in": orphan_ids}}).deleted_count
+        elif orphan_ids:
+            deleted += len(orphan_ids)
+
+        scanned += len(batch)
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            _save_checkpoint(last_id, scanned, deleted)
+
+        action = "Would delete" if dry_run else "Deleted"
+        print(f"   Scanned {scanned}/{total} - {action} {deleted} invalid appointments")
+
+    if not dry_run:
+        if os.path.exists(CHECKPOINT_FILE):
+            os.remove(CHECKPOINT_FILE)
+        rebuild_dashboard_counters()
+
     print(f"\n✅ Cleanup completed!")
-    print(f"   Invalid appointments deleted: {invalid_count}")
-    print(f"   Valid appointments remaining: {Appointment.objects().count()}")
+    print(f"   Invalid appointments {'found' if dry_run else 'deleted'}: {deleted}")
+    print(f"   Valid appointments remaining: {collection.estimated_document_count()}")
+
 
 if __name__ == "__main__":
-    cleanup_invalid_appointments()
+    parser = argparse.ArgumentParser(description="Delete appointments that reference missing doctors")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Appointments scanned per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+    args = parser.parse_args()
+    cleanup_invalid_appointments(args.chunk_size, args.dry_run, args.restart)
@@ -0,0 +1,61 @@
+"""
+Shared pytest fixtures: an in-memory MongoDB (mongomock) and Redis (fakeredis).
+
+Tests using them are skipped when mongomock or fakeredis is not installed:
+pip install pytest mongomock fakeredis. test_catalog_query_plans.py needs a
+real MongoDB and skips when none is reachable.
+
+Usage: python -m pytest -q
+"""
+import sys
+import pytest
+
+# Scripts that drive a running server over HTTP; run them directly instead
+collect_ignore = ["test_all_endpoints.py", "test_admin_dashboard.py"]
+
+TEST_DATABASE = "healthcare_unit_tests"
+
+
+def _without_sort(add):
+    """mongomock's bulk builder predates the `sort` argument pymongo 4.9+ passes it"""
+    def wrapper(self, *args, **kwargs):
+        kwargs.pop("sort", None)
+        return add(self, *args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    from mongomock.collection import BulkOperationBuilder
+    from mongoengine import connect, disconnect
+    from app.services import medicine_catalog_service
+
+    for name in ("add_update", "add_replace"):
+        monkeypatch.setattr(BulkOperationBuilder, name, _without_sort(getattr(BulkOperationBuilder, name)))
+    # The in-process medicine catalog would still hold the previous test's medicines
+    monkeypatch.setitem(medicine_catalog_service._state, "medicines", None)
+    monkeypatch.setitem(medicine_catalog_service._state, "last_id", None)
+    disconnect()
+    client = connect(
+        TEST_DATABASE, host="mongodb://localhost",
+        mongo_client_class=mongomock.MongoClient, uuidRepresentation="standard"
+    )
+    yield client
+    client.drop_database(TEST_DATABASE)
+    disconnect()
+
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    """A fresh fakeredis client swapped into every app module holding redis_client"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from app.services import cart_store_service
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and hasattr(module, "redis_client"):
+            monkeypatch.setattr(module, "redis_client", client)
+    # No write-behind thread; tests call flush_dirty_carts themselves
+    monkeypatch.setattr(cart_store_service, "_flusher", object())
+    return client
@@ -6,6 +6,7 @@ from app.models.appointments_models import Appointment
 from app.models.doctor_model import Doctor
 from app.models.user_models import User
 from app.config import Config
+from app.services.dashboard_counter_service import rebuild_dashboard_counters
 from datetime import datetime, timedelta
 
 # Connect to MongoDB
@@ -58,6 +59,8 @@ def create_test_appointments():
         appointment.save()
         print(f"✅ Created appointment {i+1}: {user.name} with Dr. {doctor.name} - {status}")
     
+    rebuild_dashboard_counters()
+    
     print(f"\n✅ Successfully created {len(statuses)} test appointments!")
     print(f"Total appointments in database: {Appointment.objects().count()}")
 
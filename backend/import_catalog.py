@@ -0,0 +1,59 @@
+"""
+Import doctors or medicines from a CSV or JSONL file
+
+The file is streamed, so it can be any size. Every row is validated and
+upserted keyed on doctor_id / medicine_id in batched bulk writes; nothing is
+deleted, and ids missing from the file are left as they are. Invalid rows
+are skipped and reported with their line numbers. Catalog caches (doctor
+catalog version, specialty facets, medicine change stream) are refreshed
+once at the end.
+
+CSV files have one column per field with a header row; list fields
+(availability, qualifications) separate items with "|". JSONL files hold
+one JSON object per line.
+
+Usage: python import_catalog.py doctors|medicines PATH [--format csv|jsonl]
+                                [--batch-size 1000] [--workers 4]
+"""
+
+import argparse
+import sys
+import time
+from dotenv import load_dotenv
+from mongoengine import connect
+from app.config import Config
+from app.services.catalog_import_service import (
+    DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, READERS, SCHEMAS, import_file
+)
+
+load_dotenv()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import doctors or medicines from a CSV or JSONL file")
+    parser.add_argument("catalog", choices=list(SCHEMAS), help="Collection to import into")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=list(READERS), help="File format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per bulk write")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Bulk writes in flight at once; use 1 if repeated ids must apply in file order")
+    args = parser.parse_args()
+
+    connect(host=Config.MONGO_URI)
+    started = time.perf_counter()
+    try:
+        report = import_file(args.catalog, args.path, args.format, args.batch_size, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    for error in report.errors:
+        print(f"❌ Line {error[0]}: {error[1]}")
+    if report.failed > len(report.errors):
+        print(f"... and {report.failed - len(report.errors)} more errors")
+    print(f"\n{report.rows} rows in {elapsed:.1f}s ({report.rows / max(elapsed, 1e-9):.0f} rows/s)")
+    print(f"✅ {report.inserted} added, {report.updated} updated, {report.unchanged} unchanged")
+    if report.failed:
+        print(f"❌ {report.failed} rows failed")
+        sys.exit(1)
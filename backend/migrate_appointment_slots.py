@@ -0,0 +1,118 @@
+"""
+Online migration that backfills start_minute, starts_at, end_minute and
+occupied_minutes on appointments.
+
+Safe to run while the API is serving traffic: it walks the collection in _id
+order in small batches, only touches documents that were never migrated, and
+can be stopped and re-run at any time. New and updated appointments fill the
+fields themselves in Appointment.save(). Appointments booked before slot
+lengths were configurable get the default slot length. Once every appointment
+is migrated, the unique index on occupied_minutes is built and the indexes it
+replaces dropped. That index filters on `status: {$in: [...]}`, which
+partial indexes only accept from MongoDB 6.0, so the script stops before the
+backfill on an older server.
+
+Usage: python migrate_appointment_slots.py [--batch-size 1000] [--pause 0.05]
+"""
+import argparse
+import time
+from datetime import timedelta
+from mongoengine import connect
+from pymongo import UpdateOne
+from app.models.appointments_models import Appointment, slot_start_minute
+from app.services.schedule_service import DEFAULT_SLOT_MINUTES, covered_minutes
+from app.config import Config
+
+# Indexes from before occupied_minutes was the conflict key
+RETIRED_INDEXES = ("unique_active_slot", "unique_active_start", "doctor_1_starts_at_1")
+# First server version accepting $in in a partialFilterExpression
+MIN_SERVER_VERSION = (6, 0)
+
+# Connect to MongoDB
+connect(host=Config.MONGO_URI)
+
+
+def migrate_appointment_slots(batch_size=1000, pause=0.05):
+    """Backfill the derived slot fields in batches of bulk updates"""
+    collection = Appointment._get_collection()
+    check_server_version(collection)
+    # Unparseable times are recorded as a null start_minute and not picked up again
+    pending_filter = {"$or": [
+        {"start_minute": {"$exists": False}},
+        {"start_minute": {"$ne": None}, "occupied_minutes": {"$exists": False}}
+    ]}
+    print(f"Appointments to migrate: {collection.count_documents(pending_filter)}")
+    
+    migrated = 0
+    unparseable = 0
+    last_id = None
+    while True:
+        batch_filter = dict(pending_filter)
+        if last_id is not None:
+            batch_filter["_id"] = {"$gt": last_id}
+        batch = list(
+            collection.find(batch_filter, {"appointment_date": 1, "appointment_time": 1, "start_minute": 1, "end_minute": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+        
+        operations = []
+        for doc in batch:
+            start_minute = slot_start_minute(doc.get("start_minute"), doc.get("appointment_time"))
+            update = {"start_minute": start_minute}
+            if start_minute is None:
+                unparseable += 1
+            else:
+                end_minute = doc.get("end_minute") or start_minute + DEFAULT_SLOT_MINUTES
+                update["end_minute"] = end_minute
+                update["occupied_minutes"] = list(covered_minutes(start_minute, end_minute))
+                if doc.get("appointment_date"):
+                    midnight = doc["appointment_date"].replace(hour=0, minute=0, second=0, microsecond=0)
+                    update["starts_at"] = midnight + timedelta(minutes=start_minute)
+            # The guard skips documents the API re-saved in the meantime
+            operations.append(UpdateOne(dict(pending_filter, _id=doc["_id"]), {"$set": update}))
+        
+        result = collection.bulk_write(operations, ordered=False)
+        migrated += result.modified_count
+        last_id = batch[-1]["_id"]
+        print(f"   Migrated {migrated} appointments (last id {last_id})")
+        
+        # Throttle so the migration does not starve live traffic
+        if pause:
+            time.sleep(pause)
+    
+    print(f"\n✅ Migration completed!")
+    print(f"   Appointments migrated: {migrated}")
+    print(f"   Unparseable appointment times: {unparseable}")
+    replace_indexes()
+
+
+def check_server_version(collection):
+    """Exit before touching anything when the server cannot build unique_active_minutes"""
+    version = tuple(collection.database.client.server_info()["versionArray"][:2])
+    if version < MIN_SERVER_VERSION:
+        raise SystemExit(
+            f"MongoDB {'.'.join(map(str, version))} cannot build the unique_active_minutes index; "
+            f"{'.'.join(map(str, MIN_SERVER_VERSION))}+ is required"
+        )
+
+
+def replace_indexes():
+    """Build the current indexes, then drop the ones they replace"""
+    collection = Appointment._get_collection()
+    Appointment.ensure_indexes()
+    existing = collection.index_information()
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+            print(f"   Dropped index {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill appointment slot fields")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+    migrate_appointment_slots(args.batch_size, args.pause)
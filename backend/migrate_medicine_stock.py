@@ -0,0 +1,72 @@
+"""
+Online migration that backfills stock on medicines created before inventory tracking.
+
+Medicines without a stock field cannot be reserved, so checkout answers 409
+for them even though they still show in_stock. Medicines marked in stock get
+--stock units, the others 0, and in_stock is re-derived from the result.
+Safe to run while the API is serving traffic and to re-run: it only touches
+documents that still have no stock field.
+
+Usage: python migrate_medicine_stock.py [--stock 100] [--batch-size 1000] [--pause 0.05]
+"""
+import argparse
+import time
+from mongoengine import connect
+from pymongo import UpdateOne
+from app.models.medicine_model import Medicine
+from app.services.medicine_catalog_service import record_medicine_changes
+from app.config import Config
+
+# Connect to MongoDB
+connect(host=Config.MONGO_URI)
+
+
+def migrate_medicine_stock(stock=100, batch_size=1000, pause=0.05):
+    """Backfill stock/in_stock in batches of bulk updates"""
+    collection = Medicine._get_collection()
+    pending_filter = {"stock": {"$exists": False}}
+    print(f"Medicines to migrate: {collection.count_documents(pending_filter)}")
+    
+    migrated = 0
+    last_id = None
+    while True:
+        batch_filter = dict(pending_filter)
+        if last_id is not None:
+            batch_filter["_id"] = {"$gt": last_id}
+        batch = list(collection.find(batch_filter, {"in_stock": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        
+        operations = []
+        for doc in batch:
+            level = stock if doc.get("in_stock", True) else 0
+            # The $exists guard skips medicines restocked through the API in the meantime
+            operations.append(UpdateOne(
+                {"_id": doc["_id"], "stock": {"$exists": False}},
+                {"$set": {"stock": level, "in_stock": level > 0}}
+            ))
+        
+        result = collection.bulk_write(operations, ordered=False)
+        migrated += result.modified_count
+        last_id = batch[-1]["_id"]
+        print(f"   Migrated {migrated} medicines (last id {last_id})")
+        
+        # Throttle so the migration does not starve live traffic
+        if pause:
+            time.sleep(pause)
+    
+    if migrated:
+        record_medicine_changes()
+    print(f"\n✅ Migration completed!")
+    print(f"   Medicines migrated: {migrated}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill medicine stock levels")
+    parser.add_argument("--stock", type=int, default=100, help="Units given to medicines currently in stock")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+    if args.stock < 0:
+        parser.error("--stock cannot be negative")
+    migrate_medicine_stock(args.stock, args.batch_size, args.pause)
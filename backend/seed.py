@@ -1,6 +1,6 @@
 from app import create_app
-from app.models.doctor_model import Doctor
-from app.models.medicine_model import Medicine
+from app.services.dashboard_counter_service import rebuild_dashboard_counters
+from app.services.catalog_import_service import import_records
 from mongoengine import connect
 import os
 from dotenv import load_dotenv
@@ -156,7 +156,7 @@ medicines_data = [
         "description": "For fever and pain relief",
         "image": "https://images.unsplash.com/photo-1584308666744-24d5c474f2ae?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.5,
         "reviews": 234
     },
@@ -168,7 +168,7 @@ medicines_data = [
         "description": "Anti-inflammatory and pain reliever",
         "image": "https://images.unsplash.com/photo-1471864190281-a93a3070b6de?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.7,
         "reviews": 189
     },
@@ -180,7 +180,7 @@ medicines_data = [
         "description": "Antibiotic for bacterial infections",
         "image": "https://images.unsplash.com/photo-1587854692152-cbe660dbde88?w=400&h=300&fit=crop",
         "requires_prescription": True,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.6,
         "reviews": 156
     },
@@ -192,7 +192,7 @@ medicines_data = [
         "description": "Bone health and immunity support",
         "image": "https://images.unsplash.com/photo-1550572017-edd951b55104?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.8,
         "reviews": 412
     },
@@ -204,7 +204,7 @@ medicines_data = [
         "description": "Complete daily vitamin supplement",
         "image": "https://images.unsplash.com/photo-1526434426615-1abe81efcb0b?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.5,
         "reviews": 328
     },
@@ -216,7 +216,7 @@ medicines_data = [
         "description": "Relief from cold and flu symptoms",
         "image": "https://images.unsplash.com/photo-1585435557343-3b092031a831?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.4,
         "reviews": 267
     },
@@ -228,7 +228,7 @@ medicines_data = [
         "description": "For allergy relief",
         "image": "https://images.unsplash.com/photo-1628771065518-0d82f1938462?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.6,
         "reviews": 198
     },
@@ -240,7 +240,7 @@ medicines_data = [
         "description": "Effective cough relief",
         "image": "https://images.unsplash.com/photo-1587854692152-cbe660dbde88?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": False,
+        "stock": 0,
         "rating": 4.3,
         "reviews": 145
     },
@@ -252,7 +252,7 @@ medicines_data = [
         "description": "Heart and brain health support",
         "image": "https://images.unsplash.com/photo-1607619056574-7b8d3ee536b2?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.7,
         "reviews": 389
     },
@@ -264,7 +264,7 @@ medicines_data = [
         "description": "Broad-spectrum antibiotic",
         "image": "https://images.unsplash.com/photo-1471864190281-a93a3070b6de?w=400&h=300&fit=crop",
         "requires_prescription": True,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.5,
         "reviews": 142
     },
@@ -276,7 +276,7 @@ medicines_data = [
         "description": "Immune system support",
         "image": "https://images.unsplash.com/photo-1584017911766-d451b3d0e843?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.6,
         "reviews": 456
     },
@@ -288,27 +288,22 @@ medicines_data = [
         "description": "Topical pain relief",
         "image": "https://images.unsplash.com/photo-1550572017-edd951b55104?w=400&h=300&fit=crop",
         "requires_prescription": False,
-        "in_stock": True,
+        "stock": 200,
         "rating": 4.4,
         "reviews": 223
     }
 ]
 
+def print_report(report):
+    print(f"{report.rows} rows: {report.inserted} added, {report.updated} updated, "
+          f"{report.unchanged} unchanged, {report.failed} failed")
+    for line, message in report.errors:
+        print(f"  ❌ Row {line}: {message}")
+
 def seed_doctors():
-    """Seed the database with doctors data"""
+    """Upsert the doctors data; doctors not listed here are left alone"""
     print("Starting to seed doctors...")
-    
-    # Clear existing doctors
-    Doctor.objects.delete()
-    print("Cleared existing doctors")
-    
-    # Add all doctors
-    for doctor_data in doctors_data:
-        doctor = Doctor(**doctor_data)
-        doctor.save()
-        print(f"Added: {doctor.name} - {doctor.specialty}")
-    
-    print(f"\nSuccessfully seeded {len(doctors_data)} doctors!")
+    print_report(import_records("doctors", enumerate(doctors_data, start=1)))
     
     # Display summary
     print("\n--- Doctors Summary ---")
@@ -317,20 +312,9 @@ def seed_doctors():
         print(f"{specialty}: {count} doctor(s)")
 
 def seed_medicines():
-    """Seed the database with medicines data"""
+    """Upsert the medicines data; medicines not listed here are left alone"""
     print("\nStarting to seed medicines...")
-    
-    # Clear existing medicines
-    Medicine.objects.delete()
-    print("Cleared existing medicines")
-    
-    # Add all medicines
-    for medicine_data in medicines_data:
-        medicine = Medicine(**medicine_data)
-        medicine.save()
-        print(f"Added: {medicine.name} - {medicine.category}")
-    
-    print(f"\nSuccessfully seeded {len(medicines_data)} medicines!")
+    print_report(import_records("medicines", enumerate(medicines_data, start=1)))
     
     # Display summary
     print("\n--- Medicines Summary ---")
@@ -340,5 +324,7 @@ def seed_medicines():
 
 if __name__ == "__main__":
     with app.app_context():
+        # The import refreshes the catalog caches whenever it changes something
         seed_doctors()
         seed_medicines()
+        rebuild_dashboard_counters()
@@ -0,0 +1,66 @@
+"""
+Unit tests for cart quantity validation in the Redis cart store and cart endpoints.
+
+Usage: python -m pytest -q test_cart_store.py
+"""
+import pytest
+from app.controllers.cart_controller import add_to_cart, update_cart_item
+from app.models.medicine_model import Medicine
+from app.services import cart_store_service as cart_store
+from app.services.medicine_catalog_service import record_medicine_changes
+
+USER_ID = "cart-test-user"
+INVALID_QUANTITIES = [0, -1, 1.5, "2", True, None]
+
+
+@pytest.fixture
+def medicine(mongo, redis_store):
+    medicine = Medicine(
+        medicine_id="cart-test-sku", name="Paracetamol", category="Pain Relief", price=40,
+        description="Cart test", image="", stock=10
+    ).save()
+    record_medicine_changes([medicine.medicine_id])
+    return medicine
+
+
+@pytest.mark.parametrize("quantity", [1, 3, 250])
+def test_valid_quantity_accepts_positive_ints(quantity):
+    assert cart_store.valid_quantity(quantity)
+
+
+@pytest.mark.parametrize("quantity", INVALID_QUANTITIES)
+def test_valid_quantity_rejects_everything_else(quantity):
+    assert not cart_store.valid_quantity(quantity)
+
+
+@pytest.mark.parametrize("quantity", INVALID_QUANTITIES)
+def test_store_writes_reject_invalid_quantities(redis_store, quantity):
+    with pytest.raises(ValueError):
+        cart_store.add_line(USER_ID, {"medicine_id": "any"}, quantity)
+    with pytest.raises(ValueError):
+        cart_store.set_quantity(USER_ID, "any", quantity)
+    assert not redis_store.exists(cart_store.cart_key(USER_ID))
+
+
+@pytest.mark.parametrize("quantity", [0, -2, "3", False])
+def test_endpoints_return_400_for_invalid_quantities(medicine, quantity):
+    add_to_cart(USER_ID, {"medicine_id": medicine.medicine_id, "quantity": 1})
+
+    _, code = add_to_cart(USER_ID, {"medicine_id": medicine.medicine_id, "quantity": quantity})
+    assert code == 400
+    _, code = update_cart_item(USER_ID, medicine.medicine_id, {"quantity": quantity})
+    assert code == 400
+    assert [line["quantity"] for line in cart_store.get_cart_lines(USER_ID)] == [1]
+
+
+def test_update_sets_quantity(medicine):
+    add_to_cart(USER_ID, {"medicine_id": medicine.medicine_id, "quantity": 2})
+    _, code = update_cart_item(USER_ID, medicine.medicine_id, {"quantity": 5})
+    assert code == 200
+    assert [line["quantity"] for line in cart_store.get_cart_lines(USER_ID)] == [5]
+
+
+def test_cached_lines_with_bad_quantities_are_dropped(medicine, redis_store):
+    add_to_cart(USER_ID, {"medicine_id": medicine.medicine_id, "quantity": 2})
+    redis_store.hset(cart_store.cart_key(USER_ID), f"q:{medicine.medicine_id}", "-4")
+    assert cart_store.get_cart_lines(USER_ID) == []
@@ -0,0 +1,161 @@
+"""
+Query plan check for /api/doctors/search and /api/medicines/query
+
+Seeds a small doctor and medicine catalog, explains every supported filter
+combination against it and fails if a winning plan scans the collection or
+sorts in memory. Runs against a dedicated test database given by
+TEST_MONGO_URI and is skipped when that is unset, equal to MONGO_URI or not
+reachable. Redis is never touched; the seeded documents are removed afterwards.
+
+Usage: TEST_MONGO_URI=mongodb://localhost:27017/health_care_test python -m pytest -q test_catalog_query_plans.py
+"""
+import itertools
+import os
+import sys
+import pytest
+from mongoengine import connect, disconnect
+from pymongo.errors import PyMongoError
+from app.config import Config
+from app.models.doctor_model import Doctor
+from app.models.doctor_schedule_model import WEEKDAYS
+from app.models.medicine_model import Medicine
+from app.services.doctor_search_service import SORT_FIELDS, search_queryset
+from app.services.medicine_query_service import SORT_FIELDS as MEDICINE_SORT_FIELDS, query_queryset
+from app.services.pagination_service import encode_cursor
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI")
+SEED_PREFIX = "query-plan-test-"
+SEED_SIZE = 60
+SERVER_TIMEOUT_MS = 2000
+
+OPTIONAL_FILTERS = {
+    "specialty": "Cardiologist",
+    "fee": {"min_fee": 300, "max_fee": 900},
+    "min_rating": 4.0,
+    "min_experience": 5,
+    "day": "Monday"
+}
+ACTIVE_OPTIONS = [None, True, False]
+MEDICINE_FILTERS = {
+    "category": "Pain Relief",
+    "price": {"min_price": 50, "max_price": 500},
+    "in_stock": True,
+    "requires_prescription": False,
+    "min_rating": 4.0
+}
+SPECIALTIES = ["Cardiologist", "Dermatologist", "Neurologist", "Pediatrician"]
+CATEGORIES = ["Pain Relief", "Antibiotics", "Vitamins", "Allergy"]
+
+
+def plan_stages(plan):
+    """Every stage name in a (possibly nested) explain plan"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+def winning_plan(queryset):
+    planner = queryset.limit(21).explain()["queryPlanner"]
+    plan = planner["winningPlan"]
+    # The slot-based engine nests the classic plan one level down
+    return plan.get("queryPlan", plan)
+
+
+def filter_combinations(optional_filters, base_filters=({},)):
+    names = list(optional_filters)
+    for size in range(len(names) + 1):
+        for chosen in itertools.combinations(names, size):
+            for base in base_filters:
+                filters = dict(base)
+                for name in chosen:
+                    value = optional_filters[name]
+                    if isinstance(value, dict):
+                        filters.update(value)
+                    else:
+                        filters[name] = value
+                yield filters
+
+
+def bad_plans(label, sample, sort_fields, build_queryset, combinations):
+    """Explain every filter/sort/order/cursor combination; returns the plans not served by an index scan"""
+    failures = []
+    for filters in combinations:
+        for sort, (field, _) in sort_fields.items():
+            for order in ("asc", "desc"):
+                for cursor in (None, encode_cursor(getattr(sample, field), sample.pk)):
+                    stages = plan_stages(winning_plan(build_queryset(filters, sort, order, cursor)))
+                    if "IXSCAN" not in stages or "COLLSCAN" in stages or "SORT" in stages:
+                        failures.append(f"{label} sort={sort} order={order} cursor={bool(cursor)} filters={filters}: {stages}")
+    return failures
+
+
+def seed_catalog():
+    for index in range(SEED_SIZE):
+        Doctor(
+            doctor_id=f"{SEED_PREFIX}{index}", name=f"Dr Plan {index}", specialty=SPECIALTIES[index % len(SPECIALTIES)],
+            experience=index % 25, rating=3.0 + (index % 21) / 10, consultation_fee=200 + (index * 37) % 900,
+            availability=WEEKDAYS[index % 3:index % 3 + 4], is_active=index % 5 != 0
+        ).save()
+        Medicine(
+            medicine_id=f"{SEED_PREFIX}{index}", name=f"Plan medicine {index}", category=CATEGORIES[index % len(CATEGORIES)],
+            price=20 + (index * 29) % 700, description="Query plan test", image="",
+            requires_prescription=index % 3 == 0, stock=index % 4 * 10,
+            rating=3.0 + (index % 21) / 10, reviews=(index * 53) % 400
+        ).save()
+
+
+def remove_catalog():
+    Doctor.objects(doctor_id__startswith=SEED_PREFIX).delete()
+    Medicine.objects(medicine_id__startswith=SEED_PREFIX).delete()
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    if not TEST_MONGO_URI:
+        pytest.skip("TEST_MONGO_URI is not set")
+    if TEST_MONGO_URI == Config.MONGO_URI:
+        pytest.skip("TEST_MONGO_URI must not point at the application database")
+    disconnect()
+    client = connect(host=TEST_MONGO_URI, serverSelectionTimeoutMS=SERVER_TIMEOUT_MS)
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        disconnect()
+        pytest.skip(f"MongoDB not reachable at {TEST_MONGO_URI}: {e}")
+
+    Doctor.ensure_indexes()
+    Medicine.ensure_indexes()
+    remove_catalog()
+    seed_catalog()
+    yield
+    remove_catalog()
+    disconnect()
+
+
+def test_doctor_search_plans_use_indexes(catalog):
+    sample = Doctor.objects(doctor_id=f"{SEED_PREFIX}1").first()
+    failures = bad_plans(
+        "doctors", sample, SORT_FIELDS, search_queryset,
+        filter_combinations(OPTIONAL_FILTERS, [{"is_active": is_active} for is_active in ACTIVE_OPTIONS])
+    )
+    assert not failures, "\n".join(failures)
+
+
+def test_medicine_query_plans_use_indexes(catalog):
+    sample = Medicine.objects(medicine_id=f"{SEED_PREFIX}1").first()
+    failures = bad_plans(
+        "medicines", sample, MEDICINE_SORT_FIELDS, query_queryset,
+        filter_combinations(MEDICINE_FILTERS)
+    )
+    assert not failures, "\n".join(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
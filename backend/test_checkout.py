@@ -0,0 +1,117 @@
+"""
+Unit tests for idempotent order placement.
+
+Usage: python -m pytest -q test_checkout.py
+"""
+import pytest
+from app.controllers.cart_controller import add_to_cart
+from app.controllers.order_controller import create_order
+from app.models.medicine_model import Medicine
+from app.models.order_model import Order
+from app.services import cart_store_service as cart_store
+from app.services.checkout_service import IdempotencyKeyReused, place_order
+from app.services.medicine_catalog_service import record_medicine_changes
+
+USER_ID = "checkout-test-user"
+SKU = "checkout-test-sku"
+ADDRESS = {
+    "full_name": "Test User", "phone": "9999999999", "address_line1": "1 Test Street",
+    "city": "Pune", "state": "Maharashtra", "pincode": "411001"
+}
+
+
+@pytest.fixture
+def medicine(mongo, redis_store):
+    medicine = Medicine(
+        medicine_id=SKU, name="Cetirizine", category="Allergy", price=60,
+        description="Checkout test", image="", stock=5
+    ).save()
+    Order.ensure_indexes()
+    record_medicine_changes([SKU])
+    return medicine
+
+
+def checkout(quantity=2, key="retry-key"):
+    add_to_cart(USER_ID, {"medicine_id": SKU, "quantity": quantity})
+    body = {"items": [{"medicine_id": SKU, "quantity": quantity}], "delivery_address": ADDRESS}
+    return create_order(USER_ID, body, key)
+
+
+def stock():
+    return Medicine.objects(medicine_id=SKU).first().stock
+
+
+def test_retry_with_same_key_returns_the_first_order(medicine):
+    placed, code = checkout()
+    assert code == 201
+
+    replayed, code = checkout()
+    assert code == 200
+    assert replayed["order"]["order_id"] == placed["order"]["order_id"]
+    assert Order.objects(user_id=USER_ID).count() == 1
+    assert stock() == 3
+    assert cart_store.get_cart_lines(USER_ID) == []
+
+
+def test_different_keys_place_separate_orders(medicine):
+    assert checkout(key="first")[1] == 201
+    assert checkout(key="second")[1] == 201
+    assert Order.objects(user_id=USER_ID).count() == 2
+    assert stock() == 1
+
+
+def test_short_stock_places_nothing(medicine):
+    body, code = checkout(quantity=6)
+    assert code == 409
+    assert body["medicine_id"] == SKU
+    assert not Order.objects(user_id=USER_ID).count()
+    assert stock() == 5
+    assert [line["quantity"] for line in cart_store.get_cart_lines(USER_ID)] == [6]
+
+
+@pytest.mark.parametrize("key", ["", "   ", 42, "k" * 256])
+def test_malformed_key_is_rejected(medicine, key):
+    _, code = checkout(key=key)
+    assert code == 400
+    assert not Order.objects(user_id=USER_ID).count()
+
+
+def test_losing_a_concurrent_attempt_returns_the_winner(medicine):
+    placed, _ = checkout()
+    winner = Order.objects(order_id=placed["order"]["order_id"]).first()
+
+    # A second attempt that passed the replay check before the first one was stored
+    duplicate = Order(
+        order_id="ORD-DUPLICATE", user_id=USER_ID, items=winner.items, delivery_address=winner.delivery_address,
+        subtotal=winner.subtotal, delivery_charges=winner.delivery_charges, total=winner.total,
+        stock_reserved=True, idempotency_key=winner.idempotency_key
+    )
+    order, short = place_order(duplicate, {SKU: 2})
+    assert short is None
+    assert order.order_id == winner.order_id
+    assert Order.objects(user_id=USER_ID).count() == 1
+    assert stock() == 3
+
+
+def test_key_reused_for_different_items_is_rejected(medicine):
+    assert checkout(quantity=2)[1] == 201
+    body, code = checkout(quantity=1)
+    assert code == 422
+    assert not body["success"]
+    assert Order.objects(user_id=USER_ID).count() == 1
+    assert stock() == 3
+
+
+def test_losing_a_concurrent_attempt_for_different_items_is_rejected(medicine):
+    placed, _ = checkout()
+    winner = Order.objects(order_id=placed["order"]["order_id"]).first()
+
+    duplicate = Order(
+        order_id="ORD-DUPLICATE", user_id=USER_ID, items=winner.items, delivery_address=winner.delivery_address,
+        subtotal=winner.subtotal, delivery_charges=winner.delivery_charges, total=winner.total,
+        stock_reserved=True, idempotency_key=winner.idempotency_key
+    )
+    with pytest.raises(IdempotencyKeyReused):
+        place_order(duplicate, {SKU: 1})
+    assert Order.objects(user_id=USER_ID).count() == 1
+    assert stock() == 3
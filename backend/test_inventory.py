@@ -0,0 +1,75 @@
+"""
+Unit tests for guarded stock reservation and release.
+
+Usage: python -m pytest -q test_inventory.py
+"""
+import pytest
+from app.models.medicine_model import Medicine
+from app.services.inventory_service import release_stock, reserve_stock, take_stock_in_transaction
+
+
+@pytest.fixture
+def medicines(mongo, redis_store):
+    stock = {"sku-a": 5, "sku-b": 2, "sku-empty": 0}
+    for medicine_id, units in stock.items():
+        Medicine(
+            medicine_id=medicine_id, name=medicine_id, category="Pain Relief", price=10,
+            description="Inventory test", image="", stock=units
+        ).save()
+    return stock
+
+
+def stock_levels():
+    return {medicine.medicine_id: (medicine.stock, medicine.in_stock) for medicine in Medicine.objects}
+
+
+def test_reserve_takes_every_line(medicines):
+    assert reserve_stock({"sku-a": 3, "sku-b": 2}) is None
+    levels = stock_levels()
+    assert levels["sku-a"] == (2, True)
+    assert levels["sku-b"] == (0, False)
+
+
+def test_short_line_releases_the_lines_taken_before_it(medicines):
+    assert reserve_stock({"sku-a": 4, "sku-b": 3}) == "sku-b"
+    levels = stock_levels()
+    assert levels["sku-a"] == (5, True)
+    assert levels["sku-b"] == (2, True)
+
+
+def test_out_of_stock_medicine_is_short(medicines):
+    assert reserve_stock({"sku-empty": 1}) == "sku-empty"
+    assert stock_levels()["sku-empty"] == (0, False)
+
+
+def test_unknown_medicine_is_short_and_never_created(medicines):
+    assert reserve_stock({"sku-a": 1, "sku-missing": 1}) == "sku-missing"
+    assert not Medicine.objects(medicine_id="sku-missing").count()
+    assert stock_levels()["sku-a"] == (5, True)
+
+
+def test_release_returns_stock_and_restores_in_stock(medicines):
+    assert reserve_stock({"sku-b": 2}) is None
+    release_stock({"sku-b": 2, "sku-empty": 1})
+    levels = stock_levels()
+    assert levels["sku-b"] == (2, True)
+    assert levels["sku-empty"] == (1, True)
+
+
+def test_reservations_never_oversell(medicines):
+    results = [reserve_stock({"sku-a": 2}) for _ in range(4)]
+    assert results == [None, None, "sku-a", "sku-a"]
+    assert stock_levels()["sku-a"] == (1, True)
+
+
+def test_transaction_bulk_takes_every_line(medicines):
+    assert take_stock_in_transaction({"sku-a": 3, "sku-b": 2}, None) is None
+    levels = stock_levels()
+    assert levels["sku-a"] == (2, True)
+    assert levels["sku-b"] == (0, False)
+
+
+@pytest.mark.parametrize("short", ["sku-b", "sku-missing"])
+def test_transaction_bulk_names_the_short_line(medicines, short):
+    # Without a session nothing is rolled back; inside checkout the abort undoes sku-a
+    assert take_stock_in_transaction({"sku-a": 1, short: 3}, None) == short
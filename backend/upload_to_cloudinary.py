@@ -1,122 +1,221 @@
 """
-Upload doctor images to Cloudinary
-This script uploads local doctor images to Cloudinary and returns the Cloudinary URLs
+Upload doctor images and store their URLs on the doctors
+
+Uploads run on a bounded thread pool. Images are keyed by the SHA-256 of
+their content, so identical files are uploaded once, and every finished
+upload is recorded in a manifest file; a rerun (or a run that was
+interrupted) only uploads what the manifest does not already hold.
+Thumbnail, card and full-size variants are produced at upload time (or
+derived from CDN transformations on Cloudinary). The resulting URLs are
+written to Doctor.img and Doctor.img_variants with one bulk write.
+
+The storage backend is pluggable: "cloudinary" (default) or "local", which
+copies files under app/static/uploads and works offline.
+
+Usage: python upload_to_cloudinary.py [--backend cloudinary|local] [--workers 4]
+                                      [--manifest PATH] [--no-db]
 """
 
-import cloudinary
-import cloudinary.uploader
+import argparse
+import hashlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from mongoengine import connect
+from pymongo import UpdateOne
+from app.config import Config
+from app.models.doctor_model import Doctor
+from app.services.doctor_catalog_service import bump_catalog_version
+from app.services.image_storage_service import get_storage_backend
 
 load_dotenv()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
-
 # Get the project root directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_ASSETS = os.path.join(BASE_DIR, "..", "Healthcare", "src", "assets")
+KEY_PREFIX = "healthcare/doctors"
 
 # Doctor images - Map to local files
 doctors_images = [
     {
-        "public_id": "doctor-1",
+        "doctor_id": "doctor-1",
         "name": "Dr. Sarah Johnson",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor3.png")
     },
     {
-        "public_id": "doctor-2",
+        "doctor_id": "doctor-2",
         "name": "Dr. Micheal Lee",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor2.png")
     },
     {
-        "public_id": "doctor-3",
+        "doctor_id": "doctor-3",
         "name": "Dr. James Patel",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor1.jpg")
     },
     {
-        "public_id": "doctor-4",
+        "doctor_id": "doctor-4",
         "name": "Dr. Sophia Patel",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor4.png")
     },
     {
-        "public_id": "doctor-5",
+        "doctor_id": "doctor-5",
         "name": "Dr. Ethan Reynolds",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor5.png")
     },
     {
-        "public_id": "doctor-6",
+        "doctor_id": "doctor-6",
         "name": "Dr. Olivia Kim",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor6.png")
     },
     {
-        "public_id": "doctor-7",
+        "doctor_id": "doctor-7",
         "name": "Dr. Ava Thompson",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor7.png")
     },
     {
-        "public_id": "doctor-8",
+        "doctor_id": "doctor-8",
         "name": "Dr. Mason Gupta",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor8.png")
     },
     {
-        "public_id": "doctor-9",
+        "doctor_id": "doctor-9",
         "name": "Dr. James Nguyen",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor9.png")
     },
     {
-        "public_id": "doctor-10",
+        "doctor_id": "doctor-10",
         "name": "Dr. Benjamin Carter",
         "local_path": os.path.join(FRONTEND_ASSETS, "doctor10.webp")
+    },
+    {
+        "doctor_id": "doctor-11",
+        "name": "Dr. Charlotte Lee",
+        "local_path": os.path.join(FRONTEND_ASSETS, "doctor11.webp")
+    },
+    {
+        "doctor_id": "doctor-12",
+        "name": "Dr. Noah Martinez",
+        "local_path": os.path.join(FRONTEND_ASSETS, "doctor12.webp")
     }
 ]
 
-def upload_images():
-    """Upload local images to Cloudinary"""
-    cloudinary_urls = {}
-    
-    print("Starting upload to Cloudinary...\n")
-    print(f"Frontend Assets Path: {FRONTEND_ASSETS}\n")
-    
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_manifest_path(backend_name):
+    return os.path.join(BASE_DIR, f".image_uploads.{backend_name}.manifest.json")
+
+
+def load_manifest(path):
+    """{content hash: {"url", "variants"}} of images already uploaded to this backend"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    # Plain URL entries were written before variants existed; upload those again
+    return {content_hash: entry for content_hash, entry in manifest.items() if isinstance(entry, dict)}
+
+
+def save_manifest(path, manifest):
+    # Write then rename, so an interrupted run never leaves a truncated manifest
+    partial = path + ".part"
+    with open(partial, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial, path)
+
+
+def upload_images(backend, workers=4, manifest_path=None):
+    """Upload every distinct doctor image not yet in the manifest.
+
+    Returns {doctor_id: {"url": url, "variants": {variant: url}}}.
+    """
+    manifest_path = manifest_path or default_manifest_path(backend.name)
+    manifest = load_manifest(manifest_path)
+    manifest_lock = threading.Lock()
+
+    print(f"Uploading doctor images with the '{backend.name}' backend...\n")
+    print(f"Frontend Assets Path: {FRONTEND_ASSETS}")
+    print(f"Manifest: {manifest_path}\n")
+
+    # Group doctors by image content so duplicates share one upload
+    doctors_by_hash = {}
+    sources = {}
     for doctor in doctors_images:
-        try:
-            # Check if file exists
-            if not os.path.exists(doctor['local_path']):
-                print(f"⚠️  File not found: {doctor['local_path']}")
+        if not os.path.exists(doctor['local_path']):
+            print(f"⚠️  File not found: {doctor['local_path']}")
+            continue
+        content_hash = file_sha256(doctor['local_path'])
+        doctors_by_hash.setdefault(content_hash, []).append(doctor)
+        sources.setdefault(content_hash, doctor['local_path'])
+
+    pending = [content_hash for content_hash in doctors_by_hash if content_hash not in manifest]
+    print(f"{len(doctors_by_hash)} distinct images, {len(doctors_by_hash) - len(pending)} already uploaded, "
+          f"{len(pending)} to upload\n")
+
+    def upload(content_hash):
+        # Content-addressed keys: the same bytes always map to the same object
+        key = f"{KEY_PREFIX}/{content_hash[:20]}"
+        url = backend.upload(sources[content_hash], key)
+        return {"url": url, "variants": backend.upload_variants(sources[content_hash], key, url)}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(upload, content_hash): content_hash for content_hash in pending}
+        for future in as_completed(futures):
+            content_hash = futures[future]
+            names = ", ".join(doctor['name'] for doctor in doctors_by_hash[content_hash])
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"❌ Error uploading {names}: {str(e)}")
                 continue
-            
-            print(f"Uploading {doctor['name']} from {os.path.basename(doctor['local_path'])}...")
-            
-            # Upload image to Cloudinary
-            result = cloudinary.uploader.upload(
-                doctor['local_path'],
-                public_id=f"healthcare/doctors/{doctor['public_id']}",
-                folder="healthcare/doctors",
-                overwrite=True,
-                resource_type="image"
-            )
-            
-            cloudinary_urls[doctor['public_id']] = result['secure_url']
-            print(f"✅ Uploaded: {result['secure_url']}\n")
-            
-        except Exception as e:
-            print(f"❌ Error uploading {doctor['name']}: {str(e)}\n")
-    
-    print("\n" + "="*80)
-    print("CLOUDINARY URLS - Copy these to seed.py:")
-    print("="*80)
-    for key, url in cloudinary_urls.items():
-        print(f'"{key}": "{url}",')
-    
-    return cloudinary_urls
+            with manifest_lock:
+                manifest[content_hash] = entry
+                save_manifest(manifest_path, manifest)
+            print(f"✅ Uploaded {names}: {entry['url']} ({len(entry['variants'])} variants)")
+
+    return {
+        doctor['doctor_id']: manifest[content_hash]
+        for content_hash, doctors in doctors_by_hash.items() if content_hash in manifest
+        for doctor in doctors
+    }
+
+
+def update_doctor_images(images):
+    """Write image and variant URLs to the doctors in one bulk write; returns the number changed"""
+    if not images:
+        return 0
+    connect(host=Config.MONGO_URI)
+    result = Doctor._get_collection().bulk_write([
+        UpdateOne(
+            {"doctor_id": doctor_id, "$or": [{"img": {"$ne": entry["url"]}}, {"img_variants": {"$ne": entry["variants"]}}]},
+            {"$set": {"img": entry["url"], "img_variants": entry["variants"]}}
+        )
+        for doctor_id, entry in images.items()
+    ], ordered=False)
+    if result.modified_count:
+        bump_catalog_version()
+    return result.modified_count
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload doctor images and store their URLs on the doctors")
+    parser.add_argument("--backend", default=os.getenv("STORAGE_BACKEND", "cloudinary"),
+                        help="Storage backend: cloudinary or local")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent uploads")
+    parser.add_argument("--manifest", help="Manifest file (default: one per backend next to this script)")
+    parser.add_argument("--no-db", action="store_true", help="Upload only; do not update Doctor.img")
+    args = parser.parse_args()
+
     # Check if Cloudinary credentials are set
-    if not all([
+    if args.backend == "cloudinary" and not all([
         os.getenv("CLOUDINARY_CLOUD_NAME"),
         os.getenv("CLOUDINARY_API_KEY"),
         os.getenv("CLOUDINARY_API_SECRET")
@@ -127,5 +226,9 @@ if __name__ == "__main__":
         print("CLOUDINARY_API_KEY=your_api_key")
         print("CLOUDINARY_API_SECRET=your_api_secret")
         print("\nGet your credentials from: https://cloudinary.com/console")
+        print("Or run offline with: python upload_to_cloudinary.py --backend local")
     else:
-        upload_images()
+        images = upload_images(get_storage_backend(args.backend), max(1, args.workers), args.manifest)
+        print(f"\n{len(images)} doctors have an uploaded image")
+        if not args.no_db:
+            print(f"Updated Doctor.img for {update_doctor_images(images)} doctors")